@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import bindparam, func, insert, or_, select
+from sqlalchemy.exc import SQLAlchemyError
 from database.models import User, Receipt, Vendor, Category
 from utils.security import hash_password 
 from datetime import date, datetime
@@ -10,14 +11,21 @@ logging.basicConfig(level=logging.INFO)
 
 # --- User CRUD Operations ---
 
+# Built once at import; each login only binds the username parameter
+_USER_BY_USERNAME = (
+    select(User)
+    .where(func.lower(User.username) == func.lower(bindparam("username")))
+    .limit(1)
+)
+
 def get_user_by_username(db: Session, username: str) -> User | None:
     """
-    Retrieves a user by their username.
+    Retrieves a user by their username (case-insensitive).
     :param db: SQLAlchemy database session.
     :param username: The username to search for.
     :return: User object if found, else None.
     """
-    return db.query(User).filter(func.lower(User.username) == func.lower(username)).first()
+    return db.execute(_USER_BY_USERNAME, {"username": username}).scalars().first()
 
 def get_user_by_id(db: Session, user_id: int) -> User | None:
     """
@@ -50,6 +58,22 @@ def create_user(db: Session, username: str, password: str, email: str = None) ->
     logging.info(f"User '{username}' created successfully.")
     return db_user
 
+def update_password_hash(db: Session, user_id: int, password_hash: str) -> bool:
+    """
+    Replaces a user's stored password hash (e.g., after re-hashing with a new cost factor).
+    :param db: SQLAlchemy database session.
+    :param user_id: The ID of the user.
+    :param password_hash: The new hashed password.
+    :return: True if the user was found and updated, else False.
+    """
+    db_user = get_user_by_id(db, user_id)
+    if not db_user:
+        return False
+    db_user.password_hash = password_hash
+    db.commit()
+    logging.info(f"Password hash updated for user ID {user_id}.")
+    return True
+
 # --- Receipt CRUD Operations ---
 
 def create_receipt(
@@ -118,6 +142,100 @@ def create_receipt(
     logging.info(f"Receipt for '{vendor_name}' (Amount: {amount}) created for user {owner_id}.")
     return db_receipt
 
+def _ids_by_name(db: Session, model, names) -> tuple[dict[str, int], dict[str, Exception]]:
+    """
+    Private helper resolving vendor or category names to IDs (case-insensitively), creating the
+    missing ones. Each distinct name is looked up with the same `lower(name) = lower(?)` filter as
+    `create_receipt`, so the database's own case folding decides what matches (SQLite's lower()
+    only folds ASCII letters). Each new name is created in its own SAVEPOINT, so one rejected name
+    does not affect the others.
+    :return: Dictionary mapping each given name to its ID, and the errors of the names that could
+             not be created.
+    """
+    ids, failures = {}, {}
+    created = 0
+    for name in dict.fromkeys(names):
+        row_id = db.execute(select(model.id).where(func.lower(model.name) == func.lower(name))).scalar()
+        if row_id is None:
+            try:
+                with db.begin_nested():
+                    row = model(name=name)
+                    db.add(row)
+                    db.flush() # Assigns the new ID
+                row_id = row.id
+                created += 1
+            except SQLAlchemyError as e:
+                failures[name] = e
+                continue
+        ids[name] = row_id
+    if created or failures:
+        logging.info(f"Created {created} new {model.__tablename__} ({len(failures)} failed).")
+    return ids, failures
+
+def create_receipts_bulk(db: Session, owner_id: int, receipts: list[dict]) -> tuple[int, dict[int, Exception]]:
+    """
+    Creates many receipts in one transaction: each distinct vendor and category is resolved (and
+    created if missing) once, then all receipts are inserted with a single executemany INSERT.
+    The INSERT runs in a SAVEPOINT; if it fails, the receipts are inserted one by one, each in its
+    own SAVEPOINT, so a bad receipt is skipped instead of discarding the whole batch. A receipt whose
+    vendor or category could not be created is skipped the same way. Everything that was inserted
+    is committed together. Any other failure rolls back everything and is re-raised.
+    :param db: SQLAlchemy database session.
+    :param owner_id: ID of the user who owns the receipts.
+    :param receipts: One dict per receipt with the keyword arguments of `create_receipt`
+                     (vendor_name, transaction_date and amount required; the rest optional).
+    :return: The number of receipts created, and the errors of the receipts that could not be
+             inserted, keyed by their position in `receipts`.
+    """
+    if not receipts:
+        return 0, {}
+    failures = {}
+    try:
+        vendor_ids, vendor_failures = _ids_by_name(db, Vendor, (r["vendor_name"] for r in receipts))
+        category_ids, category_failures = _ids_by_name(
+            db, Category, (r["category_name"] for r in receipts if r.get("category_name"))
+        )
+        upload_date = datetime.now()
+        positions, rows = [], []
+        for position, r in enumerate(receipts):
+            name_error = vendor_failures.get(r["vendor_name"]) or category_failures.get(r.get("category_name"))
+            if name_error is not None:
+                failures[position] = name_error
+                continue
+            positions.append(position)
+            rows.append({
+                "owner_id": owner_id,
+                "vendor_id": vendor_ids[r["vendor_name"]],
+                "transaction_date": r["transaction_date"],
+                "amount": r["amount"],
+                "currency": r.get("currency", "USD"),
+                "category_id": category_ids[r["category_name"]] if r.get("category_name") else None,
+                "original_filename": r.get("original_filename", ""),
+                "parsed_raw_text": r.get("parsed_raw_text"),
+                "billing_period_start": r.get("billing_period_start"),
+                "billing_period_end": r.get("billing_period_end"),
+                "upload_date": upload_date,
+            })
+        try:
+            if rows:
+                with db.begin_nested():
+                    db.execute(insert(Receipt), rows)
+        except SQLAlchemyError as batch_error:
+            logging.warning(f"Batch insert failed for user {owner_id}, inserting receipts one by one: {batch_error}")
+            for position, row in zip(positions, rows):
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(Receipt), [row])
+                except SQLAlchemyError as row_error:
+                    failures[position] = row_error
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    created = len(receipts) - len(failures)
+    logging.info(f"{created} receipts created for user {owner_id} in one batch ({len(failures)} failed).")
+    return created, failures
+
 def get_receipts_by_user(
     db: Session,
     user_id: int,
@@ -153,6 +271,206 @@ def get_receipts_by_user(
 
     return query.offset(skip).limit(limit).all()
 
+def receipts_with_names_query(user_id: int):
+    """
+    Builds the SELECT for a user's receipts as flat rows with the vendor and category names joined in SQL,
+    newest transaction first. Can be executed directly or handed to pandas.read_sql_query.
+    :param user_id: The ID of the user whose receipts to select.
+    :return: A SQLAlchemy Select with the columns id, vendor_name, transaction_date, amount, currency,
+             category_name, original_filename and upload_date.
+    """
+    return (
+        select(
+            Receipt.id,
+            func.coalesce(Vendor.name, "Unknown Vendor").label("vendor_name"),
+            Receipt.transaction_date,
+            Receipt.amount,
+            Receipt.currency,
+            func.coalesce(Category.name, "Uncategorized").label("category_name"),
+            Receipt.original_filename,
+            Receipt.upload_date,
+        )
+        .outerjoin(Vendor, Receipt.vendor_id == Vendor.id)
+        .outerjoin(Category, Receipt.category_id == Category.id)
+        .where(Receipt.owner_id == user_id)
+        .order_by(Receipt.transaction_date.desc())
+    )
+
+def get_receipts_with_names(db: Session, user_id: int) -> list:
+    """
+    Retrieves all of a user's receipts as flat rows (see `receipts_with_names_query`).
+    No ORM objects are built and the vendor/category tables aren't loaded whole.
+    :param db: SQLAlchemy database session.
+    :param user_id: The ID of the user whose receipts to retrieve.
+    :return: A list of rows.
+    """
+    return db.execute(receipts_with_names_query(user_id)).all()
+
+# Sort keys accepted by get_receipts_filtered; names sort on the joined (coalesced) labels
+RECEIPT_SORT_KEYS = ("transaction_date", "upload_date", "amount", "vendor_name", "category_name")
+
+def _receipts_filter(stmt, user_id: int, q: str | None, amount_min: float | None, amount_max: float | None):
+    """
+    Private helper adding the owner, keyword and amount filters shared by the filtered list and its count.
+    The statement must already be outer-joined to Vendor and Category.
+    """
+    stmt = stmt.where(Receipt.owner_id == user_id)
+    if q:
+        # Case-insensitive substring match; autoescape keeps '%' and '_' in the query literal
+        stmt = stmt.where(or_(
+            Vendor.name.icontains(q, autoescape=True),
+            Category.name.icontains(q, autoescape=True),
+            Receipt.original_filename.icontains(q, autoescape=True),
+            Receipt.parsed_raw_text.icontains(q, autoescape=True),
+        ))
+    if amount_min is not None:
+        stmt = stmt.where(Receipt.amount >= amount_min)
+    if amount_max is not None:
+        stmt = stmt.where(Receipt.amount <= amount_max)
+    return stmt
+
+def get_receipts_filtered(
+    db: Session,
+    user_id: int,
+    q: str | None = None,
+    amount_min: float | None = None,
+    amount_max: float | None = None,
+    sort_key: str = "transaction_date",
+    desc: bool = True,
+    limit: int | None = 100,
+    offset: int = 0
+) -> list:
+    """
+    Retrieves one page of a user's receipts with the keyword search, amount range and sort done in SQL,
+    so only the rows on the page are transferred. Rows are flat, with vendor and category names joined in.
+    :param db: SQLAlchemy database session.
+    :param user_id: The ID of the user whose receipts to retrieve.
+    :param q: Optional keyword, matched case-insensitively against vendor, category, filename and raw text.
+    :param amount_min: Optional minimum amount (inclusive).
+    :param amount_max: Optional maximum amount (inclusive).
+    :param sort_key: One of RECEIPT_SORT_KEYS; anything else sorts by transaction date.
+    :param desc: True for descending order.
+    :param limit: Maximum number of rows to return (None for all).
+    :param offset: Number of rows to skip.
+    :return: A list of rows with the columns id, vendor_id, vendor_name, transaction_date, billing_period_start,
+             billing_period_end, amount, currency, category_id, category_name, original_filename,
+             parsed_raw_text and upload_date.
+    """
+    vendor_name = func.coalesce(Vendor.name, "Unknown Vendor").label("vendor_name")
+    category_name = func.coalesce(Category.name, "Uncategorized").label("category_name")
+    sort_columns = {
+        "transaction_date": Receipt.transaction_date,
+        "upload_date": Receipt.upload_date,
+        "amount": Receipt.amount,
+        "vendor_name": vendor_name,
+        "category_name": category_name,
+    }
+    sort_column = sort_columns.get(sort_key, Receipt.transaction_date)
+    stmt = (
+        select(
+            Receipt.id, Receipt.vendor_id, vendor_name, Receipt.transaction_date,
+            Receipt.billing_period_start, Receipt.billing_period_end, Receipt.amount, Receipt.currency,
+            Receipt.category_id, category_name, Receipt.original_filename, Receipt.parsed_raw_text,
+            Receipt.upload_date,
+        )
+        .outerjoin(Vendor, Receipt.vendor_id == Vendor.id)
+        .outerjoin(Category, Receipt.category_id == Category.id)
+    )
+    stmt = _receipts_filter(stmt, user_id, q, amount_min, amount_max)
+    # The ID tie-breaker keeps the order, and so the pages, stable between queries
+    stmt = stmt.order_by(sort_column.desc() if desc else sort_column.asc(), Receipt.id.desc() if desc else Receipt.id.asc())
+    return db.execute(stmt.limit(limit).offset(offset)).all()
+
+def count_receipts_filtered(
+    db: Session,
+    user_id: int,
+    q: str | None = None,
+    amount_min: float | None = None,
+    amount_max: float | None = None
+) -> int:
+    """
+    Counts the receipts `get_receipts_filtered` would return without a limit.
+    :param db: SQLAlchemy database session.
+    :param user_id: The ID of the user.
+    :param q: Optional keyword (see `get_receipts_filtered`).
+    :param amount_min: Optional minimum amount (inclusive).
+    :param amount_max: Optional maximum amount (inclusive).
+    :return: The number of matching receipts.
+    """
+    stmt = (
+        select(func.count(Receipt.id))
+        .select_from(Receipt)
+        .outerjoin(Vendor, Receipt.vendor_id == Vendor.id)
+        .outerjoin(Category, Receipt.category_id == Category.id)
+    )
+    return db.execute(_receipts_filter(stmt, user_id, q, amount_min, amount_max)).scalar_one()
+
+def get_receipt_amount_bounds(db: Session, user_id: int) -> tuple[float | None, float | None]:
+    """
+    Returns the smallest and largest receipt amount of a user, e.g. as defaults for an amount filter.
+    :param db: SQLAlchemy database session.
+    :param user_id: The ID of the user.
+    :return: (min_amount, max_amount), both None if the user has no receipts.
+    """
+    row = db.execute(
+        select(func.min(Receipt.amount), func.max(Receipt.amount)).where(Receipt.owner_id == user_id)
+    ).one()
+    return row[0], row[1]
+
+def get_category_spend(db: Session, user_id: int) -> list:
+    """
+    Sums a user's spending per category with GROUP BY, so only one row per category is transferred.
+    Receipts without a category are reported as 'Uncategorized'.
+    :param db: SQLAlchemy database session.
+    :param user_id: The ID of the user.
+    :return: A list of (category_name, amount) rows, highest spend first.
+    """
+    category_name = func.coalesce(Category.name, "Uncategorized").label("category_name")
+    amount = func.sum(Receipt.amount).label("amount")
+    stmt = (
+        select(category_name, amount)
+        .outerjoin(Category, Receipt.category_id == Category.id)
+        .where(Receipt.owner_id == user_id)
+        .group_by(category_name)
+        .order_by(amount.desc(), category_name)
+    )
+    return db.execute(stmt).all()
+
+def get_vendor_frequency_sql(db: Session, user_id: int, limit: int | None = 10) -> list:
+    """
+    Counts a user's receipts per vendor with GROUP BY. Receipts without a vendor count as 'Unknown Vendor'.
+    :param db: SQLAlchemy database session.
+    :param user_id: The ID of the user.
+    :param limit: Maximum number of vendors to return (None for all).
+    :return: A list of (vendor_name, count) rows, most frequent first.
+    """
+    vendor_name = func.coalesce(Vendor.name, "Unknown Vendor").label("vendor_name")
+    count = func.count(Receipt.id).label("count")
+    stmt = (
+        select(vendor_name, count)
+        .outerjoin(Vendor, Receipt.vendor_id == Vendor.id)
+        .where(Receipt.owner_id == user_id)
+        .group_by(vendor_name)
+        .order_by(count.desc(), vendor_name)
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+def get_receipts_cache_token(db: Session, user_id: int) -> str:
+    """
+    Returns a cheap fingerprint of a user's receipts (count, highest ID, latest upload), read with a
+    single aggregate query. It changes when receipts are added or deleted, so it can key cached views.
+    In-place edits don't change it; callers clear their caches after an update.
+    :param db: SQLAlchemy database session.
+    :param user_id: The ID of the user.
+    :return: The token as a string.
+    """
+    count, max_id, last_upload = db.execute(
+        select(func.count(Receipt.id), func.max(Receipt.id), func.max(Receipt.upload_date))
+        .where(Receipt.owner_id == user_id)
+    ).one()
+    return f"{count}:{max_id}:{last_upload}"
+
 def get_receipt_by_id(db: Session, receipt_id: int, owner_id: int) -> Receipt | None:
     """
     Retrieves a single receipt by its ID, ensuring it belongs to the specified owner.
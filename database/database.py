@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.exc import SQLAlchemyError
+from contextlib import contextmanager
 import logging
 
 # Configure logging for SQLAlchemy
@@ -10,9 +11,37 @@ logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO) # Or INFO for less
 # SQLite database URL. The database file will be created in the project root.
 DATABASE_URL = "sqlite:///./receipt_app.db"
 
-# Create a SQLAlchemy engine.
+# Create a SQLAlchemy engine. It is module-level, so each process creates it once and its
+# connection pool hands the same SQLite connections to every session (and every Streamlit rerun).
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
+SQLITE_CACHE_SIZE_KIB = 16384 # Page cache per connection (negative cache_size means KiB)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Applies SQLite settings once per pooled connection rather than per session:
+    WAL lets dashboard reads run while an upload writes, and synchronous=NORMAL is safe with WAL.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+    finally:
+        cursor.close()
+    # Let SQLAlchemy, not pysqlite, emit BEGIN (see _begin_transaction), so SAVEPOINTs nest correctly
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def _begin_transaction(conn):
+    """
+    Starts each transaction explicitly. pysqlite would otherwise only begin one before the first
+    INSERT/UPDATE/DELETE, so a SAVEPOINT (Session.begin_nested) issued before that would not be
+    part of the session's transaction.
+    """
+    conn.exec_driver_sql("BEGIN")
+
 # Create a session local class.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -35,6 +64,15 @@ def get_db():
     finally:
         db.close()
 
+@contextmanager
+def db_session():
+    """
+    Context-managed version of `get_db`: `with db_session() as db:` closes the session (returning its
+    connection to the pool) on every exit path, and an exception raised in the block reaches get_db's
+    rollback handler.
+    """
+    yield from get_db() # Looked up at call time, so a patched get_db is honoured
+
 def create_db_tables():
     """
     Creates all database tables defined by SQLAlchemy models inheriting from Base.
@@ -42,6 +80,10 @@ def create_db_tables():
     """
     try:
         Base.metadata.create_all(bind=engine)
+        # create_all only adds indexes together with a new table; add ones introduced since to existing databases
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
         logging.info("Database tables created successfully or already exist.")
     except SQLAlchemyError as e:
         logging.error(f"Error creating database tables: {e}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Date
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Date, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
 from database.database import Base
@@ -66,3 +66,12 @@ class Receipt(Base):
     owner = relationship("User", back_populates="receipts")
     vendor = relationship("Vendor", back_populates="receipts")
     category = relationship("Category", back_populates="receipts")
+
+    # Every receipt query filters on owner_id. These indexes let SQLite read one user's rows directly:
+    # the first also covers the per-vendor GROUP BY, the second the default newest-first listing,
+    # the third amount range filters and amount sorting on the records page.
+    __table_args__ = (
+        Index("ix_receipts_owner_vendor", "owner_id", "vendor_id"),
+        Index("ix_receipts_owner_transaction_date", "owner_id", "transaction_date"),
+        Index("ix_receipts_owner_amount", "owner_id", "amount"),
+    )
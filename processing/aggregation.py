@@ -10,25 +10,41 @@ logger = logging.getLogger(__name__)
 def calculate_expenditure_summary(df: pd.DataFrame, amount_col: str = 'amount') -> Tuple[float, float, float, List[float]]:
     """
     Calculates summary statistics (sum, mean, median, mode) for expenditure.
+    Works on the column's NumPy array: the mean reuses the sum, and one sort serves both
+    the median and the mode counts.
 
     :param df: Pandas DataFrame containing receipt data.
     :param amount_col: Name of the column containing expenditure amounts (default 'amount').
+                       Non-numeric values are coerced, and ones that can't be parsed are ignored.
     :return: A tuple containing (total_spend, mean_spend, median_spend, mode_spend).
+             mode_spend lists the most frequent amounts, or is empty if no amount occurs more than once.
              Returns (0.0, 0.0, 0.0, []) if the DataFrame is empty or amount column is missing/invalid.
     """
-    if df.empty or amount_col not in df.columns or not pd.api.types.is_numeric_dtype(df[amount_col]):
-        logger.warning("DataFrame is empty, missing amount column, or amount column is not numeric. Returning default summary.")
+    if df.empty or amount_col not in df.columns:
+        logger.warning("DataFrame is empty or missing amount column. Returning default summary.")
         return 0.0, 0.0, 0.0, []
 
-    amounts = df[amount_col].dropna().astype(float)
+    amounts = df[amount_col]
+    if not pd.api.types.is_numeric_dtype(amounts):
+        amounts = pd.to_numeric(amounts, errors='coerce') # e.g. amounts stored as text
+    amounts = amounts.to_numpy(dtype=np.float64, na_value=np.nan)
+    amounts = np.sort(amounts[~np.isnan(amounts)])
 
-    if amounts.empty:
+    if amounts.size == 0:
+        logger.warning("No numeric amounts found. Returning default summary.")
         return 0.0, 0.0, 0.0, []
 
-    total_spend = amounts.sum()
-    mean_spend = amounts.mean()
-    median_spend = amounts.median()
-    mode_spend = amounts.mode().tolist()
+    n = amounts.size
+    total_spend = float(amounts.sum())
+    mean_spend = total_spend / n
+    mid = n // 2
+    median_spend = float(amounts[mid]) if n % 2 else float((amounts[mid - 1] + amounts[mid]) / 2)
+
+    # Runs of equal values in the sorted array give the counts for the mode
+    run_starts = np.flatnonzero(np.r_[True, amounts[1:] != amounts[:-1]])
+    run_lengths = np.diff(np.r_[run_starts, n])
+    max_count = run_lengths.max()
+    mode_spend = amounts[run_starts[run_lengths == max_count]].tolist() if max_count > 1 else []
 
     logger.info(f"Calculated expenditure summary: Total={total_spend:.2f}, Mean={mean_spend:.2f}, Median={median_spend:.2f}, Mode={mode_spend}")
     return total_spend, mean_spend, median_spend, mode_spend
@@ -46,70 +62,111 @@ def get_vendor_frequency(df: pd.DataFrame, vendor_col: str = 'vendor_name') -> p
         logger.warning("DataFrame is empty or missing vendor column. Returning empty vendor frequency DataFrame.")
         return pd.DataFrame(columns=[vendor_col, 'count'])
 
-    # Ensure vendor_col is treated as string and handle NaNs
-    vendor_counts = df[vendor_col].astype(str).value_counts().reset_index()
+    vendors = df[vendor_col]
+    if isinstance(vendors.dtype, pd.CategoricalDtype) and not vendors.hasnans:
+        # Count on the integer category codes, without building or hashing one string per row
+        counts = vendors.value_counts()
+        counts = counts[counts > 0] # value_counts also lists unused categories
+        counts.index = counts.index.astype(str)
+    else:
+        # Ensure vendor_col is treated as string and handle NaNs
+        counts = vendors.astype(str).value_counts()
+    vendor_counts = counts.reset_index() # value_counts already sorts by count, descending
     vendor_counts.columns = [vendor_col, 'count']
-    vendor_counts = vendor_counts.sort_values(by='count', ascending=False)
     logger.info(f"Generated vendor frequency for {len(vendor_counts)} unique vendors.")
     return vendor_counts
 
-def get_monthly_spend_trend(df: pd.DataFrame, date_col: str = 'transaction_date', amount_col: str = 'amount',
-                            rolling_window: Optional[int] = None) -> pd.DataFrame:
+def get_monthly_spend_totals(df: pd.DataFrame, date_col: str = 'transaction_date', amount_col: str = 'amount') -> pd.DataFrame:
     """
-    Calculates the monthly spending trend and optionally a rolling average.
+    Calculates the total spend per month, the expensive part of the monthly trend.
+    Depends only on the data, so callers can cache it and apply different rolling windows
+    with `add_rolling_average`.
 
     :param df: Pandas DataFrame containing receipt data.
     :param date_col: Name of the column containing transaction dates (default 'transaction_date').
     :param amount_col: Name of the column containing expenditure amounts (default 'amount').
-    :param rolling_window: Optional; if provided, calculates a rolling mean over this many months.
-    :return: A DataFrame with 'month' (period), 'total_amount', and optionally 'rolling_avg' columns.
+    :return: A DataFrame with 'month' ('YYYY-MM', every month from the first to the last one) and 'total_amount'.
              Returns an empty DataFrame if input is invalid.
     """
     if df.empty or date_col not in df.columns or amount_col not in df.columns:
-        logger.warning("DataFrame is empty or missing date/amount columns. Returning empty monthly trend DataFrame.")
-        return pd.DataFrame(columns=['month', 'total_amount', 'rolling_avg'])
+        logger.warning("DataFrame is empty or missing date/amount columns. Returning empty monthly totals DataFrame.")
+        return pd.DataFrame(columns=['month', 'total_amount'])
 
-    df_copy = df.copy() # Work on a copy to avoid SettingWithCopyWarning
+    df_copy = df[[date_col, amount_col]].copy() # Only the two columns used; avoids SettingWithCopyWarning
 
-    # Ensure date_col is datetime objects
-    df_copy[date_col] = pd.to_datetime(df_copy[date_col], errors='coerce')
+    # Ensure date_col is datetime objects. Frames read with parse_dates are already datetime64,
+    # so the (per-element for strings) parse only runs for raw input.
+    if not pd.api.types.is_datetime64_any_dtype(df_copy[date_col]):
+        df_copy[date_col] = pd.to_datetime(df_copy[date_col], errors='coerce')
     df_copy = df_copy.dropna(subset=[date_col]) # Drop rows where date conversion failed
 
     if df_copy.empty:
         logger.warning("No valid dates found after conversion for monthly trend. Returning empty DataFrame.")
-        return pd.DataFrame(columns=['month', 'total_amount', 'rolling_avg'])
+        return pd.DataFrame(columns=['month', 'total_amount'])
 
     # Ensure amount_col is numeric
-    df_copy[amount_col] = pd.to_numeric(df_copy[amount_col], errors='coerce')
+    if not pd.api.types.is_numeric_dtype(df_copy[amount_col]):
+        df_copy[amount_col] = pd.to_numeric(df_copy[amount_col], errors='coerce')
     df_copy = df_copy.dropna(subset=[amount_col]) # Drop rows where amount is not numeric
 
     if df_copy.empty:
         logger.warning("No valid amounts found after conversion for monthly trend. Returning empty DataFrame.")
-        return pd.DataFrame(columns=['month', 'total_amount', 'rolling_avg'])
-
-    # Set date_col as index for resampling
-    df_copy = df_copy.set_index(date_col)
-
-    # Resample by month and sum amounts
-    monthly_spend = df_copy[amount_col].resample('MS').sum().reset_index()
-    monthly_spend.columns = ['month', 'total_amount']
+        return pd.DataFrame(columns=['month', 'total_amount'])
+
+    # Monthly totals with NumPy: map each date to a month code (year * 12 + month) and sum the amounts
+    # per code with one bincount. Codes run contiguously from the first to the last month, so months
+    # without spending get a 0.0 total, as with a monthly resample.
+    dates = df_copy[date_col].dt
+    month_codes = (dates.year * 12 + dates.month - 1).to_numpy(dtype=np.int64)
+    first_code = month_codes.min()
+    totals = np.bincount(month_codes - first_code, weights=df_copy[amount_col].to_numpy(dtype=np.float64))
+
+    first_month = pd.Period(year=int(first_code // 12), month=int(first_code % 12) + 1, freq='M')
+    logger.info(f"Generated monthly spend totals for {len(totals)} months.")
+    return pd.DataFrame({
+        'month': pd.period_range(start=first_month, periods=len(totals), freq='M').astype(str), # 'YYYY-MM' for charts
+        'total_amount': totals
+    })
+
+def add_rolling_average(monthly_totals: pd.DataFrame, rolling_window: Optional[int] = None) -> pd.DataFrame:
+    """
+    Adds a trailing rolling average to the output of `get_monthly_spend_totals`. Cheap (one pass over the months).
 
-    # Convert 'month' to a string format for better display in charts (e.g., 'YYYY-MM')
-    monthly_spend['month'] = monthly_spend['month'].dt.to_period('M').astype(str)
+    :param monthly_totals: DataFrame with 'month' and 'total_amount' columns, one row per consecutive month.
+    :param rolling_window: Optional; if provided, calculates a rolling mean over this many months.
+    :return: A new DataFrame with an added 'rolling_avg' column (NaN without a window).
+    """
+    monthly_spend = monthly_totals.copy()
+    if monthly_spend.empty:
+        monthly_spend['rolling_avg'] = pd.Series(dtype=np.float64)
+        return monthly_spend
 
     # Calculate rolling average if requested
     if rolling_window and rolling_window > 0:
-        # Need to re-index by datetime for rolling window calculation
-        temp_df_for_rolling = monthly_spend.set_index(pd.to_datetime(monthly_spend['month']))
-        monthly_spend['rolling_avg'] = temp_df_for_rolling['total_amount'].rolling(window=rolling_window, min_periods=1).mean().values
+        # Trailing window sums from one cumulative sum; the first months average over fewer values (min_periods=1)
+        totals = monthly_spend['total_amount'].to_numpy(dtype=np.float64)
+        window_sums = np.cumsum(totals)
+        window_sums[rolling_window:] -= window_sums[:-rolling_window].copy()
+        monthly_spend['rolling_avg'] = window_sums / np.minimum(np.arange(1, len(totals) + 1), rolling_window)
         logger.info(f"Generated monthly spend trend with {rolling_window}-month rolling average.")
     else:
         monthly_spend['rolling_avg'] = np.nan # No rolling avg column
-
-    monthly_spend = monthly_spend.sort_values(by='month')
-    logger.info(f"Generated monthly spend trend for {len(monthly_spend)} months.")
     return monthly_spend
 
+def get_monthly_spend_trend(df: pd.DataFrame, date_col: str = 'transaction_date', amount_col: str = 'amount',
+                            rolling_window: Optional[int] = None) -> pd.DataFrame:
+    """
+    Calculates the monthly spending trend and optionally a rolling average.
+
+    :param df: Pandas DataFrame containing receipt data.
+    :param date_col: Name of the column containing transaction dates (default 'transaction_date').
+    :param amount_col: Name of the column containing expenditure amounts (default 'amount').
+    :param rolling_window: Optional; if provided, calculates a rolling mean over this many months.
+    :return: A DataFrame with 'month' (period), 'total_amount', and optionally 'rolling_avg' columns.
+             Returns an empty DataFrame if input is invalid.
+    """
+    return add_rolling_average(get_monthly_spend_totals(df, date_col, amount_col), rolling_window)
+
 # Example Usage (for testing/demonstration)
 if __name__ == "__main__":
     sample_receipt_data = [
@@ -0,0 +1,115 @@
+from typing import List, Dict, Any, Optional
+import logging
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    ARROW_AVAILABLE = True
+except ImportError: # pyarrow is optional; callers fall back to the NumPy/Python paths
+    pa = None
+    pc = None
+    ARROW_AVAILABLE = False
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def records_to_table(records: List[Dict[str, Any]]) -> Optional["pa.Table"]:
+    """
+    Converts a list of dictionaries (records) into a columnar Arrow table.
+    Build the table once and pass it, together with the same records list, to the search and
+    sort functions to run them on Arrow compute kernels. Results are still the original record dicts.
+
+    :param records: A list of dictionaries, where each dictionary is a record.
+    :return: A pyarrow Table, or None if pyarrow is not installed or a column has mixed types.
+    """
+    if not ARROW_AVAILABLE:
+        logger.warning("pyarrow is not installed; Arrow-backed search and sort are unavailable.")
+        return None
+    try:
+        return pa.Table.from_pylist(records)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        logger.warning(f"Records cannot be converted to an Arrow table: {e}")
+        return None
+
+def _to_positions(mask: "pa.ChunkedArray") -> np.ndarray:
+    """
+    Private helper turning a boolean Arrow mask (nulls count as False) into record positions.
+    """
+    return np.flatnonzero(pc.fill_null(mask, False).to_numpy(zero_copy_only=False))
+
+def linear_search_table(
+    table: "pa.Table",
+    query: str,
+    fields: Optional[List[str]] = None,
+    case_sensitive: bool = False
+) -> np.ndarray:
+    """
+    Substring search over string columns of an Arrow table.
+    Mirrors `linear_search_records`: with fields=None, every column is searched and
+    non-string columns are compared through their string form.
+
+    :param table: Table built by `records_to_table`.
+    :param query: The string to search for.
+    :param fields: Optional list of column names to search within.
+    :param case_sensitive: Boolean, if True, the search is case-sensitive. Default is False.
+    :return: Positions of the matching records.
+    """
+    mask = None
+    for field in (fields if fields is not None else table.column_names):
+        if field not in table.column_names:
+            continue
+        column = table.column(field)
+        if not pa.types.is_string(column.type) and not pa.types.is_large_string(column.type):
+            if fields:
+                continue # Only string values are searched in explicitly requested fields
+            column = pc.cast(column, pa.string())
+        field_mask = pc.match_substring(column, query, ignore_case=not case_sensitive)
+        mask = field_mask if mask is None else pc.or_kleene(mask, field_mask)
+    if mask is None:
+        return np.array([], dtype=np.int64)
+    return _to_positions(mask)
+
+def range_search_table(
+    table: "pa.Table",
+    field: str,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None
+) -> np.ndarray:
+    """
+    Inclusive range filter on a numeric column of an Arrow table.
+
+    :param table: Table built by `records_to_table`.
+    :param field: The numeric column to filter.
+    :param min_value: The minimum value (inclusive). If None, no lower bound.
+    :param max_value: The maximum value (inclusive). If None, no upper bound.
+    :return: Positions of the matching records (none if the column is missing or not numeric).
+    """
+    if field not in table.column_names:
+        return np.array([], dtype=np.int64)
+    column = table.column(field)
+    if not (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+        return np.array([], dtype=np.int64)
+    mask = pc.is_valid(column)
+    if min_value is not None:
+        mask = pc.and_kleene(mask, pc.greater_equal(column, min_value))
+    if max_value is not None:
+        mask = pc.and_kleene(mask, pc.less_equal(column, max_value))
+    return _to_positions(mask)
+
+def sort_table_indices(table: "pa.Table", sort_key: str, reverse: bool = False) -> Optional[np.ndarray]:
+    """
+    Stable sort order of an Arrow table by one column; strings are compared case-insensitively.
+
+    :param table: Table built by `records_to_table`.
+    :param sort_key: The column to sort by.
+    :param reverse: If True, sort in descending order.
+    :return: Record positions in sorted order (missing values last), or None if the column does not exist.
+    """
+    if sort_key not in table.column_names:
+        return None
+    column = table.column(sort_key)
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.utf8_lower(column)
+    indices = pc.array_sort_indices(column, order="descending" if reverse else "ascending", null_placement="at_end")
+    return indices.to_numpy()
@@ -1,79 +1,222 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import re
+import bisect
 import logging
+import numpy as np
+import pandas as pd
+from processing.algorithms import arrow_backend
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def linear_search_records(
+def build_columns(
     records: List[Dict[str, Any]],
+    fields: Optional[List[str]] = None,
+    stringify_non_str: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Builds a column-oriented (structure-of-arrays) view of a list of records, so a query
+    scans one contiguous NumPy array per field instead of every dict.
+
+    :param records: A list of dictionaries, where each dictionary is a record.
+    :param fields: Optional list of keys to extract. If None, every key seen in any record is used.
+    :param stringify_non_str: If True, non-string values are converted with str(); otherwise they become ''.
+    :return: A dictionary mapping each field to a NumPy unicode array, with '' for missing values.
+    """
+    if fields is None:
+        fields = _all_fields(records)
+    return {field: np.array(_column_values(records, field, stringify_non_str), dtype=str) for field in fields}
+
+def _all_fields(records: List[Dict[str, Any]]) -> List[str]:
+    """
+    Private helper returning every key seen in any record, in first-seen order.
+    """
+    return list(dict.fromkeys(key for record in records for key in record))
+
+def _column_values(records: List[Dict[str, Any]], field: str, stringify_non_str: bool) -> List[str]:
+    """
+    Private helper extracting one field of every record as a string ('' for missing values).
+    """
+    values = []
+    for record in records:
+        value = record.get(field)
+        if isinstance(value, str):
+            values.append(value)
+        elif value is not None and stringify_non_str:
+            values.append(str(value))
+        else:
+            values.append('') # Never matches, since empty queries are rejected up front
+    return values
+
+def _find_rows(values: List[str], query: str, case_sensitive: bool) -> np.ndarray:
+    """
+    Private helper marking which values contain the query.
+    The values are joined into one NUL-separated buffer (lowercased once if case-insensitive) and
+    scanned with str.find, jumping to the next value after each hit, so the work is one C-level
+    pass over contiguous memory plus one step per matching value.
+
+    :param values: The string values of one column.
+    :param query: The (already normalized) query string.
+    :param case_sensitive: If False, the buffer is lowercased before scanning.
+    :return: Boolean NumPy array, True where the value contains the query.
+    """
+    buffer = '\0'.join(values)
+    if not case_sensitive:
+        buffer = buffer.lower()
+    # A query containing the separator could match across values, and some characters lowercase
+    # to several, which shifts offsets; both cases fall back to a per-value check.
+    if '\0' in query or len(buffer) != sum(len(value) + 1 for value in values) - 1:
+        return np.array([query in (value if case_sensitive else value.lower()) for value in values], dtype=bool)
+
+    found = np.zeros(len(values), dtype=bool)
+    value_ends = np.cumsum([len(value) + 1 for value in values]).tolist() # Offset of each value's separator
+    position = buffer.find(query)
+    while position != -1:
+        row = bisect.bisect_right(value_ends, position)
+        found[row] = True
+        position = buffer.find(query, value_ends[row])
+    return found
+
+def _linear_search_frame(df: pd.DataFrame, query: str, fields: Optional[List[str]], case_sensitive: bool) -> pd.DataFrame:
+    """
+    Private helper: `linear_search_records` on a DataFrame, one vectorized substring test per column.
+    Same rules as the record path: requested fields only match string values, while a search over
+    all columns compares non-string values through their string form.
+    """
+    masks = []
+    for field in (fields if fields is not None else df.columns):
+        if field not in df.columns:
+            continue
+        column = df[field]
+        if not fields:
+            masks.append((column.astype(str).str.contains(query, case=case_sensitive, regex=False)
+                          & column.notna()).to_numpy(dtype=bool))
+        elif pd.api.types.is_object_dtype(column) or isinstance(column.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            # Non-string entries give NaN from .str and count as no match
+            masks.append(column.str.contains(query, case=case_sensitive, regex=False, na=False).to_numpy(dtype=bool))
+    if not masks:
+        return df.iloc[0:0]
+    return df[np.logical_or.reduce(masks)] # One flat reduce instead of a chain of | operators
+
+def _range_search_frame(df: pd.DataFrame, field: str, min_value: Optional[float], max_value: Optional[float]) -> pd.DataFrame:
+    """
+    Private helper: `range_search_records` on a DataFrame, as one vectorized comparison on the column.
+    """
+    if field not in df.columns or not pd.api.types.is_numeric_dtype(df[field]):
+        return df.iloc[0:0]
+    values = df[field].to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = ~np.isnan(values)
+    if min_value is not None:
+        mask &= values >= min_value
+    if max_value is not None:
+        mask &= values <= max_value
+    return df[mask]
+
+def linear_search_records(
+    records: Union[List[Dict[str, Any]], pd.DataFrame],
     query: str,
     fields: Optional[List[str]] = None,
-    case_sensitive: bool = False
-) -> List[Dict[str, Any]]:
+    case_sensitive: bool = False,
+    table: Optional[Any] = None
+) -> Union[List[Dict[str, Any]], pd.DataFrame]:
     """
     Performs a linear search on a list of dictionaries (records).
     It checks if the query string is present in the specified fields or all fields if none are specified.
+    Each field is scanned as one joined buffer (see `_find_rows`) rather than record by record.
+    If an Arrow table of the same records is given, the scan runs on Arrow compute kernels instead.
+    A DataFrame is searched column by column with pandas string kernels and the matching rows are returned as a DataFrame.
 
-    :param records: A list of dictionaries, where each dictionary is a record.
+    :param records: A list of dictionaries, where each dictionary is a record, or a DataFrame.
     :param query: The string to search for.
     :param fields: Optional list of keys (strings) to search within. If None, all string values are searched.
     :param case_sensitive: Boolean, if True, the search is case-sensitive. Default is False.
-    :return: A list of records that match the query.
+    :param table: Optional pyarrow Table from `arrow_backend.records_to_table(records)`.
+    :return: A list of records that match the query (a DataFrame of the matching rows for DataFrame input).
     """
+    if isinstance(records, pd.DataFrame):
+        if records.empty or not query:
+            return records.iloc[0:0]
+        results = _linear_search_frame(records, query, fields, case_sensitive)
+        logger.info(f"Linear search completed for query '{query}', found {len(results)} results.")
+        return results
+
     if not records or not query:
         return []
 
-    results = []
+    if table is not None:
+        results = [records[i] for i in arrow_backend.linear_search_table(table, query, fields, case_sensitive)]
+        logger.info(f"Arrow linear search completed for query '{query}', found {len(results)} results.")
+        return results
+
     normalized_query = query if case_sensitive else query.lower()
+    # Non-string values are only searched (as str) when no specific fields are requested
+    stringify_non_str = not fields
+    search_fields = fields if fields is not None else _all_fields(records)
 
-    for record in records:
-        match_found = False
-        keys_to_search = fields if fields is not None else record.keys()
-
-        for key in keys_to_search:
-            value = record.get(key)
-            if isinstance(value, str):
-                normalized_value = value if case_sensitive else value.lower()
-                if normalized_query in normalized_value:
-                    match_found = True
-                    break
-            elif value is not None and not fields:
-                str_value = str(value)
-                normalized_str_value = str_value if case_sensitive else str_value.lower()
-                if normalized_query in normalized_str_value:
-                    match_found = True
-                    break
-        if match_found:
-            results.append(record)
+    matches = np.zeros(len(records), dtype=bool)
+    for field in search_fields:
+        matches |= _find_rows(_column_values(records, field, stringify_non_str), normalized_query, case_sensitive)
+
+    results = [records[i] for i in np.flatnonzero(matches)]
     logger.info(f"Linear search completed for query '{query}', found {len(results)} results.")
     return results
 
 def range_search_records(
-    records: List[Dict[str, Any]],
+    records: Union[List[Dict[str, Any]], pd.DataFrame],
     field: str,
     min_value: Optional[float] = None,
-    max_value: Optional[float] = None
-) -> List[Dict[str, Any]]:
+    max_value: Optional[float] = None,
+    index: Optional["SortedIndex"] = None,
+    table: Optional[Any] = None
+) -> Union[List[Dict[str, Any]], pd.DataFrame]:
     """
     Performs a range search on a numerical field in a list of dictionaries (records).
+    The field is extracted once into a float NumPy array (NaN for non-numeric values)
+    and filtered with a single vectorized comparison. If a SortedIndex built over the same
+    records and field is given, the range is found with two binary searches instead; an Arrow
+    table of the same records runs the filter on Arrow compute kernels. A DataFrame is filtered
+    on its column directly and the matching rows are returned as a DataFrame.
 
-    :param records: A list of dictionaries, where each dictionary is a record.
+    :param records: A list of dictionaries, where each dictionary is a record, or a DataFrame.
     :param field: The key (string) of the numerical field to search within.
     :param min_value: The minimum value (inclusive) for the range. If None, no lower bound.
     :param max_value: The maximum value (inclusive) for the range. If None, no upper bound.
-    :return: A list of records where the specified field's value falls within the given range.
+    :param index: Optional SortedIndex over `records` for this field, for repeated range queries.
+    :param table: Optional pyarrow Table from `arrow_backend.records_to_table(records)`.
+    :return: A list of records where the specified field's value falls within the given range
+             (a DataFrame of the matching rows for DataFrame input).
     """
+    if isinstance(records, pd.DataFrame):
+        if records.empty or not field:
+            return records.iloc[0:0]
+        results = _range_search_frame(records, field, min_value, max_value)
+        logger.info(f"Range search completed for field '{field}' within [{min_value}, {max_value}], found {len(results)} results.")
+        return results
+
     if not records or not field:
         return []
 
-    results = []
-    for record in records:
-        value = record.get(field)
-        if isinstance(value, (int, float)):
-            if (min_value is None or value >= min_value) and \
-               (max_value is None or value <= max_value):
-                results.append(record)
+    if index is not None and index.field == field:
+        results = [records[i] for i in index.range_search(min_value, max_value)]
+        logger.info(f"Indexed range search completed for field '{field}' within [{min_value}, {max_value}], found {len(results)} results.")
+        return results
+
+    if table is not None:
+        results = [records[i] for i in arrow_backend.range_search_table(table, field, min_value, max_value)]
+        logger.info(f"Arrow range search completed for field '{field}' within [{min_value}, {max_value}], found {len(results)} results.")
+        return results
+
+    values = np.array(
+        [value if isinstance(value, (int, float)) else np.nan for value in (record.get(field) for record in records)],
+        dtype=float
+    )
+    mask = ~np.isnan(values)
+    if min_value is not None:
+        mask &= values >= min_value
+    if max_value is not None:
+        mask &= values <= max_value
+
+    results = [records[i] for i in np.flatnonzero(mask)]
     logger.info(f"Range search completed for field '{field}' within [{min_value}, {max_value}], found {len(results)} results.")
     return results
 
@@ -85,6 +228,8 @@ def pattern_search_records(
 ) -> List[Dict[str, Any]]:
     """
     Performs a regex pattern search on a list of dictionaries (records).
+    Patterns without regex metacharacters skip the regex engine and use the vectorized
+    substring scan of `linear_search_records`.
 
     :param records: A list of dictionaries, where each dictionary is a record.
     :param pattern: The regex pattern string to search for.
@@ -95,28 +240,24 @@ def pattern_search_records(
     if not records or not pattern:
         return []
 
-    results = []
+    # Literal pattern: a plain substring search gives the same result without the regex VM
+    if re.escape(pattern) == pattern and flags in (0, re.IGNORECASE):
+        results = linear_search_records(records, pattern, fields, case_sensitive=not flags)
+        logger.info(f"Pattern search completed for literal pattern '{pattern}', found {len(results)} results.")
+        return results
+
     try:
         compiled_pattern = re.compile(pattern, flags)
     except re.error as e:
         logger.error(f"Invalid regex pattern '{pattern}': {e}")
         return []
 
-    for record in records:
-        match_found = False
-        keys_to_search = fields if fields is not None else record.keys()
-
-        for key in keys_to_search:
-            value = record.get(key)
-            if isinstance(value, str):
-                if compiled_pattern.search(value):
-                    match_found = True
-                    break
-            elif value is not None and not fields: # If no specific fields, convert non-strings to string for search
-                if compiled_pattern.search(str(value)):
-                    match_found = True
-                    break
-        if match_found:
+    # Non-string values are only searched (as str) when no specific fields are requested
+    columns = build_columns(records, fields, stringify_non_str=not fields)
+    search_value = compiled_pattern.search
+    results = []
+    for i, record in enumerate(records):
+        if any(column[i] and search_value(column[i]) for column in columns.values()):
             results.append(record)
     logger.info(f"Pattern search completed for pattern '{pattern}', found {len(results)} results.")
     return results
@@ -127,7 +268,8 @@ class HashedIndex:
     Note: This is a basic in-memory hash map; it doesn't handle range or pattern searches directly.
     """
     def __init__(self, records: List[Dict[str, Any]], field: str):
-        self.index = {}
+        self.index = {} # Lowercased string keys, for the default case-insensitive lookups
+        self._index_cs = {} # Original keys, for case-sensitive lookups
         self.field = field
         self._build_index(records)
         logger.info(f"Hashed index built for field '{field}' with {len(self.index)} unique entries.")
@@ -136,11 +278,10 @@ class HashedIndex:
         for i, record in enumerate(records):
             value = record.get(self.field)
             if value is not None:
-                # Store normalized value (e.g., lowercase for case-insensitive search)
-                key = str(value).lower() if isinstance(value, str) else value
-                if key not in self.index:
-                    self.index[key] = []
-                self.index[key].append(i) # Store index of record
+                # Both maps are filled in the same pass so no lowercasing is needed at query time
+                self._index_cs.setdefault(value, []).append(i) # Store index of record
+                key = value.lower() if isinstance(value, str) else value
+                self.index.setdefault(key, []).append(i)
 
     def search(self, query: Any, case_sensitive: bool = False, records_list: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
@@ -154,15 +295,42 @@ class HashedIndex:
             logger.error("records_list must be provided to retrieve full records from HashedIndex.")
             return []
 
-        normalized_query = query
-        if isinstance(query, str) and not case_sensitive:
-            normalized_query = query.lower()
-
-        indices = self.index.get(normalized_query, [])
+        if case_sensitive:
+            indices = self._index_cs.get(query, [])
+        else:
+            indices = self.index.get(query.lower() if isinstance(query, str) else query, [])
         results = [records_list[i] for i in indices]
         logger.info(f"Hashed index search for '{query}' on field '{self.field}', found {len(results)} results.")
         return results
 
+class SortedIndex:
+    """
+    A sorted index over a numerical field, for repeated range queries on the same records.
+    Each range query costs two binary searches plus the size of the result, instead of a full scan.
+    Records whose value is not numeric are left out of the index.
+    """
+    def __init__(self, records: List[Dict[str, Any]], field: str):
+        self.field = field
+        values = np.array(
+            [value if isinstance(value, (int, float)) else np.nan for value in (record.get(field) for record in records)],
+            dtype=np.float64
+        )
+        positions = np.flatnonzero(~np.isnan(values))
+        self.order = positions[np.argsort(values[positions], kind="stable")] # Record positions by ascending value
+        self.values = values[self.order] # Sorted values, aligned with self.order
+        logger.info(f"Sorted index built for field '{field}' with {len(self.values)} entries.")
+
+    def range_search(self, min_value: Optional[float] = None, max_value: Optional[float] = None) -> np.ndarray:
+        """
+        Finds the records whose value lies in the inclusive range.
+        :param min_value: The minimum value (inclusive). If None, no lower bound.
+        :param max_value: The maximum value (inclusive). If None, no upper bound.
+        :return: Positions of the matching records, in their original order.
+        """
+        start = 0 if min_value is None else np.searchsorted(self.values, min_value, side="left")
+        end = len(self.values) if max_value is None else np.searchsorted(self.values, max_value, side="right")
+        return np.sort(self.order[start:end])
+
 # Example Usage
 if __name__ == "__main__":
     sample_records = [
@@ -196,6 +364,11 @@ if __name__ == "__main__":
     print(f"Search amount >= 100: {len(results)} results")
     for r in results: print(r)
 
+    amount_index = SortedIndex(sample_records, "amount")
+    results = range_search_records(sample_records, "amount", min_value=50, max_value=150, index=amount_index)
+    print(f"Indexed search amount between 50 and 150: {len(results)} results")
+    for r in results: print(r)
+
     print("\n--- Pattern Search ---")
     results = pattern_search_records(sample_records, r"^Walm", fields=["vendor"])
     print(f"Pattern '^Walm' in 'vendor': {len(results)} results")
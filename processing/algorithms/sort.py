@@ -1,50 +1,69 @@
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional, Tuple, Union
 import logging
+import numpy as np
+import pandas as pd
+from processing.algorithms import arrow_backend
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# NumPy sort kind used for each supported algorithm name. These run in compiled code:
+# 'quicksort' is NumPy's introsort (median-of-3 partitioning, insertion sort for small slices,
+# heapsort fallback) and 'stable' is Timsort/radix sort.
+SORT_KINDS = {
+    "timsort": "stable",
+    "quicksort": "quicksort",
+    "mergesort": "stable",
+}
+
 def sort_records(
-    records: List[Dict[str, Any]],
+    records: Union[List[Dict[str, Any]], pd.DataFrame],
     sort_key: str,
     reverse: bool = False,
-    algorithm: str = "timsort"
-) -> List[Dict[str, Any]]:
+    algorithm: str = "timsort",
+    table: Optional[Any] = None,
+    normalize: Optional[Callable[[Any], Any]] = None
+) -> Union[List[Dict[str, Any]], pd.DataFrame]:
     """
     Sorts a list of dictionaries (records) based on a specified key.
+    Sort keys are extracted (and normalized) once per record, never per comparison;
+    numeric keys are argsorted by NumPy and other keys
+    (strings, dates) by Python's sorted() over record indices. If an Arrow table of the same
+    records is given, Arrow's stable sort is used instead. A DataFrame is sorted with
+    `DataFrame.sort_values` on the column, without converting rows to dicts.
 
-    :param records: A list of dictionaries, where each dictionary is a record.
+    :param records: A list of dictionaries, where each dictionary is a record, or a DataFrame.
     :param sort_key: The key (string) in the dictionaries to sort by.
     :param reverse: If True, sort in descending order. Default is False (ascending).
-    :param algorithm: The sorting algorithm to use. 'timsort' uses Python's built-in sorted().
-                      'quicksort' and 'mergesort' are custom implementations.
-    :return: A new list of sorted records.
+    :param algorithm: The sorting algorithm to use: 'timsort', 'quicksort' or 'mergesort'.
+                      Each maps to the matching NumPy sort kind for numeric keys.
+    :param table: Optional pyarrow Table from `arrow_backend.records_to_table(records)`.
+    :param normalize: Optional function applied to each record's value to build its sort key
+                      (e.g., str.casefold). Default lowercases strings and leaves other values as is.
+    :return: A new list of sorted records (a sorted DataFrame for DataFrame input).
     :raises ValueError: If an unsupported algorithm is specified or sort_key is invalid.
     """
+    if isinstance(records, pd.DataFrame):
+        return _sort_frame(records, sort_key, reverse, algorithm, normalize)
+
     if not records:
         return []
 
-    def get_sort_value(item):
-        value = item.get(sort_key)
-        if isinstance(value, str):
-            return value.lower()
-        return value
+    if table is not None and normalize is None: # Arrow can't run arbitrary Python normalizers
+        order = arrow_backend.sort_table_indices(table, sort_key, reverse)
+        if order is not None:
+            logger.info(f"Records sorted using Arrow by '{sort_key}' ({'desc' if reverse else 'asc'}).")
+            return [records[i] for i in order]
 
     try:
-        if algorithm == "timsort":
-            sorted_records = sorted(records, key=get_sort_value, reverse=reverse)
-            logger.info(f"Records sorted using Timsort by '{sort_key}' ({'desc' if reverse else 'asc'}).")
-            return sorted_records
-        elif algorithm == "quicksort":
-            sorted_records = _quicksort(list(records), sort_key, reverse)
-            logger.info(f"Records sorted using Custom Quicksort by '{sort_key}' ({'desc' if reverse else 'asc'}).")
-            return sorted_records
-        elif algorithm == "mergesort":
-            sorted_records = _mergesort(list(records), sort_key, reverse)
-            logger.info(f"Records sorted using Custom Mergesort by '{sort_key}' ({'desc' if reverse else 'asc'}).")
-            return sorted_records
-        else:
+        kind = SORT_KINDS.get(algorithm)
+        if kind is None:
             raise ValueError(f"Unsupported sorting algorithm: {algorithm}")
+        keys = _extract_sort_keys(records, sort_key, normalize)
+        order = _argsort_keys(keys, reverse, kind)
+        sorted_records = [records[i] for i in order]
+        logger.info(f"Records sorted using {algorithm} by '{sort_key}' ({'desc' if reverse else 'asc'}).")
+        return sorted_records
     except TypeError as e:
         logger.error(f"Error sorting records by key '{sort_key}': Incomparable types or key missing. Error: {e}")
         return sorted(records, key=lambda x: str(x.get(sort_key, '')), reverse=reverse) # Attempt string conversion for problematic types
@@ -52,78 +71,87 @@ def sort_records(
         logger.error(f"An unexpected error occurred during sorting: {e}")
         return list(records)
 
-def _quicksort(data: List[Dict[str, Any]], sort_key: str, reverse: bool) -> List[Dict[str, Any]]:
+def _sort_frame(
+    df: pd.DataFrame,
+    sort_key: str,
+    reverse: bool,
+    algorithm: str,
+    normalize: Optional[Callable[[Any], Any]]
+) -> pd.DataFrame:
     """
-    Private helper function implementing Quicksort.
-    Time Complexity: Average O(N log N), Worst O(N^2)
-    Space Complexity: O(log N) (for recursion stack)
+    Private helper: `sort_records` on a DataFrame. Same key rules as the record path (strings
+    case-insensitive unless a normalize function is given); missing values sort last.
+    Returns the frame unchanged if the algorithm or column is not known.
     """
-    if len(data) <= 1:
-        return data
-
-    pivot = data[len(data) // 2]
-    pivot_value = pivot.get(sort_key)
-    if isinstance(pivot_value, str): pivot_value = pivot_value.lower()
-
-    left = [item for item in data if (item.get(sort_key).lower() if isinstance(item.get(sort_key), str) else item.get(sort_key)) < pivot_value]
-    middle = [item for item in data if (item.get(sort_key).lower() if isinstance(item.get(sort_key), str) else item.get(sort_key)) == pivot_value]
-    right = [item for item in data if (item.get(sort_key).lower() if isinstance(item.get(sort_key), str) else item.get(sort_key)) > pivot_value]
-
-    if reverse:
-        return _quicksort(right, sort_key, reverse) + middle + _quicksort(left, sort_key, reverse)
+    kind = SORT_KINDS.get(algorithm)
+    if kind is None or sort_key not in df.columns:
+        logger.error(f"Cannot sort DataFrame by '{sort_key}' using {algorithm}: unknown column or algorithm.")
+        return df
+    if normalize is not None:
+        key = lambda column: column.map(normalize)
+    elif pd.api.types.is_object_dtype(df[sort_key]) or pd.api.types.is_string_dtype(df[sort_key]):
+        key = lambda column: column.map(lambda value: value.lower() if isinstance(value, str) else value)
     else:
-        return _quicksort(left, sort_key, reverse) + middle + _quicksort(right, sort_key, reverse)
-
+        key = None
+    try:
+        sorted_df = df.sort_values(sort_key, ascending=not reverse, kind=kind, na_position="last", key=key)
+    except TypeError as e:
+        logger.error(f"Error sorting DataFrame by '{sort_key}': Incomparable types. Error: {e}")
+        sorted_df = df.sort_values(sort_key, ascending=not reverse, kind=kind, na_position="last",
+                                   key=lambda column: column.astype(str))
+    logger.info(f"DataFrame sorted using {algorithm} by '{sort_key}' ({'desc' if reverse else 'asc'}).")
+    return sorted_df
 
-def _mergesort(data: List[Dict[str, Any]], sort_key: str, reverse: bool) -> List[Dict[str, Any]]:
+def _extract_sort_keys(records: List[Dict[str, Any]], sort_key: str, normalize: Optional[Callable[[Any], Any]] = None) -> List[Any]:
     """
-    Private helper function implementing Mergesort.
-    Time Complexity: O(N log N) (Worst, Average, Best)
-    Space Complexity: O(N) (for temporary arrays)
+    Private helper that reads the sort value of every record once.
+    With no normalize function, string values are lowercased so that sorting is case-insensitive.
     """
-    if len(data) <= 1:
-        return data
-
-    mid = len(data) // 2
-    left_half = data[:mid]
-    right_half = data[mid:]
+    if normalize is not None:
+        return [normalize(record.get(sort_key)) for record in records]
+    return [value.lower() if isinstance(value, str) else value for value in (record.get(sort_key) for record in records)]
 
-    left_half = _mergesort(left_half, sort_key, reverse)
-    right_half = _mergesort(right_half, sort_key, reverse)
-
-    return _merge(left_half, right_half, sort_key, reverse)
-
-def _merge(left: List[Dict[str, Any]], right: List[Dict[str, Any]], sort_key: str, reverse: bool) -> List[Dict[str, Any]]:
+def _argsort_keys(keys: List[Any], reverse: bool, kind: str) -> List[int]:
     """
-    Private helper for Mergesort, merges two sorted lists.
+    Private helper returning the record indices in sorted order.
+    Equal keys keep their original relative order for the stable kinds, in both directions.
+    Keys that already form a single run in the requested direction (e.g. receipts fetched
+    ordered by date) are detected in one pass and returned without sorting; numeric keys
+    in strictly the opposite order are simply reversed.
     """
-    result = []
-    left_idx, right_idx = 0, 0
-
-    while left_idx < len(left) and right_idx < len(right):
-        left_val = left[left_idx].get(sort_key)
-        right_val = right[right_idx].get(sort_key)
+    if all(isinstance(k, (int, float)) and not isinstance(k, bool) for k in keys):
+        key_array = np.fromiter(keys, dtype=np.float64, count=len(keys))
+        if reverse:
+            key_array = -key_array
+        if len(key_array) > 1 and not np.isnan(key_array).any():
+            starts, _ = _find_runs(key_array)
+            if len(starts) == 1:
+                return list(range(len(keys)))
+            if len(starts) == len(key_array): # Every step decreases: strictly reversed input
+                return list(range(len(keys) - 1, -1, -1))
+        return np.argsort(key_array, kind=kind).tolist()
+    if _is_single_run(keys, reverse):
+        return list(range(len(keys)))
+    return sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+
+def _find_runs(key_array: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Private helper splitting a numeric key array into maximal non-decreasing runs, in one NumPy pass.
 
-        # Normalize string values for comparison
-        if isinstance(left_val, str): left_val = left_val.lower()
-        if isinstance(right_val, str): right_val = right_val.lower()
+    :param key_array: Float array of sort keys without NaNs.
+    :return: Tuple of (starts, lengths) int64 arrays describing each run.
+    """
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(key_array) < 0) + 1)).astype(np.int64)
+    lengths = np.diff(np.append(starts, len(key_array))).astype(np.int64)
+    return starts, lengths
 
-        should_append_left = False
-        if reverse:
-            should_append_left = (left_val >= right_val) # For descending
-        else:
-            should_append_left = (left_val <= right_val) # For ascending
-
-        if should_append_left:
-            result.append(left[left_idx])
-            left_idx += 1
-        else:
-            result.append(right[right_idx])
-            right_idx += 1
-
-    result.extend(left[left_idx:])
-    result.extend(right[right_idx:])
-    return result
+def _is_single_run(keys: List[Any], reverse: bool) -> bool:
+    """
+    Private helper checking whether keys are already non-decreasing (or non-increasing if reverse).
+    """
+    if reverse:
+        return all(a >= b for a, b in zip(keys, keys[1:]))
+    return all(a <= b for a, b in zip(keys, keys[1:]))
 
 # Example Usage
 if __name__ == "__main__":
@@ -51,18 +51,32 @@ def read_file_content(file_path: Path, file_type: str) -> Optional[bytes]:
     :param file_type: The validated type of the file ('image', 'pdf', 'text').
     :return: The raw content of the file as bytes, or None if reading fails.
     """
-    if not file_path.exists():
+    try:
+        # Size the read from fstat so the whole file arrives in a single read call, without
+        # the separate exists() check or the growing buffer of an unsized f.read()
+        fd = os.open(file_path, os.O_RDONLY)
+    except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
         return None
+    except Exception as e:
+        logger.error(f"Error reading {file_type} file {file_path}: {e}")
+        return None
 
     try:
-        with open(file_path, 'rb') as f:
-            content = f.read()
+        size = os.fstat(fd).st_size
+        content = os.read(fd, size)
+        while len(content) < size: # Short reads are rare for regular files, but allowed
+            chunk = os.read(fd, size - len(content))
+            if not chunk:
+                break
+            content += chunk
         logger.info(f"Read {file_type} file content from {file_path}")
         return content
     except Exception as e:
         logger.error(f"Error reading {file_type} file {file_path}: {e}")
         return None
+    finally:
+        os.close(fd)
 
 # Example usage (for testing/demonstration, requires a dummy file)
 if __name__ == "__main__":
@@ -4,15 +4,90 @@ import cv2
 import numpy as np
 import logging
 import re # Added for detect_language
-from typing import Optional, Tuple
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+OCR_CACHE_SIZE = 512 # Max memoized results per OCR function
+_memoized_functions = []
+
+# Preprocessing scratch buffers, reused across images of the same size (receipts mostly come
+# from a few camera/scanner resolutions). Kept per thread, since Streamlit sessions run in threads.
+SCRATCH_SHAPES_PER_THREAD = 4
+_scratch = threading.local()
+
 # For Windows: pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 # For macOS/Linux, usually not needed if installed via package manager.
 # Ensure Tesseract is installed on your system as a prerequisite.
 
+def content_memoize(maxsize: int = OCR_CACHE_SIZE) -> Callable:
+    """
+    Decorator memoizing an OCR function on a hash of its image bytes (plus any other arguments).
+    Re-uploaded or duplicate receipts then skip preprocessing and the Tesseract call entirely.
+    Failed runs (None results) are not cached so they are retried on the next call.
+
+    :param maxsize: Maximum number of results kept; the least recently used entry is evicted first.
+    :return: The decorator.
+    """
+    def decorator(func: Callable) -> Callable:
+        cache: OrderedDict = OrderedDict()
+        lock = threading.Lock() # Uploads are parsed on a thread pool; the OCR call itself runs unlocked
+
+        @functools.wraps(func)
+        def wrapper(image_bytes: bytes, *args: Any, **kwargs: Any) -> Any:
+            key = (hashlib.blake2b(image_bytes, digest_size=16).digest(), args, tuple(sorted(kwargs.items())))
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    logger.debug(f"{func.__name__} result served from cache.")
+                    return cache[key]
+            result = func(image_bytes, *args, **kwargs)
+            if result is not None:
+                with lock:
+                    cache[key] = result
+                    cache.move_to_end(key) # Another thread may have stored it meanwhile
+                    if len(cache) > maxsize:
+                        cache.popitem(last=False)
+            return result
+
+        def cache_clear() -> None:
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        _memoized_functions.append(wrapper)
+        return wrapper
+    return decorator
+
+def clear_cache() -> None:
+    """
+    Clears the memoized results of all OCR functions (e.g., between tests).
+    """
+    for func in _memoized_functions:
+        func.cache_clear()
+
+def _scratch_buffers(height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns this thread's (grayscale, threshold) uint8 scratch buffers for an image size.
+    The buffers are only for intermediate results; they are overwritten by the next image of that size.
+    """
+    cache = getattr(_scratch, "buffers", None)
+    if cache is None:
+        cache = _scratch.buffers = OrderedDict()
+    key = (height, width)
+    if key in cache:
+        cache.move_to_end(key)
+    else:
+        cache[key] = (np.empty(key, dtype=np.uint8), np.empty(key, dtype=np.uint8))
+        if len(cache) > SCRATCH_SHAPES_PER_THREAD:
+            cache.popitem(last=False)
+    return cache[key]
+
 def preprocess_image_for_ocr(image_bytes: bytes) -> Optional[np.ndarray]:
     """
     Preprocesses an image (bytes) for better OCR accuracy.
@@ -30,10 +105,12 @@ def preprocess_image_for_ocr(image_bytes: bytes) -> Optional[np.ndarray]:
             return None
 
         # --- Basic Preprocessing ---
-        gray = cv2.cvtColor(img_np, cv2.COLOR_BGR2GRAY)
+        gray_buf, thresh_buf = _scratch_buffers(*img_np.shape[:2])
+        gray = cv2.cvtColor(img_np, cv2.COLOR_BGR2GRAY, dst=gray_buf)
 
         thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                       cv2.THRESH_BINARY_INV, 11, 2) # Block size 11, C value 2
+                                       cv2.THRESH_BINARY_INV, 11, 2, dst=thresh_buf) # Block size 11, C value 2
+        deskewed = False
 
         # Only attempt if the image is large enough
         if thresh.shape[0] > 10 and thresh.shape[1] > 10:
@@ -47,7 +124,8 @@ def preprocess_image_for_ocr(image_bytes: bytes) -> Optional[np.ndarray]:
                 (h, w) = img_np.shape[:2]
                 center = (w // 2, h // 2)
                 M = cv2.getRotationMatrix2D(center, angle, 1.0)
-                thresh = cv2.warpAffine(thresh, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+                thresh = cv2.warpAffine(thresh, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE) # Fresh output array
+                deskewed = True
                 logger.debug(f"Image deskewed by {angle:.2f} degrees.")
             else:
                 logger.debug("No contours found for deskewing.")
@@ -55,6 +133,9 @@ def preprocess_image_for_ocr(image_bytes: bytes) -> Optional[np.ndarray]:
             logger.debug("Image too small for deskewing attempt.")
 
 
+        if not deskewed:
+            thresh = thresh.copy() # Don't hand the scratch buffer to the caller
+
         # --- Ensure image is 300 DPI for Tesseract (if original resolution is too low) 
         logger.info("Image preprocessed (grayscale, adaptive thresholded, deskewed attempted).")
         return thresh # Return the processed NumPy array
@@ -63,6 +144,7 @@ def preprocess_image_for_ocr(image_bytes: bytes) -> Optional[np.ndarray]:
         logger.error(f"Error during image preprocessing: {e}", exc_info=True)
         return None
 
+@content_memoize()
 def extract_text_from_image(image_bytes: bytes, lang: str = 'eng') -> Optional[str]:
     """
     Extracts text from an image using Tesseract OCR after preprocessing.
@@ -92,6 +174,7 @@ def extract_text_from_image(image_bytes: bytes, lang: str = 'eng') -> Optional[s
 def detect_language(image_bytes: bytes) -> Optional[str]:
     """
     Attempts to detect the language of the text in an image using Tesseract's OSd.
+    Not memoized here: parse_document caches the result per image header (parsing._detect_language_cached).
     Note: Tesseract's OSd (Orientation and Script Detection) is not always accurate for language,
     but it can give hints. Requires `osd` data for Tesseract.
 
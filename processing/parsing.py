@@ -5,6 +5,17 @@ from typing import Optional, Dict, Any, Tuple, List
 import logging
 import PyPDF2
 import io # Import io for BytesIO
+try:
+    import pypdfium2 as pdfium # Optional native PDF engine; much faster text extraction than PyPDF2
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    pdfium = None
+    PDFIUM_AVAILABLE = False
+import hashlib
+import os
+import threading
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 
 # Local imports
 from processing.ingestion import read_file_content
@@ -27,6 +38,126 @@ formats_to_try = [
     "%y/%m/%d", "%d/%m/%y"
 ]
 
+# Extraction rules are module-level and precompiled so they are built once, not on every _extract_from_text call
+AMOUNT_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    # Strong indicators for total amounts, allowing for variations in spacing/symbols
+    r"(?:total|amount due|grand total|net amount|balance due|total paid|total bill|due amount)\s*[:=]?\s*([$€£₹]\s*[\d,]+\.?\d{0,2})",
+    r"([$€£₹]\s*[\d,]+\.?\d{0,2})\s*(?:total|amount|due|paid)", # Amount before keyword
+    r"(?:total|amount|sum|grand total|bill|paid|due)\s*[:=]?\s*([\d,]+\.?\d{0,2})", # Generic numbers after keywords
+    r"([\d,]+\.?\d{0,2})\s*(?:usd|eur|gbp|inr|cad|aud)", # Numbers before ISO currency
+    r"(?:usd|eur|gbp|inr|cad|aud)\s*([\d,]+\.?\d{0,2})" # ISO currency before numbers
+)]
+CURRENCY_TOKEN_RE = re.compile(r'([$€£₹]|usd|eur|gbp|inr|cad|aud)', re.IGNORECASE)
+NON_AMOUNT_CHARS_RE = re.compile(r'[^\d.]')
+
+CURRENCY_SYMBOLS = {'$': 'USD', '€': 'EUR', '£': 'GBP', '₹': 'INR'}
+
+DATE_PATTERNS = [
+    r'\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}',            # DD-MM-YY, DD/MM/YYYY etc.
+    r'\d{4}[-/.]\d{1,2}[-/.]\d{1,2}',            # YYYY-MM-DD etc.
+    r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2}[,\s]+\d{4}', # Mon DD, YYYY
+    r'\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{4}', # DD Month YYYY
+    r'\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{2}', # DD Mon YY (e.g., 15 Jan 24)
+    r'\d{1,2}[-/](?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*[-/]\d{2,4}', # DD-Mon-YYYY
+]
+DATE_RES = [re.compile(p) for p in DATE_PATTERNS]
+DATE_KEYWORDS = ['date', 'bill date', 'invoice date', 'transaction date', 'sale date', 'paid date', 'issue date']
+# A date keyword followed (within a few separator characters) by any supported date layout, in one scan
+DATE_NEAR_KEYWORD_RE = re.compile(
+    r'(?:' + '|'.join(sorted(DATE_KEYWORDS, key=len, reverse=True)) + r')[^0-9a-z]{0,10}(' + '|'.join(DATE_PATTERNS) + r')',
+    re.IGNORECASE
+)
+
+VENDOR_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'invoice from[:\s]*(.+)',
+    r'bill from[:\s]*(.+)',
+    r'receipt from[:\s]*(.+)',
+    r'sold by[:\s]*(.+)',
+    r'purchased from[:\s]*(.+)',
+    r'billed by[:\s]*(.+)',
+    r'(?:vendor|biller|store|company)[:\s]*(.+)'
+)]
+VENDOR_SUFFIX_SPLIT_RE = re.compile(r'[,;]\s*|phone|tel|email|website|www\.|gst|vat|abn|cin|ltd|inc|co\.|corporation|group|llc|pvt')
+ADDRESS_LIKE_RE = re.compile(r'street|road|avenue|po box|p\.o\.|city|state|zip|pin|building|floor|apt|suite|flat|unit', re.IGNORECASE)
+DIGIT_RUN_RE = re.compile(r'\d{3,}')
+DIGIT_RE = re.compile(r'\d')
+DATE_AMOUNT_KEYWORD_RE = re.compile(r'date|total|amount|invoice|receipt|bill|gst|vat', re.IGNORECASE)
+
+CATEGORY_MAP = {
+    'grocer': 'Groceries', 'supermart': 'Groceries', 'hypermarket': 'Groceries', 'foodmart': 'Groceries', 'bakery': 'Groceries', 'market': 'Groceries',
+    'electricity': 'Utilities', 'power bill': 'Utilities', 'light bill': 'Utilities',
+    'internet': 'Utilities', 'telecom': 'Utilities', 'broadband': 'Utilities', 'water bill': 'Utilities', 'gas bill': 'Utilities',
+    'restaurant': 'Dining', 'cafe': 'Dining', 'food': 'Dining', 'diner': 'Dining', 'eatery': 'Dining', 'pizzeria': 'Dining', 'kfc': 'Dining', 'mcdonalds': 'Dining',
+    'petrol': 'Transport', 'gas station': 'Transport', 'fuel': 'Transport', 'auto': 'Transport', 'car wash': 'Transport',
+    'pharmacy': 'Health', 'medicine': 'Health', 'clinic': 'Health', 'hospital': 'Health', 'doctor': 'Health',
+    'fashion': 'Shopping', 'clothing': 'Shopping', 'boutique': 'Shopping', 'retail': 'Shopping', 'department store': 'Shopping', 'mall': 'Shopping',
+    'electronics': 'Electronics', 'tech store': 'Electronics', 'computer': 'Electronics', 'mobile': 'Electronics',
+    'bookstore': 'Books', 'library': 'Books',
+    'travel': 'Travel', 'airline': 'Travel', 'hotel': 'Travel', 'vacation': 'Travel', 'resort': 'Travel',
+    'subscription': 'Subscriptions', 'monthly fee': 'Subscriptions', 'membership': 'Subscriptions', 'streaming': 'Subscriptions'
+}
+
+BILLING_PERIOD_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r"(?:billing|service|period)\s*[:=]?\s*(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})\s*(?:to|-)\s*(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})",
+    r"for the period\s*from\s*(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})\s*to\s*(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})"
+)]
+
+# Small in-process caches so re-uploaded or templated documents skip OCR work
+LANGUAGE_CACHE_SIZE = 1024
+PARSED_CACHE_SIZE = 256
+_language_cache: Dict[bytes, Optional[str]] = {}
+_parsed_cache: Dict[bytes, ParsedReceiptData] = {}
+_cache_lock = threading.Lock() # Guards both caches; uploads are parsed on a thread pool
+_MISSING = object()
+
+
+def _cache_get(cache: Dict[bytes, Any], key: bytes) -> Any:
+    """
+    Looks up a value in one of the caches, returning _MISSING if it isn't there.
+    """
+    with _cache_lock:
+        return cache.get(key, _MISSING)
+
+def _cache_put(cache: Dict[bytes, Any], key: bytes, value: Any, max_size: int) -> None:
+    """
+    Stores a value in a bounded cache, evicting the oldest entry once full.
+    """
+    with _cache_lock:
+        if key not in cache and len(cache) >= max_size:
+            cache.pop(next(iter(cache))) # Dicts keep insertion order, so this is the oldest entry
+        cache[key] = value
+
+def _detect_language_cached(image_bytes: bytes) -> Optional[str]:
+    """
+    Detects the OCR language of an image, memoized on a hash of its first 64 KB.
+    Templated bills from the same provider share a header, so the language is reused.
+
+    :param image_bytes: Raw bytes of the image file.
+    :return: Detected Tesseract language code or None.
+    """
+    signature = hashlib.blake2b(image_bytes[:65536], digest_size=16).digest()
+    cached_lang = _cache_get(_language_cache, signature)
+    if cached_lang is not _MISSING:
+        return cached_lang
+    detected_lang = detect_language(image_bytes)
+    _cache_put(_language_cache, signature, detected_lang, LANGUAGE_CACHE_SIZE)
+    return detected_lang
+
+def _parse_date_string(date_str: str) -> Optional[date]:
+    """
+    Parses a matched date string against the supported formats.
+
+    :param date_str: Date text captured by one of the date patterns.
+    :return: The parsed date, or None if no format matches.
+    """
+    cleaned = date_str.replace('.', '').replace(',', '')
+    for fmt in formats_to_try:
+        try:
+            return datetime.strptime(cleaned, fmt).date()
+        except ValueError:
+            continue
+    return None
+
 
 def _extract_from_text(text: str, file_type: str = 'text') -> Dict[str, Any]:
     """
@@ -39,37 +170,23 @@ def _extract_from_text(text: str, file_type: str = 'text') -> Dict[str, Any]:
     :return: A dictionary of extracted fields.
     """
     extracted_data = {}
-    lines = text.split('\n')
     lower_text = text.lower()
 
-    amount_patterns = [
-        # Strong indicators for total amounts, allowing for variations in spacing/symbols
-        r"(?:total|amount due|grand total|net amount|balance due|total paid|total bill|due amount)\s*[:=]?\s*([$€£₹]\s*[\d,]+\.?\d{0,2})",
-        r"([$€£₹]\s*[\d,]+\.?\d{0,2})\s*(?:total|amount|due|paid)", # Amount before keyword
-        r"(?:total|amount|sum|grand total|bill|paid|due)\s*[:=]?\s*([\d,]+\.?\d{0,2})", # Generic numbers after keywords
-        r"([\d,]+\.?\d{0,2})\s*(?:usd|eur|gbp|inr|cad|aud)", # Numbers before ISO currency
-        r"(?:usd|eur|gbp|inr|cad|aud)\s*([\d,]+\.?\d{0,2})" # ISO currency before numbers
-    ]
-
     amount = None
     currency = "INR" # Default currency
 
-    for pattern in amount_patterns:
-        match = re.search(pattern, lower_text, re.IGNORECASE)
+    for pattern in AMOUNT_PATTERNS:
+        match = pattern.search(lower_text)
         if match:
             value_str = match.group(1).replace(',', '').strip()
             # Attempt to extract currency symbol/code if present in the matched string
-            detected_curr = re.search(r'([$€£₹]|usd|eur|gbp|inr|cad|aud)', value_str, re.IGNORECASE)
+            detected_curr = CURRENCY_TOKEN_RE.search(value_str)
             if detected_curr:
                 symbol_or_code = detected_curr.group(1).upper()
-                if symbol_or_code == '$': currency = 'USD'
-                elif symbol_or_code == '€': currency = 'EUR'
-                elif symbol_or_code == '£': currency = 'GBP'
-                elif symbol_or_code == '₹': currency = 'INR'
-                else: currency = symbol_or_code # For ISO codes
+                currency = CURRENCY_SYMBOLS.get(symbol_or_code, symbol_or_code) # ISO codes map to themselves
 
             # Clean the number string
-            clean_value_str = re.sub(r'[^\d.]', '', value_str) # Keep only digits and dot
+            clean_value_str = NON_AMOUNT_CHARS_RE.sub('', value_str) # Keep only digits and dot
             try:
                 amount = float(clean_value_str)
                 if amount > 0.01 and amount < 1_000_000:
@@ -86,46 +203,31 @@ def _extract_from_text(text: str, file_type: str = 'text') -> Dict[str, Any]:
     else:
         logger.warning("Could not reliably extract amount.")
 
-    date_patterns = [
-        r'\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}',            # DD-MM-YY, DD/MM/YYYY etc.
-        r'\d{4}[-/.]\d{1,2}[-/.]\d{1,2}',            # YYYY-MM-DD etc.
-        r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2}[,\s]+\d{4}', # Mon DD, YYYY
-        r'\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{4}', # DD Month YYYY
-        r'\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{2}', # DD Mon YY (e.g., 15 Jan 24)
-        r'\d{1,2}[-/](?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*[-/]\d{2,4}', # DD-Mon-YYYY
-    ]
-    date_keywords = ['date', 'bill date', 'invoice date', 'transaction date', 'sale date', 'paid date', 'issue date']
     transaction_date = None
 
-    for line in lines:
-        lower_line = line.lower()
-        for keyword in date_keywords:
-            if keyword in lower_line:
-                for pattern in date_patterns:
-                    match = re.search(pattern, lower_line)
-                    if match:
-                        # Use the global formats_to_try for robust parsing
-                        for fmt in formats_to_try:
-                            try:
-                                transaction_date = datetime.strptime(match.group(0).replace('.', '').replace(',', ''), fmt).date()
-                                break
-                            except ValueError:
-                                continue
-                        if transaction_date: break # Found date, break from keyword loop
-                if transaction_date: break # Found date, break from line loop
-        if transaction_date: break # Found date, break from line loop
+    for match in DATE_NEAR_KEYWORD_RE.finditer(lower_text):
+        transaction_date = _parse_date_string(match.group(1))
+        if transaction_date: break # Found a parseable date next to a keyword
+
+    # Keyword lines with words between the keyword and the date (e.g., "date/time: ..."): take the
+    # first date anywhere on the first such line
+    if not transaction_date:
+        for line in lower_text.split('\n'):
+            if not any(keyword in line for keyword in DATE_KEYWORDS):
+                continue
+            for pattern in DATE_RES:
+                match = pattern.search(line)
+                if match:
+                    transaction_date = _parse_date_string(match.group(0))
+                    if transaction_date: break
+            if transaction_date: break
 
     # Fallback: if not found near keyword, search widely
     if not transaction_date:
-        for pattern in date_patterns:
-            match = re.search(pattern, lower_text)
+        for pattern in DATE_RES:
+            match = pattern.search(lower_text)
             if match:
-                for fmt in formats_to_try:
-                    try:
-                        transaction_date = datetime.strptime(match.group(0).replace('.', '').replace(',', ''), fmt).date()
-                        break
-                    except ValueError:
-                        continue
+                transaction_date = _parse_date_string(match.group(0))
                 if transaction_date: break
     
     if transaction_date:
@@ -134,31 +236,22 @@ def _extract_from_text(text: str, file_type: str = 'text') -> Dict[str, Any]:
     else:
         logger.warning("Could not reliably extract transaction date.")
 
-    vendor_patterns = [
-        r'invoice from[:\s]*(.+)',
-        r'bill from[:\s]*(.+)',
-        r'receipt from[:\s]*(.+)',
-        r'sold by[:\s]*(.+)',
-        r'purchased from[:\s]*(.+)',
-        r'billed by[:\s]*(.+)',
-        r'(?:vendor|biller|store|company)[:\s]*(.+)'
-    ]
     vendor_name = None
 
     # First, look for strong indicators
-    for pattern in vendor_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in VENDOR_PATTERNS:
+        match = pattern.search(text)
         if match:
             potential_vendor = match.group(1).split('\n')[0].strip()
             # Clean up: remove address lines, phone numbers, websites, tax IDs, common corporate suffixes etc.
-            potential_vendor = re.split(r'[,;]\s*|phone|tel|email|website|www\.|gst|vat|abn|cin|ltd|inc|co\.|corporation|group|llc|pvt', potential_vendor, 1)[0].strip()
+            potential_vendor = VENDOR_SUFFIX_SPLIT_RE.split(potential_vendor, 1)[0].strip()
             if potential_vendor and len(potential_vendor) > 2 and len(potential_vendor) < 100:
                 vendor_name = potential_vendor
                 break
     
     if not vendor_name:
-        # Consider the first 5-7 non-empty lines
-        top_lines_to_scan = [line.strip() for line in lines if line.strip()][:7] 
+        # Consider the first 5-7 non-empty lines; stop reading the text once they are found
+        top_lines_to_scan = list(islice(filter(None, (line.strip() for line in text.split('\n'))), 7))
         
         for i, line_content in enumerate(top_lines_to_scan):
             if not line_content: continue # Skip empty lines
@@ -175,9 +268,9 @@ def _extract_from_text(text: str, file_type: str = 'text') -> Dict[str, Any]:
             # 6. Check for common company suffixes or keywords (e.g., Ltd, Inc, Co, Group, Services)
             # 7. Relax digit check slightly, but avoid lines that are mostly numbers (like phone numbers)
             
-            is_address_like = re.search(r'street|road|avenue|po box|p\.o\.|city|state|zip|pin|building|floor|apt|suite|flat|unit', cleaned_line, re.IGNORECASE)
-            is_number_heavy = bool(re.search(r'\d{3,}', cleaned_line)) and len(re.findall(r'\d', cleaned_line)) / len(cleaned_line) > 0.3 # More than 30% digits
-            is_date_amount_keyword = re.search(r'date|total|amount|invoice|receipt|bill|gst|vat', cleaned_line, re.IGNORECASE)
+            is_address_like = ADDRESS_LIKE_RE.search(cleaned_line)
+            is_number_heavy = bool(DIGIT_RUN_RE.search(cleaned_line)) and len(DIGIT_RE.findall(cleaned_line)) / len(cleaned_line) > 0.3 # More than 30% digits
+            is_date_amount_keyword = DATE_AMOUNT_KEYWORD_RE.search(cleaned_line)
             is_too_short_or_long = not (3 < len(cleaned_line) < 60) # Adjusted max length
 
             if (not is_address_like and
@@ -201,35 +294,19 @@ def _extract_from_text(text: str, file_type: str = 'text') -> Dict[str, Any]:
     else:
         logger.warning("Could not reliably extract vendor name.")
         
-    category_map = {
-        'grocer': 'Groceries', 'supermart': 'Groceries', 'hypermarket': 'Groceries', 'foodmart': 'Groceries', 'bakery': 'Groceries', 'market': 'Groceries',
-        'electricity': 'Utilities', 'power bill': 'Utilities', 'light bill': 'Utilities',
-        'internet': 'Utilities', 'telecom': 'Utilities', 'broadband': 'Utilities', 'water bill': 'Utilities', 'gas bill': 'Utilities',
-        'restaurant': 'Dining', 'cafe': 'Dining', 'food': 'Dining', 'diner': 'Dining', 'eatery': 'Dining', 'pizzeria': 'Dining', 'kfc': 'Dining', 'mcdonalds': 'Dining',
-        'petrol': 'Transport', 'gas station': 'Transport', 'fuel': 'Transport', 'auto': 'Transport', 'car wash': 'Transport',
-        'pharmacy': 'Health', 'medicine': 'Health', 'clinic': 'Health', 'hospital': 'Health', 'doctor': 'Health',
-        'fashion': 'Shopping', 'clothing': 'Shopping', 'boutique': 'Shopping', 'retail': 'Shopping', 'department store': 'Shopping', 'mall': 'Shopping',
-        'electronics': 'Electronics', 'tech store': 'Electronics', 'computer': 'Electronics', 'mobile': 'Electronics',
-        'bookstore': 'Books', 'library': 'Books',
-        'travel': 'Travel', 'airline': 'Travel', 'hotel': 'Travel', 'vacation': 'Travel', 'resort': 'Travel',
-        'subscription': 'Subscriptions', 'monthly fee': 'Subscriptions', 'membership': 'Subscriptions', 'streaming': 'Subscriptions'
-    }
     extracted_data['category_name'] = None
-    for keyword, category in category_map.items():
-        if keyword in lower_text or (vendor_name and keyword in vendor_name.lower()):
+    lower_vendor = vendor_name.lower() if vendor_name else ''
+    for keyword, category in CATEGORY_MAP.items():
+        if keyword in lower_text or keyword in lower_vendor:
             extracted_data['category_name'] = category
             logger.debug(f"Category found: {category}")
             break
 
-    billing_period_patterns = [
-        r"(?:billing|service|period)\s*[:=]?\s*(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})\s*(?:to|-)\s*(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})",
-        r"for the period\s*from\s*(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})\s*to\s*(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})"
-    ]
     billing_period_start = None
     billing_period_end = None
 
-    for pattern in billing_period_patterns:
-        match = re.search(pattern, lower_text, re.IGNORECASE)
+    for pattern in BILLING_PERIOD_PATTERNS:
+        match = pattern.search(lower_text)
         if match:
             date_str1 = match.group(1).replace('.', '')
             date_str2 = match.group(2).replace('.', '')
@@ -264,6 +341,27 @@ def _extract_from_text(text: str, file_type: str = 'text') -> Dict[str, Any]:
 
     return extracted_data
 
+def _extract_pdf_text(pdf_bytes: bytes) -> str:
+    """
+    Extracts the selectable text of a PDF. Uses pypdfium2 when installed and falls back
+    to PyPDF2 if it is missing or cannot open the document.
+
+    :param pdf_bytes: Raw bytes of the PDF file.
+    :return: The concatenated text of all pages (may be empty for scanned PDFs).
+    """
+    if PDFIUM_AVAILABLE:
+        try:
+            pdf = pdfium.PdfDocument(pdf_bytes)
+            try:
+                return "".join(page.get_textpage().get_text_range() for page in pdf)
+            finally:
+                pdf.close()
+        except Exception as e:
+            logger.warning(f"pypdfium2 could not extract PDF text, falling back to PyPDF2: {e}")
+
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return "".join(page.extract_text() or "" for page in reader.pages) # extract_text() can return None
+
 def parse_document(file_path: Path, original_filename: str) -> Optional[ParsedReceiptData]:
     """
     Main function to parse a document (image, PDF, or text) and extract structured data.
@@ -284,6 +382,13 @@ def parse_document(file_path: Path, original_filename: str) -> Optional[ParsedRe
     if raw_content_bytes is None:
         raise FileProcessingError(f"Could not read content from {file_path}")
 
+    # Identical content always parses to the same result, so re-uploads short-circuit the pipeline
+    content_key = hashlib.blake2b(raw_content_bytes, digest_size=16, person=file_type.encode()).digest()
+    cached_data = _cache_get(_parsed_cache, content_key)
+    if cached_data is not _MISSING:
+        logger.info(f"Reusing cached parse result for {original_filename}.")
+        return cached_data # Frozen model, safe to share
+
     extracted_text = None
     if file_type == 'text':
         try:
@@ -302,13 +407,9 @@ def parse_document(file_path: Path, original_filename: str) -> Optional[ParsedRe
             raise FileProcessingError(f"Failed to decode text file: {e}")
     elif file_type == 'pdf':
         try:
-            # Attempt to extract text directly from PDF using PyPDF2
-            pdf_file_obj = io.BytesIO(raw_content_bytes)
-            reader = PyPDF2.PdfReader(pdf_file_obj)
-            pdf_text = ""
-            for page in reader.pages:
-                pdf_text += page.extract_text() or "" # extract_text() can return None
-            
+            # Attempt to extract text directly from the PDF's text layer
+            pdf_text = _extract_pdf_text(raw_content_bytes)
+
             if pdf_text.strip():
                 extracted_text = pdf_text
                 logger.info(f"Extracted text directly from PDF {original_filename}.")
@@ -320,7 +421,7 @@ def parse_document(file_path: Path, original_filename: str) -> Optional[ParsedRe
            
     elif file_type == 'image':
         try:
-            detected_lang = detect_language(raw_content_bytes)
+            detected_lang = _detect_language_cached(raw_content_bytes)
             ocr_lang = detected_lang if detected_lang else 'eng'
             
             extracted_text = extract_text_from_image(raw_content_bytes, lang=ocr_lang)
@@ -345,7 +446,50 @@ def parse_document(file_path: Path, original_filename: str) -> Optional[ParsedRe
     try:
         validated_data = ParsedReceiptData(**extracted_fields)
         logger.info(f"Successfully parsed and validated data for {original_filename}.")
+        _cache_put(_parsed_cache, content_key, validated_data, PARSED_CACHE_SIZE)
         return validated_data
     except Exception as e:
         logger.error(f"Validation failed for {original_filename} with extracted fields: {extracted_fields}. Error: {e}", exc_info=True)
         raise ParsingError(f"Data validation failed after extraction: {e}")
+
+def _init_parse_worker() -> None:
+    """
+    Process pool initializer: limits OpenCV and Tesseract (OpenMP) to one thread per worker,
+    since the pool already runs one worker per core and nested threading would oversubscribe the CPU.
+    """
+    os.environ["OMP_THREAD_LIMIT"] = "1" # Read by Tesseract when it starts
+    import cv2
+    cv2.setNumThreads(1)
+
+def _parse_one(item: Tuple[Path, str]) -> Optional[ParsedReceiptData]:
+    """
+    Parses a single (file_path, original_filename) pair inside a worker process.
+    Errors are logged and reported as None so one bad file does not fail the whole batch.
+    """
+    file_path, original_filename = item
+    try:
+        return parse_document(file_path, original_filename)
+    except (FileProcessingError, ParsingError) as e:
+        logger.error(f"Batch parsing failed for {original_filename}: {e}")
+        return None
+
+def parse_documents(items: List[Tuple[Path, str]], max_workers: Optional[int] = None) -> List[Optional[ParsedReceiptData]]:
+    """
+    Parses a batch of documents in parallel, one worker process per CPU core by default.
+    OCR is CPU-bound, so processes (not threads) are used. Callers running this from a script
+    must guard the entry point with `if __name__ == "__main__":` on spawn-based platforms.
+
+    :param items: List of (file_path, original_filename) pairs, as for parse_document.
+    :param max_workers: Number of worker processes. Defaults to os.cpu_count().
+    :return: One entry per input item, in order: the parsed data, or None if that file failed.
+    """
+    if not items:
+        return []
+    if len(items) == 1:
+        return [_parse_one(items[0])] # Not worth starting a pool
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_parse_worker) as executor:
+        results = list(executor.map(_parse_one, items, chunksize=4))
+    logger.info(f"Parsed a batch of {len(items)} documents with {max_workers} worker processes.")
+    return results
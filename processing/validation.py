@@ -1,15 +1,47 @@
-from pydantic import BaseModel, Field, ValidationError, validator
-from datetime import date
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+from datetime import date, datetime
 from typing import Optional, Literal, List
+from functools import lru_cache
 import logging
+import sys
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+_AMOUNT_STRIP = str.maketrans('', '', '$€£₹, ') # Currency symbols, thousands separators and spaces
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%Y/%m/%d', '%d/%m/%Y', '%b %d, %Y', '%B %d, %Y')
+DATE_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _coerce_date(v: str) -> date:
+    """
+    Parses a date string against DATE_FORMATS. Memoized, since bulk imports repeat the same
+    date strings and each miss can cost several strptime attempts. Failures raise and are not cached.
+
+    :param v: The date string.
+    :return: The parsed date.
+    :raises ValueError: If no supported format matches.
+    """
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(v, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Could not parse date: {v}. Expected formats like YYYY-MM-DD or DD-MM-YYYY.")
+
+def clear_validation_caches() -> None:
+    """
+    Clears the memoized date parsing results (e.g., between tests).
+    """
+    _coerce_date.cache_clear()
+
 class ParsedReceiptData(BaseModel):
     """
     Pydantic model for validating and structuring extracted receipt data.
+    Instances are immutable, so parse results can be shared (e.g., from the parse cache) without copying.
     """
+    model_config = ConfigDict(frozen=True)
+
     vendor_name: str = Field(..., min_length=1, description="Name of the vendor or biller.")
     transaction_date: date = Field(..., description="Date of the transaction.")
     amount: float = Field(..., gt=0, description="Total amount of the transaction.")
@@ -19,35 +51,33 @@ class ParsedReceiptData(BaseModel):
     billing_period_end: Optional[date] = Field(None, description="End date of the billing period for bills.")
     parsed_raw_text: Optional[str] = Field(None, description="Raw text extracted from the document.")
 
-    @validator('transaction_date', 'billing_period_start', 'billing_period_end', pre=True)
+    @field_validator('transaction_date', 'billing_period_start', 'billing_period_end', mode='before')
+    @classmethod
     def parse_date_strings(cls, v):
         if isinstance(v, str):
-            for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%Y/%m/%d', '%d/%m/%Y', '%b %d, %Y', '%B %d, %Y'):
-                try:
-                    return datetime.strptime(v, fmt).date()
-                except ValueError:
-                    continue
-            raise ValueError(f"Could not parse date: {v}. Expected formats like YYYY-MM-DD or DD-MM-YYYY.")
+            return _coerce_date(v)
         elif isinstance(v, date):
             return v
         elif v is None:
             return None
         raise TypeError("Date must be a string or date object.")
 
-    @validator('amount', pre=True)
+    @field_validator('amount', mode='before')
+    @classmethod
     def parse_amount(cls, v):
         if isinstance(v, (int, float)):
             return float(v)
         if isinstance(v, str):
-            # Remove currency symbols, commas, and trim whitespace
-            clean_v = v.replace('$', '').replace('€', '').replace('£', '').replace('₹', '').replace(',', '').strip()
+            # Remove currency symbols, commas, and whitespace in a single pass
+            clean_v = v.translate(_AMOUNT_STRIP)
             try:
                 return float(clean_v)
             except ValueError:
                 raise ValueError(f"Could not parse amount: {v}. Expected a valid number format.")
         raise TypeError("Amount must be a number or string.")
 
-    @validator('currency', pre=True)
+    @field_validator('currency', mode='before')
+    @classmethod
     def validate_currency(cls, v):
         if isinstance(v, str):
             upper_v = v.upper().strip()
@@ -56,6 +86,12 @@ class ParsedReceiptData(BaseModel):
                 return upper_v
         return "INR" # Default to INR if invalid or cannot determine
 
+    @field_validator('currency', 'category_name', mode='after')
+    @classmethod
+    def intern_repeated_strings(cls, v):
+        # Currency codes and category names repeat across receipts; share one string object each
+        return sys.intern(v) if isinstance(v, str) else v
+
 def validate_file_type(file_name: str) -> Optional[str]:
     """
     Validates the file extension against allowed types.
@@ -90,7 +126,7 @@ if __name__ == "__main__":
             currency="USD",
             category_name="Groceries"
         )
-        logger.info(f"Valid Data 1: {data.dict()}")
+        logger.info(f"Valid Data 1: {data.model_dump()}")
     except ValidationError as e:
         logger.error(f"Validation Error 1: {e.json()}")
 
@@ -102,7 +138,7 @@ if __name__ == "__main__":
             billing_period_start="2023/01/01",
             billing_period_end="2023/01/31"
         )
-        logger.info(f"Valid Data 2: {data.dict()}")
+        logger.info(f"Valid Data 2: {data.model_dump()}")
     except ValidationError as e:
         logger.error(f"Validation Error 2: {e.json()}")
 
@@ -114,7 +150,7 @@ if __name__ == "__main__":
             amount="abc", # Invalid amount
             currency="$$"
         )
-        logger.info(f"Invalid Data Attempt: {data.dict()}")
+        logger.info(f"Invalid Data Attempt: {data.model_dump()}")
     except ValidationError as e:
         logger.error(f"Validation Error with invalid data: {e.json()}")
 
@@ -1,21 +1,54 @@
+import os
+os.environ.setdefault("RECEIPT_APP_KDF_CHEAP", "1") # Cheap bcrypt cost; must be set before utils.security is imported
+
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 from database.database import Base, get_db
 from database import crud
+from database.models import User, Receipt, Vendor, Category
 from utils.security import hash_password
 from datetime import date, datetime
 import pandas as pd
 from unittest.mock import MagicMock, patch
-import io
-import os
+import sys
 
 # --- Database Fixtures ---
 
 @pytest.fixture(scope="session")
 def engine():
-    """Provides a SQLAlchemy engine connected to an in-memory SQLite database for the test session."""
-    return create_engine("sqlite:///:memory:")
+    """
+    Provides a SQLAlchemy engine connected to an in-memory SQLite database for the test session.
+    StaticPool keeps a single connection, so every test sees the schema created once by `tables`.
+    The database name is keyed on the pytest-xdist worker id, so under `pytest -n auto`
+    each worker process gets its own isolated in-memory DB.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "master")
+    test_engine = create_engine(
+        f"sqlite:///file:memdb_{worker}?mode=memory&cache=shared&uri=true",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+
+    @event.listens_for(test_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # The test DB is throwaway, so skip fsync and on-disk journaling entirely
+        cursor = dbapi_connection.cursor()
+        cursor.executescript(
+            "PRAGMA synchronous=OFF; PRAGMA journal_mode=MEMORY; "
+            "PRAGMA locking_mode=EXCLUSIVE; PRAGMA temp_store=MEMORY;"
+        )
+        cursor.close()
+        # Let SQLAlchemy, not pysqlite, manage BEGIN so SAVEPOINTs in db_session behave
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(test_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return test_engine
 
 @pytest.fixture(scope="session")
 def tables(engine):
@@ -24,47 +57,95 @@ def tables(engine):
     yield
     Base.metadata.drop_all(engine)
 
-@pytest.fixture(scope="function")
-def db_session(engine, tables):
+@pytest.fixture(scope="module")
+def db_connection(engine, tables):
     """
-    Provides a database session for each test function.
-    Each test gets a fresh session, and changes are rolled back afterwards.
+    Provides a connection per test module. Its outer transaction holds the data shared
+    by the module's tests and is rolled back once the module finishes.
     """
     connection = engine.connect()
     transaction = connection.begin()
-    Session = sessionmaker(bind=connection)
-    session = Session()
+    yield connection
+    transaction.rollback()
+    connection.close()
 
-    # Patch get_db to return our test session
-    with patch('database.database.get_db', return_value=iter([session])):
+@pytest.fixture(scope="module")
+def db_session_module(db_connection):
+    """Provides a session used to build module-scoped sample data once."""
+    session = Session(bind=db_connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+    yield session
+    session.close()
+
+@pytest.fixture(scope="function")
+def db_session(db_connection):
+    """
+    Provides a database session for each test function.
+    Each test runs inside its own SAVEPOINT on the module connection, and every
+    session.commit() made by the code under test only releases an inner SAVEPOINT,
+    so all changes are rolled back cheaply after each test.
+    """
+    nested = db_connection.begin_nested()
+    # Rows stay loaded after commit and are only flushed when the code under test asks,
+    # so commits do not trigger a SELECT per attribute access
+    session = Session(
+        bind=db_connection,
+        join_transaction_mode="create_savepoint",
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+    # Patch get_db to return our test session; a fresh generator per call, like the real get_db
+    with patch('database.database.get_db', side_effect=lambda: (s for s in (session,))):
         yield session
 
     session.close()
-    transaction.rollback() # Rollback all changes
-    connection.close()
+    if nested.is_active:
+        nested.rollback() # Rollback all changes made by the test
 
 # --- Mock Data Fixtures ---
 
-@pytest.fixture
+TEST_USER_PASSWORD = "TestPassword123!"
+
+@pytest.fixture(scope="module")
 def test_user_data():
     """Provides data for a test user."""
     return {
         "username": "testuser",
-        "password": "TestPassword123!",
+        "password": TEST_USER_PASSWORD,
         "email": "test@example.com"
     }
 
-@pytest.fixture
-def create_test_user(db_session, test_user_data):
-    """Creates and returns a test user in the database."""
-    user = crud.create_user(db_session, **test_user_data)
-    db_session.refresh(user)
-    return user
+# bcrypt is deliberately slow, so hash the shared test password once at import
+_CACHED_HASH = hash_password(TEST_USER_PASSWORD)
+
+@pytest.fixture(scope="session")
+def user_factory():
+    """
+    Provides a factory that inserts a User directly with the cached password hash,
+    skipping crud.create_user's lookup and hashing. Tests of create_user itself call the real function.
+    """
+    def _make(session, username="u", email="e@x.com"):
+        user = User(username=username, email=email, password_hash=_CACHED_HASH)
+        session.add(user)
+        session.flush()
+        return user
+    return _make
+
+@pytest.fixture(scope="module")
+def module_test_user_id(db_session_module, test_user_data, user_factory):
+    """Creates the test user once per module and returns its id."""
+    user = user_factory(db_session_module, username=test_user_data["username"], email=test_user_data["email"])
+    db_session_module.commit()
+    return user.id
 
 @pytest.fixture
-def create_sample_receipts(db_session, create_test_user):
-    """Creates and returns sample receipts for the test user."""
-    user = create_test_user
+def create_test_user(db_session, module_test_user_id):
+    """Returns the module's test user, loaded in the current test's session."""
+    return db_session.get(User, module_test_user_id)
+
+@pytest.fixture(scope="module")
+def module_sample_receipt_ids(db_session_module, module_test_user_id):
+    """Creates sample receipts for the test user once per module and returns their ids."""
     receipts_data = [
         {
             "vendor_name": "Groceries Inc.",
@@ -112,75 +193,153 @@ def create_sample_receipts(db_session, create_test_user):
             "parsed_raw_text": "Local Cafe Date: 03/10/2023 Total: $15.00"
         }
     ]
-    created_receipts = []
-    for data in receipts_data:
-        receipt = crud.create_receipt(db_session, owner_id=user.id, **data)
-        db_session.refresh(receipt)
-        created_receipts.append(receipt)
-    return created_receipts
+    # Seed vendors and categories with one INSERT OR IGNORE each, then read back all ids in one
+    # SELECT per table, so existing names never cost a per-row existence lookup
+    vendor_names = list(dict.fromkeys(d["vendor_name"] for d in receipts_data))
+    category_names = list(dict.fromkeys(d["category_name"] for d in receipts_data))
+    db_session_module.execute(sqlite_insert(Vendor).on_conflict_do_nothing(), [{"name": name} for name in vendor_names])
+    db_session_module.execute(sqlite_insert(Category).on_conflict_do_nothing(), [{"name": name} for name in category_names])
+    vendor_ids = dict(db_session_module.execute(select(Vendor.name, Vendor.id).where(Vendor.name.in_(vendor_names))).all())
+    category_ids = dict(db_session_module.execute(select(Category.name, Category.id).where(Category.name.in_(category_names))).all())
+    receipt_rows = [
+        {
+            "owner_id": module_test_user_id,
+            "vendor_id": vendor_ids[data["vendor_name"]],
+            "category_id": category_ids[data["category_name"]],
+            "transaction_date": data["transaction_date"],
+            "amount": data["amount"],
+            "currency": data["currency"],
+            "original_filename": data["original_filename"],
+            "parsed_raw_text": data["parsed_raw_text"],
+            "upload_date": datetime.now()
+        }
+        for data in receipts_data
+    ]
+    receipt_ids = list(db_session_module.scalars(
+        insert(Receipt).returning(Receipt.id, sort_by_parameter_order=True), receipt_rows
+    ))
+    db_session_module.commit()
+    return receipt_ids
 
-# --- Mock Streamlit Fixture ---
 @pytest.fixture
-def mock_streamlit(mocker):
+def create_sample_receipts(db_session, create_test_user, module_sample_receipt_ids):
+    """Returns the module's sample receipts, loaded in the current test's session."""
+    # One SELECT ... IN for all rows instead of a get() round trip per receipt
+    receipts_by_id = {
+        receipt.id: receipt
+        for receipt in db_session.scalars(select(Receipt).where(Receipt.id.in_(module_sample_receipt_ids)))
+    }
+    return [receipts_by_id[receipt_id] for receipt_id in module_sample_receipt_ids]
+
+# --- Mock Streamlit Fixture ---
+
+# Display-only Streamlit functions that tests only assert calls against
+_UI_NOOPS = (
+    "info", "warning", "error", "success", "write", "markdown", "header", "subheader", "image",
+    "plotly_chart", "caption", "metric", "download_button", "rerun", "dataframe"
+)
+
+class StopExecution(Exception):
+    """Raised by the mocked st.stop(), so page code after the stop doesn't run (as with the real one)."""
+
+class _State(dict):
+    """Dict with attribute access, mirroring how st.session_state can be used either way."""
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+def _passthrough_cache(func=None, **kwargs):
+    """Stands in for st.cache_data (bare or with arguments) without caching, so each test sees its own data."""
+    if func is None:
+        return _passthrough_cache
+    return func
+_passthrough_cache.clear = lambda: None
+
+def _mock_form(key, clear_on_submit=False):
+    # This will return a context manager for `with st.form(...)`
+    return MagicMock(__enter__=lambda self: self, __exit__=lambda self, exc_type, exc_val, exc_tb: None)
+
+def _build_mock_streamlit():
     """
-    Mocks common Streamlit functions and session_state for testing UI logic.
+    Builds the Streamlit mock once. Child mocks for functions that tests never configure
+    (st.title, st.spinner, ...) are created on first access by MagicMock itself.
     """
     mock_st = MagicMock()
 
+    for name in _UI_NOOPS:
+        setattr(mock_st, name, MagicMock())
+    mock_st.cache_data = _passthrough_cache # Decorates functions at import time, so it must not be a mock
+    mock_st.fragment = _passthrough_cache # Same for @st.fragment; the function simply runs inline
+    return mock_st
+
+def _reset_mock_streamlit(mock_st):
+    """
+    Clears recorded calls on the shared mock and re-creates the few widgets whose
+    return values or side effects tests override, so no configuration leaks between tests.
+    """
+    mock_st.reset_mock()
+
     # Mock st.session_state
-    mock_session_state = {}
-    mock_st.session_state = mock_session_state
-
-    # Common Streamlit functions
-    mock_st.text_input = mocker.MagicMock(return_value="")
-    mock_st.number_input = mocker.MagicMock(return_value=0.0)
-    mock_st.date_input = mocker.MagicMock(return_value=date.today())
-    mock_st.selectbox = mocker.MagicMock(side_effect=lambda label, options, **kwargs: options[0] if options else None)
-    mock_st.radio = mocker.MagicMock(side_effect=lambda label, options, **kwargs: options[0] if options else None)
-    mock_st.button = mocker.MagicMock(return_value=False)
-    mock_st.form_submit_button = mocker.MagicMock(return_value=False)
-    mock_st.file_uploader = mocker.MagicMock(return_value=None)
-    mock_st.progress = mocker.MagicMock(return_value=MagicMock(empty=MagicMock())) # For progress bar
-    mock_st.info = mocker.MagicMock()
-    mock_st.warning = mocker.MagicMock()
-    mock_st.error = mocker.MagicMock()
-    mock_st.success = mocker.MagicMock()
-    mock_st.write = mocker.MagicMock()
-    mock_st.markdown = mocker.MagicMock()
-    mock_st.header = mocker.MagicMock()
-    mock_st.subheader = mocker.MagicMock()
-    mock_st.image = mocker.MagicMock()
-    mock_st.plotly_chart = mocker.MagicMock()
-    mock_st.columns = mocker.MagicMock(return_value=[MagicMock(), MagicMock(), MagicMock(), MagicMock()])
-    mock_st.sidebar = MagicMock()
-    mock_st.sidebar.title = mocker.MagicMock()
-    mock_st.sidebar.radio = mocker.MagicMock(side_effect=lambda label, options, **kwargs: options[0] if options else None)
-    mock_st.sidebar.text_input = mocker.MagicMock(return_value="")
-    mock_st.sidebar.number_input = mocker.MagicMock(return_value=0.0)
-    mock_st.sidebar.selectbox = mocker.MagicMock(side_effect=lambda label, options, **kwargs: options[0] if options else None)
-    mock_st.sidebar.info = mocker.MagicMock()
-    mock_st.sidebar.warning = mocker.MagicMock()
-    mock_st.sidebar.image = mocker.MagicMock()
-    mock_st.dataframe = mocker.MagicMock()
-    mock_st.caption = mocker.MagicMock()
-    mock_st.text_area = mocker.MagicMock(return_value="")
-    mock_st.slider = mocker.MagicMock(return_value=1) # For dashboard slider
-    mock_st.metric = mocker.MagicMock()
-    mock_st.download_button = mocker.MagicMock()
-    mock_st.stop = mocker.MagicMock() # To test st.stop() calls
-    mock_st.rerun = mocker.MagicMock() # To test st.rerun() calls
+    mock_st.session_state = _State()
+    mock_st.stop = MagicMock(side_effect=StopExecution)
 
+    pick_first = lambda label, options, **kwargs: options[0] if options else None
+    mock_st.text_input = MagicMock(return_value="")
+    mock_st.number_input = MagicMock(return_value=0.0)
+    mock_st.date_input = MagicMock(return_value=date.today())
+    mock_st.selectbox = MagicMock(side_effect=pick_first)
+    mock_st.radio = MagicMock(side_effect=pick_first)
+    mock_st.button = MagicMock(return_value=False)
+    mock_st.form_submit_button = MagicMock(return_value=False)
+    mock_st.file_uploader = MagicMock(return_value=None)
+    mock_st.progress = MagicMock(return_value=MagicMock(empty=MagicMock())) # For progress bar
+    mock_st.columns = MagicMock(return_value=[MagicMock(), MagicMock(), MagicMock(), MagicMock()])
+    mock_st.sidebar = MagicMock()
+    mock_st.sidebar.radio = MagicMock(side_effect=pick_first)
+    mock_st.sidebar.text_input = MagicMock(return_value="")
+    mock_st.sidebar.number_input = MagicMock(return_value=0.0)
+    mock_st.sidebar.selectbox = MagicMock(side_effect=pick_first)
+    mock_st.text_area = MagicMock(return_value="")
+    mock_st.slider = MagicMock(return_value=1) # For dashboard slider
     # Patch st.form to capture its body and ensure submit buttons work
-    def mock_form(key, clear_on_submit=False):
-        # This will return a context manager for `with st.form(...)`
-        return MagicMock(__enter__=lambda self: self, __exit__=lambda self, exc_type, exc_val, exc_tb: None)
+    mock_st.form = MagicMock(side_effect=_mock_form)
+
+_MOCK_ST = _build_mock_streamlit()
+# Swap the module in once, before test modules import the UI code, so `import streamlit as st`
+# binds to the mock everywhere for the whole session
+_REAL_STREAMLIT = sys.modules.get('streamlit')
+sys.modules['streamlit'] = _MOCK_ST
 
-    mock_st.form = mocker.MagicMock(side_effect=mock_form)
+@pytest.fixture(scope="session")
+def mock_streamlit():
+    """
+    Mocks common Streamlit functions and session_state for testing UI logic.
+    The mock is built once per session; `reset_streamlit` restores it before each test.
+    """
+    yield _MOCK_ST
+    if _REAL_STREAMLIT is not None:
+        sys.modules['streamlit'] = _REAL_STREAMLIT
+    else:
+        sys.modules.pop('streamlit', None)
 
+@pytest.fixture(autouse=True)
+def reset_streamlit(mock_streamlit):
+    """Clears session_state, call history and per-test widget configuration on the shared mock."""
+    _reset_mock_streamlit(mock_streamlit)
 
-    # Use patch.dict to mock sys.modules for 'streamlit'
-    with patch.dict('sys.modules', {'streamlit': mock_st}):
-        yield mock_st
+@pytest.fixture(autouse=True)
+def raw_receipts_in_tmp_path(tmp_path, monkeypatch):
+    """Redirects saved uploads to the test's tmp_path, so no test writes into data/raw_receipts."""
+    from processing import ingestion
+    raw_receipts_dir = tmp_path / "raw_receipts"
+    raw_receipts_dir.mkdir()
+    monkeypatch.setattr(ingestion, "RAW_RECEIPTS_DIR", raw_receipts_dir)
+    return raw_receipts_dir
 
 @pytest.fixture
 def mock_uploaded_file(mocker):
@@ -191,10 +350,9 @@ def mock_uploaded_file(mocker):
         mock_file = mocker.MagicMock()
         mock_file.name = name
         mock_file.type = file_type
-        if isinstance(content, str):
-            mock_file.getbuffer.return_value = io.BytesIO(content.encode('utf-8'))
-        else:
-            mock_file.getbuffer.return_value = io.BytesIO(content)
-        mock_file.getvalue.return_value = mock_file.getbuffer().getvalue() # For PyPDF2
+        raw = content.encode('utf-8') if isinstance(content, str) else content # Encode once
+        mock_file.getbuffer.return_value = memoryview(raw) # Streamlit's UploadedFile.getbuffer() returns a memoryview
+        mock_file.getvalue.return_value = raw # For PyPDF2
+        mock_file.read = lambda *args: raw
         return mock_file
     return _mock_file
\ No newline at end of file
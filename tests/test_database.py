@@ -13,9 +13,8 @@ def test_create_user(db_session, test_user_data):
     assert user.username == test_user_data["username"]
     assert crud.get_user_by_username(db_session, test_user_data["username"]) == user
 
-def test_create_duplicate_user_raises_error(db_session, test_user_data):
+def test_create_duplicate_user_raises_error(db_session, create_test_user, test_user_data):
     """Test that creating a user with a duplicate username raises an error."""
-    crud.create_user(db_session, **test_user_data)
     with pytest.raises(ValueError, match="Username already exists"):
         crud.create_user(db_session, **test_user_data)
 
@@ -106,6 +105,130 @@ def test_get_receipts_by_user(db_session, create_sample_receipts):
     sorted_by_vendor_asc = crud.get_receipts_by_user(db_session, user_id, sort_by="vendor_name", sort_order="asc")
     assert sorted_by_vendor_asc[0].vendor.name == "Amazon Online"
 
+def test_get_receipts_with_names(db_session, create_sample_receipts):
+    """Test retrieving flat receipt rows with vendor and category names joined in."""
+    user_id = create_sample_receipts[0].owner_id
+    rows = crud.get_receipts_with_names(db_session, user_id)
+    assert len(rows) == len(create_sample_receipts)
+    by_id = {r.id: r for r in create_sample_receipts}
+    for row in rows:
+        receipt = by_id[row.id]
+        assert row.vendor_name == (receipt.vendor.name if receipt.vendor else "Unknown Vendor")
+        assert row.category_name == (receipt.category.name if receipt.category else "Uncategorized")
+        assert row.amount == receipt.amount
+    assert rows[0].transaction_date == date(2023, 3, 10) # Newest first
+    assert crud.get_receipts_with_names(db_session, 9999) == []
+
+def test_get_category_spend_and_vendor_frequency(db_session, create_sample_receipts):
+    """Test the SQL GROUP BY aggregations used by the dashboard."""
+    user_id = create_sample_receipts[0].owner_id
+    category_spend = crud.get_category_spend(db_session, user_id)
+    assert category_spend[0].category_name == "Groceries"
+    assert category_spend[0].amount == pytest.approx(220.50)
+    assert len(category_spend) == 4
+
+    vendor_frequency = crud.get_vendor_frequency_sql(db_session, user_id, limit=2)
+    assert len(vendor_frequency) == 2
+    assert tuple(vendor_frequency[0]) == ("Groceries Inc.", 2)
+    assert crud.get_vendor_frequency_sql(db_session, 9999) == []
+
+def test_get_receipts_filtered(db_session, create_sample_receipts):
+    """Test the SQL keyword search, amount range, sort and paging used by the records page."""
+    user_id = create_sample_receipts[0].owner_id
+    rows = crud.get_receipts_filtered(db_session, user_id, sort_key="amount", desc=False)
+    assert [row.amount for row in rows] == sorted(r.amount for r in create_sample_receipts)
+    assert rows[0].vendor_name and rows[0].category_name
+
+    groceries = crud.get_receipts_filtered(db_session, user_id, q="GROCERIES")
+    assert {row.original_filename for row in groceries} == {"receipt_grocery_1.jpg", "receipt_grocery_2.png"}
+    assert crud.count_receipts_filtered(db_session, user_id, q="GROCERIES") == 2
+    assert crud.get_receipts_filtered(db_session, user_id, q="%") == [] # Wildcards are matched literally
+
+    in_range = crud.get_receipts_filtered(db_session, user_id, amount_min=50.25, amount_max=100.50)
+    assert {row.amount for row in in_range} == {50.25, 75.00, 100.50}
+    assert crud.count_receipts_filtered(db_session, user_id, amount_min=50.25, amount_max=100.50) == 3
+
+    first_page = crud.get_receipts_filtered(db_session, user_id, sort_key="amount", limit=2)
+    second_page = crud.get_receipts_filtered(db_session, user_id, sort_key="amount", limit=2, offset=2)
+    assert [row.amount for row in first_page + second_page] == sorted((r.amount for r in create_sample_receipts), reverse=True)[:4]
+
+    assert crud.get_receipt_amount_bounds(db_session, user_id) == (
+        min(r.amount for r in create_sample_receipts), max(r.amount for r in create_sample_receipts))
+    assert crud.get_receipt_amount_bounds(db_session, 9999) == (None, None)
+
+def test_get_receipts_cache_token(db_session, create_sample_receipts):
+    """Test the receipts cache token changes when a receipt is deleted, and is stable otherwise."""
+    receipt = create_sample_receipts[0]
+    token = crud.get_receipts_cache_token(db_session, receipt.owner_id)
+    assert token.startswith(f"{len(create_sample_receipts)}:")
+    assert crud.get_receipts_cache_token(db_session, receipt.owner_id) == token
+    assert crud.get_receipts_cache_token(db_session, 9999).startswith("0:") # User without receipts
+
+    crud.delete_receipt(db_session, receipt.id, receipt.owner_id)
+    assert crud.get_receipts_cache_token(db_session, receipt.owner_id) != token
+
+def test_create_receipts_bulk(db_session, user_factory):
+    """Test the batch insert resolves vendors and categories by name (case-insensitively) and creates missing ones."""
+    bulk_user = user_factory(db_session, username="bulk_user", email="bulk@example.com") # No other receipts
+    existing_vendor = crud.create_vendor(db_session, "Bulk Mart")
+    receipts = [
+        {"vendor_name": "bulk mart", "transaction_date": date(2023, 5, 1), "amount": 10.0, "category_name": "Bulk Groceries"},
+        {"vendor_name": "Bulk Fresh Vendor", "transaction_date": date(2023, 5, 2), "amount": 20.0, "currency": "EUR",
+         "category_name": "bulk groceries", "original_filename": "bulk.txt"},
+        {"vendor_name": "BULK FRESH VENDOR", "transaction_date": date(2023, 5, 3), "amount": 30.0},
+    ]
+    assert crud.create_receipts_bulk(db_session, bulk_user.id, receipts) == (3, {})
+    assert crud.create_receipts_bulk(db_session, bulk_user.id, []) == (0, {})
+
+    created = crud.get_receipts_by_user(db_session, bulk_user.id, limit=None, sort_by="amount", sort_order="asc")
+    assert [r.amount for r in created] == [10.0, 20.0, 30.0]
+    assert created[0].vendor_id == existing_vendor.id
+    assert created[1].vendor_id == created[2].vendor_id
+    assert created[0].category_id == created[1].category_id is not None
+    assert created[2].category_id is None
+    assert created[1].currency == "EUR" and created[0].currency == "USD"
+
+def test_create_receipts_bulk_skips_rejected_rows(db_session, user_factory):
+    """Test that a row the database rejects is reported on its own while the rest of the batch is saved."""
+    user = user_factory(db_session, username="bulk_partial_user", email="bulk_partial@example.com")
+    receipts = [
+        {"vendor_name": "Partial Mart", "transaction_date": date(2023, 6, 1), "amount": 5.0},
+        {"vendor_name": "Partial Mart", "transaction_date": None, "amount": 6.0}, # NOT NULL violation
+        {"vendor_name": "Partial Mart", "transaction_date": date(2023, 6, 3), "amount": 7.0},
+    ]
+    created, failures = crud.create_receipts_bulk(db_session, user.id, receipts)
+    assert created == 2
+    assert list(failures) == [1]
+
+    saved = crud.get_receipts_by_user(db_session, user.id, limit=None, sort_by="amount", sort_order="asc")
+    assert [r.amount for r in saved] == [5.0, 7.0]
+
+def test_create_receipts_bulk_non_ascii_vendor(db_session, user_factory):
+    """Test that an existing vendor with non-ASCII letters is reused instead of inserted again."""
+    user = user_factory(db_session, username="bulk_accent_user", email="bulk_accent@example.com")
+    existing_vendor = crud.create_vendor(db_session, "Épicerie Müller")
+    receipts = [
+        {"vendor_name": "Épicerie Müller", "transaction_date": date(2023, 7, 1), "amount": 8.0},
+        {"vendor_name": "épicerie müller", "transaction_date": date(2023, 7, 2), "amount": 9.0},
+    ]
+    assert crud.create_receipts_bulk(db_session, user.id, receipts) == (2, {})
+
+    saved = crud.get_receipts_by_user(db_session, user.id, limit=None, sort_by="amount", sort_order="asc")
+    assert saved[0].vendor_id == existing_vendor.id
+    assert saved[1].vendor_id == crud.get_vendor_by_name(db_session, "épicerie müller").id
+
+def test_create_receipts_bulk_skips_rejected_vendor(db_session, user_factory):
+    """Test that a vendor the database rejects only fails the receipts that use it."""
+    user = user_factory(db_session, username="bulk_vendor_user", email="bulk_vendor@example.com")
+    receipts = [
+        {"vendor_name": None, "transaction_date": date(2023, 8, 1), "amount": 1.0}, # NOT NULL violation
+        {"vendor_name": "Vendor Check Mart", "transaction_date": date(2023, 8, 2), "amount": 2.0},
+    ]
+    created, failures = crud.create_receipts_bulk(db_session, user.id, receipts)
+    assert created == 1
+    assert list(failures) == [0]
+    assert [r.amount for r in crud.get_receipts_by_user(db_session, user.id, limit=None)] == [2.0]
+
 def test_get_receipt_by_id(db_session, create_sample_receipts):
     """Test retrieving a single receipt by ID and owner."""
     receipt = create_sample_receipts[0]
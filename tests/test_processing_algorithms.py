@@ -1,5 +1,6 @@
 import pytest
-from processing.algorithms import search, sort
+import pandas as pd
+from processing.algorithms import search, sort, arrow_backend
 from datetime import date, datetime
 
 # Sample data for algorithms testing
@@ -42,6 +43,13 @@ def test_linear_search_records_empty_input():
     results = search.linear_search_records([], "query")
     assert len(results) == 0
 
+def test_linear_search_records_empty_fields():
+    """Test that an empty field list searches nothing (only fields=None means all fields)."""
+    assert search.linear_search_records(SAMPLE_RECORDS, "walmart", fields=[]) == []
+    assert search.linear_search_records(pd.DataFrame(SAMPLE_RECORDS), "walmart", fields=[]).empty
+    assert search.pattern_search_records(SAMPLE_RECORDS, "walmart", fields=[]) == []
+    assert search.pattern_search_records(SAMPLE_RECORDS, r"^Walm", fields=[]) == []
+
 def test_range_search_records_found():
     """Test range search with values found within range."""
     results = search.range_search_records(SAMPLE_RECORDS, "amount", min_value=50, max_value=100)
@@ -70,6 +78,25 @@ def test_range_search_records_empty_input():
     results = search.range_search_records([], "amount", min_value=10)
     assert len(results) == 0
 
+def test_range_search_records_sorted_index():
+    """Test range search through a SortedIndex matches the scan result."""
+    amount_index = search.SortedIndex(SAMPLE_RECORDS, "amount")
+    for min_value, max_value in [(50, 100), (150, None), (None, 20), (300, None), (None, None)]:
+        indexed = search.range_search_records(SAMPLE_RECORDS, "amount", min_value=min_value, max_value=max_value, index=amount_index)
+        scanned = search.range_search_records(SAMPLE_RECORDS, "amount", min_value=min_value, max_value=max_value)
+        assert indexed == scanned
+
+def test_search_records_dataframe_matches_records():
+    """Test that DataFrame input gives the same rows as the list-of-dicts path."""
+    df = pd.DataFrame(SAMPLE_RECORDS)
+    for query, fields, case_sensitive in [("walmart", ["vendor"], False), ("Walmart", ["vendor"], True), ("2023-02", None, False)]:
+        expected = [r["id"] for r in search.linear_search_records(SAMPLE_RECORDS, query, fields, case_sensitive)]
+        assert search.linear_search_records(df, query, fields, case_sensitive)["id"].tolist() == expected
+    for min_value, max_value in [(50, 100), (150, None), (None, 20)]:
+        expected = [r["id"] for r in search.range_search_records(SAMPLE_RECORDS, "amount", min_value, max_value)]
+        assert search.range_search_records(df, "amount", min_value, max_value)["id"].tolist() == expected
+    assert search.linear_search_records(df.iloc[0:0], "walmart").empty
+
 def test_pattern_search_records_found():
     """Test pattern search with a matching regex pattern."""
     results = search.pattern_search_records(SAMPLE_RECORDS, r"Targ.t", fields=["vendor"])
@@ -155,6 +182,21 @@ def test_sort_records_mergesort_vendor_desc():
     ]
     assert [v.lower() for v in vendors] == [v.lower() for v in expected_order] # Compare lowercased
 
+def test_sort_records_dataframe_matches_records():
+    """Test that DataFrame input is sorted in the same order as the list-of-dicts path, ties included."""
+    df = pd.DataFrame(SAMPLE_RECORDS)
+    for sort_key in ("amount", "vendor", "date"):
+        for reverse in (False, True):
+            expected = [r["id"] for r in sort.sort_records(SAMPLE_RECORDS, sort_key, reverse=reverse)]
+            assert sort.sort_records(df, sort_key, reverse=reverse)["id"].tolist() == expected
+    assert sort.sort_records(df, "missing_key") is df # Unknown columns leave the frame unchanged
+
+def test_sort_records_custom_normalize():
+    """Test sorting with a custom key normalizer applied once per record."""
+    sorted_records = sort.sort_records(SAMPLE_RECORDS, "vendor", normalize=lambda v: len(v))
+    lengths = [len(r["vendor"]) for r in sorted_records]
+    assert lengths == sorted(lengths)
+
 def test_sort_records_empty_list():
     """Test sorting an empty list."""
     results = sort.sort_records([], "amount")
@@ -167,4 +209,30 @@ def test_sort_records_invalid_key():
     sorted_records = sort.sort_records(SAMPLE_RECORDS, "non_existent_key", algorithm="timsort")
     assert len(sorted_records) == len(SAMPLE_RECORDS) # Should not error, just sort based on default value or type error
     # Assert specific behavior if you want to test how it handles missing keys
-    # E.g., if it puts None/missing keys first or last.
\ No newline at end of file
+    # E.g., if it puts None/missing keys first or last.
+
+# --- arrow_backend.py tests ---
+
+@pytest.fixture(scope="module")
+def sample_table():
+    """Arrow table of SAMPLE_RECORDS (skipped when pyarrow is not installed)."""
+    pytest.importorskip("pyarrow")
+    return arrow_backend.records_to_table(SAMPLE_RECORDS)
+
+def test_linear_search_records_arrow_matches_python(sample_table):
+    """Test Arrow-backed linear search returns the same records as the Python path."""
+    for query, fields, case_sensitive in [("walmart", ["vendor"], False), ("Target", ["vendor"], True), ("2023-02", None, False), ("walmart", [], False)]:
+        expected = search.linear_search_records(SAMPLE_RECORDS, query, fields, case_sensitive)
+        assert search.linear_search_records(SAMPLE_RECORDS, query, fields, case_sensitive, table=sample_table) == expected
+
+def test_range_search_records_arrow_matches_python(sample_table):
+    """Test Arrow-backed range search returns the same records as the Python path."""
+    results = search.range_search_records(SAMPLE_RECORDS, "amount", min_value=50, max_value=100, table=sample_table)
+    assert {r["id"] for r in results} == {2, 5}
+
+def test_sort_records_arrow_matches_python(sample_table):
+    """Test Arrow-backed sort gives the same order as the Python path."""
+    for key in ["amount", "vendor", "date"]:
+        for reverse in [False, True]:
+            expected = sort.sort_records(SAMPLE_RECORDS, key, reverse=reverse)
+            assert sort.sort_records(SAMPLE_RECORDS, key, reverse=reverse, table=sample_table) == expected
@@ -4,17 +4,22 @@ from processing.validation import ParsedReceiptData
 from utils.errors import FileProcessingError, ParsingError
 from datetime import date
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 import io
 import os
 import shutil
+import sys
+import time
+import numpy as np
+import pytesseract
 import PyPDF2 # Import for mocking later
 
 # Helper fixture for temporary directory
 @pytest.fixture(scope="module")
-def temp_processing_dir():
+def temp_processing_dir(tmp_path_factory):
     """Creates a temporary directory for processing tests and cleans up."""
-    test_dir = Path("data_test_processing")
+    test_dir = tmp_path_factory.mktemp("data_test_processing") # Unique per run and per xdist worker
     raw_receipts_dir = test_dir / "raw_receipts"
     raw_receipts_dir.mkdir(parents=True, exist_ok=True)
     yield raw_receipts_dir
@@ -23,6 +28,11 @@ def temp_processing_dir():
 
 # --- ocr_utils.py tests ---
 
+@pytest.fixture(autouse=True)
+def clear_ocr_cache():
+    """Each test starts with empty OCR memoization caches."""
+    ocr_utils.clear_cache()
+
 # Mock pytesseract for unit tests
 @pytest.fixture
 def mock_pytesseract():
@@ -40,9 +50,9 @@ def mock_cv2():
          patch('cv2.getRotationMatrix2D') as mock_getRotationMatrix2D, \
          patch('cv2.warpAffine') as mock_warpAffine:
         # Configure mocks to return dummy numpy arrays or expected types
-        mock_imdecode.return_value = MagicMock(shape=(100, 100, 3)) # Mock a simple image
-        mock_cvtColor.return_value = MagicMock(shape=(100, 100)) # Mock grayscale
-        mock_adaptiveThreshold.return_value = MagicMock(shape=(100, 100)) # Mock thresholded
+        mock_imdecode.return_value = np.zeros((100, 100, 3), dtype=np.uint8) # Mock a simple image
+        mock_cvtColor.return_value = np.zeros((100, 100), dtype=np.uint8) # Mock grayscale
+        mock_adaptiveThreshold.return_value = np.zeros((100, 100), dtype=np.uint8) # Mock thresholded
         mock_minAreaRect.return_value = (None, None, -46) # Mock angle for deskew
         mock_getRotationMatrix2D.return_value = np.eye(2) # Simple 2x2 identity matrix
         mock_warpAffine.return_value = MagicMock(shape=(100, 100)) # Mock deskewed image
@@ -73,6 +83,15 @@ def test_extract_text_from_image_tesseract_not_found(mock_pytesseract, mock_cv2)
     text = ocr_utils.extract_text_from_image(dummy_image_bytes)
     assert text is None
 
+def test_extract_text_from_image_cached(mock_pytesseract, mock_cv2):
+    """Test repeated OCR of identical image bytes is served from the cache."""
+    mock_to_string, _ = mock_pytesseract
+    mock_to_string.return_value = "Extracted Text Content"
+    dummy_image_bytes = b"dummy_image_data"
+    assert ocr_utils.extract_text_from_image(dummy_image_bytes) == "Extracted Text Content"
+    assert ocr_utils.extract_text_from_image(dummy_image_bytes) == "Extracted Text Content"
+    assert mock_to_string.call_count == 1
+
 def test_detect_language_success(mock_pytesseract, mock_cv2):
     """Test successful language detection."""
     _, mock_to_osd = mock_pytesseract
@@ -187,6 +206,46 @@ def test_parse_document_no_meaningful_text_raises_error(mock_parsing_dependencie
     with pytest.raises(ParsingError, match="No meaningful text extracted"):
         parsing.parse_document(file_path, "empty_text.txt")
 
+@pytest.fixture
+def frequent_thread_switches():
+    """Makes threads switch far more often than usual, so races on shared state are more likely to show up."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+def test_parse_document_duplicates_concurrently(temp_processing_dir, monkeypatch):
+    """Test that parsing duplicate files from many threads at once never trips over the shared caches."""
+    class SlowEvictionDict(dict):
+        def pop(self, *args):
+            time.sleep(0.001) # Widens the window between picking the oldest key and removing it
+            return super().pop(*args)
+
+    monkeypatch.setattr(parsing, "PARSED_CACHE_SIZE", 2) # Force constant eviction
+    monkeypatch.setattr(parsing, "_parsed_cache", SlowEvictionDict())
+    paths = []
+    for i in range(6):
+        file_path = temp_processing_dir / f"concurrent_{i}.txt"
+        file_path.write_text(f"Vendor: Shop{i % 3}\nDate: 2023-01-0{i % 3 + 1}\nTotal: $1{i % 3}.00\n")
+        paths.append(file_path)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda n: parsing.parse_document(paths[n % 6], paths[n % 6].name), range(120)))
+
+    for n, parsed in enumerate(results):
+        assert parsed.vendor_name == f"Shop{n % 3}"
+        assert parsed.amount == float(f"1{n % 3}")
+
+def test_content_memoize_concurrent_eviction(frequent_thread_switches):
+    """Test that a memoized OCR function stays consistent when threads hit and evict entries at once."""
+    @ocr_utils.content_memoize(maxsize=2)
+    def echo(image_bytes):
+        return image_bytes.decode()
+
+    inputs = [f"image-{n % 5}".encode() for n in range(2000)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(echo, inputs)) == [b.decode() for b in inputs]
+
 def test_extract_from_text_missing_data():
     """Test _extract_from_text with text missing key fields."""
     text = "Just some random text without expected patterns."
@@ -228,6 +287,14 @@ def test_extract_from_text_category_detection():
     extracted_utility = parsing._extract_from_text(text_utility)
     assert extracted_utility['category_name'] == 'Utilities'
 
+def test_extract_from_text_date_on_keyword_line_preferred():
+    """Test that a date on a keyword line wins over an earlier date, even with words between keyword and date."""
+    text = "STORE\nMember since 01/02/2019\nDate/Time: 05/03/2023 14:33\nTotal: 12.00\n"
+    assert parsing._extract_from_text(text, "text")['transaction_date'] == date(2023, 3, 5)
+
+    text_local = "STORE\nPrinted 2019-01-02\nTransaction Date (local) 2023-05-03\nTotal: 12.00\n"
+    assert parsing._extract_from_text(text_local, "text")['transaction_date'] == date(2023, 5, 3)
+
 def test_extract_from_text_billing_period():
     """Test _extract_from_text with billing period detection."""
     text = "Billing period: 01-01-2023 to 31-01-2023. Amount: 100."
@@ -11,9 +11,9 @@ import shutil
 # Fixtures for mock_uploaded_file are in conftest.py
 
 @pytest.fixture(scope="module")
-def temp_data_dir():
+def temp_data_dir(tmp_path_factory):
     """Creates a temporary data directory for ingestion tests and cleans up."""
-    test_dir = Path("data_test_ingestion")
+    test_dir = tmp_path_factory.mktemp("data_test_ingestion") # Unique per run and per xdist worker
     raw_receipts_dir = test_dir / "raw_receipts"
     raw_receipts_dir.mkdir(parents=True, exist_ok=True)
     ingestion.RAW_RECEIPTS_DIR = raw_receipts_dir # Temporarily redirect ingestion path
@@ -36,6 +36,27 @@ def test_verify_password_invalid_hash():
     invalid_hash = "thisisnotavalidhashformat"
     assert security.verify_password(password, invalid_hash) is False
 
+def test_verify_password_async_matches_sync():
+    """Test that verify_password_async gives the same results as verify_password."""
+    import asyncio
+    hashed_pw = security.hash_password("CorrectHorseBatteryStaple")
+    assert asyncio.run(security.verify_password_async("CorrectHorseBatteryStaple", hashed_pw)) is True
+    assert asyncio.run(security.verify_password_async("WrongPassword", hashed_pw)) is False
+
+def test_needs_rehash_current_cost():
+    """Test a hash made with the configured cost does not need re-hashing."""
+    assert security.needs_rehash(security.hash_password("SomePassword1!")) is False
+
+def test_needs_rehash_different_cost():
+    """Test a hash made with another cost is flagged for re-hashing."""
+    other_rounds = security.BCRYPT_ROUNDS + 1
+    old_hash = security.bcrypt.using(rounds=other_rounds).hash("SomePassword1!")
+    assert security.needs_rehash(old_hash) is True
+
+def test_needs_rehash_invalid_hash():
+    """Test an unparseable hash is not flagged."""
+    assert security.needs_rehash("invalid_hash") is False
+
 def test_validate_password_strength_valid():
     """Test a password that meets all strength criteria."""
     valid_password = "MyStrongP@ssw0rd1"
@@ -67,4 +88,11 @@ def test_validate_password_strength_empty_string():
 
 def test_validate_password_strength_none_input():
     """Test password strength: None input."""
-    assert security.validate_password_strength(None) is False
\ No newline at end of file
+    assert security.validate_password_strength(None) is False
+
+def test_validate_password_strength_batch_matches_single():
+    """Test that the batch validator agrees with validate_password_strength for each password."""
+    passwords = ["StrongP@ss1", "weak", "NoDigitPass!", "NoSpecialChar1", "no_upper1!", "NO_LOWER1!",
+                 "Spaces 1A only", "Tab\tSep1a!", "Ünïcødé1!Aa", "", None, "Sh0rt!A"]
+    expected = [security.validate_password_strength(p) for p in passwords]
+    assert security.validate_password_strength_batch(passwords).tolist() == expected
@@ -6,9 +6,20 @@ from database import crud
 from utils import security
 from utils.errors import AuthenticationError
 from database.database import get_db # To be mocked
+from conftest import StopExecution
 
 # Mock db_session from conftest.py implicitly patches get_db()
 
+@pytest.fixture(autouse=True)
+def fast_hash(monkeypatch):
+    """Replaces bcrypt with a trivial reversible hasher; these tests cover the UI flow, not the KDF."""
+    fake_hash = lambda password: f"fake${password}"
+    fake_verify = lambda password, hashed_password: hashed_password == f"fake${password}"
+    monkeypatch.setattr(security, "hash_password", fake_hash)
+    monkeypatch.setattr(security, "verify_password", fake_verify)
+    monkeypatch.setattr(auth_manager, "verify_password", fake_verify) # Imported by name in auth_manager
+    monkeypatch.setattr(auth_manager, "needs_rehash", lambda hashed_password: False)
+
 
 def test_auth_manager_initial_state(mock_streamlit):
     """Test the initial state of AuthManager."""
@@ -84,7 +95,8 @@ def test_auth_manager_logout(mock_streamlit):
 def test_auth_manager_require_login_redirects_if_not_logged_in(mock_streamlit):
     """Test require_login stops execution if user is not logged in."""
     am = auth_manager.AuthManager() # Default not logged in
-    am.require_login()
+    with pytest.raises(StopExecution):
+        am.require_login()
     mock_streamlit.warning.assert_called_once_with("Please log in to access this page.")
     mock_streamlit.stop.assert_called_once() # Should stop Streamlit execution
 
@@ -1,52 +1,71 @@
 import streamlit as st
-from database.crud import get_user_by_username
-from database.database import get_db
-from utils.security import verify_password
+import logging
+import threading
+from utils.security import hash_password, needs_rehash, verify_password
+
+logger = logging.getLogger(__name__)
+
+# Logged-out session state; also what logout and a failed login reset to
+_SESSION_DEFAULTS = {"logged_in": False, "username": None, "user_id": None}
+
+def _rehash_password(user_id, password):
+    """
+    Re-hashes a password with the current scheme and cost and stores it.
+    Runs in a background thread so the login itself is not slowed down by the extra hash.
+    """
+    from database.crud import update_password_hash
+    from database.database import db_session
+    try:
+        new_hash = hash_password(password)
+        with db_session() as db:
+            update_password_hash(db, user_id, new_hash)
+    except Exception as e:
+        logger.error(f"Background password rehash failed for user ID {user_id}: {e}")
 
 class AuthManager:
     def __init__(self):
-        if "logged_in" not in st.session_state:
-            st.session_state.logged_in = False
-        if "username" not in st.session_state:
-            st.session_state.username = None
-        if "user_id" not in st.session_state:
-            st.session_state.user_id = None
+        # Keep one reference to the session state and use item access, which skips the
+        # proxy's attribute-to-key translation on every accessor call
+        self._ss = st.session_state
+        for key, value in _SESSION_DEFAULTS.items():
+            self._ss.setdefault(key, value)
 
     def login(self, username, password):
-        db_gen = get_db()
-        db = next(db_gen) # Get the session
-        user = get_user_by_username(db, username)
-        db.close() # Close the session
+        # Deferred so importing this module (every page does) doesn't pull in SQLAlchemy and the models
+        from database.crud import get_user_by_username
+        from database.database import db_session
+        with db_session() as db: # Closed as soon as the lookup is done
+            user = get_user_by_username(db, username)
 
+        ss = self._ss
         if user and verify_password(password, user.password_hash):
-            st.session_state.logged_in = True
-            st.session_state.username = user.username
-            st.session_state.user_id = user.id
+            ss["logged_in"] = True
+            ss["username"] = user.username
+            ss["user_id"] = user.id
+            if needs_rehash(user.password_hash):
+                threading.Thread(target=_rehash_password, args=(user.id, password), daemon=True).start()
             st.success(f"Welcome, {user.username}!")
             return True
         else:
             st.error("Invalid username or password.")
-            st.session_state.logged_in = False
-            st.session_state.username = None
-            st.session_state.user_id = None
+            ss.update(_SESSION_DEFAULTS)
             return False
 
     def logout(self):
-        st.session_state.logged_in = False
-        st.session_state.username = None
-        st.session_state.user_id = None
+        self._ss.update(_SESSION_DEFAULTS)
         st.info("You have been logged out.")
 
     def is_logged_in(self):
-        return st.session_state.logged_in
+        return self._ss["logged_in"]
 
     def get_current_username(self):
-        return st.session_state.username
+        return self._ss["username"]
 
     def get_current_user_id(self):
-        return st.session_state.user_id
+        return self._ss["user_id"]
 
     def require_login(self):
-        if not self.is_logged_in():
-            st.warning("Please log in to access this page.")
-            st.stop() # Stops execution of the rest of the page
\ No newline at end of file
+        if self._ss["logged_in"]:
+            return # Common case: read the flag directly, without the is_logged_in() call
+        st.warning("Please log in to access this page.")
+        st.stop() # Stops execution of the rest of the page
\ No newline at end of file
@@ -1,7 +1,34 @@
 import streamlit as st
 import pandas as pd
 from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from pathlib import Path
 from datetime import date, datetime # Already imported, good!
+from PIL import Image
+import io
+
+# Pixel widths static images are scaled down to (about twice their displayed width, for high-DPI screens)
+SIDEBAR_IMAGE_WIDTH = 600
+CONTENT_IMAGE_WIDTH = 1400
+
+def _looks_like_date(series: pd.Series) -> bool:
+    """
+    Cheap pre-check on the first non-null value, so text columns (vendors, notes) skip the
+    element-by-element date parsing that pd.to_datetime falls back to for free-form strings.
+    """
+    first_index = series.first_valid_index()
+    if first_index is None:
+        return False
+    first = series.loc[first_index]
+    if isinstance(first, (date, datetime, pd.Timestamp)):
+        return True
+    if isinstance(first, str):
+        try:
+            pd.to_datetime(first)
+            return True
+        except (ValueError, OverflowError):
+            return False
+    return False
 
 def display_records_table(df: pd.DataFrame, key: str = "records_table"):
     """
@@ -15,59 +42,90 @@ def display_records_table(df: pd.DataFrame, key: str = "records_table"):
         st.info("No records to display.")
         return
 
-    # Convert date/datetime objects to strings for consistent display in st.dataframe editing
-    df_display = df.copy()
-    for col in df_display.columns:
-        if pd.api.types.is_datetime64_any_dtype(df_display[col]):
-            df_display[col] = df_display[col].dt.strftime('%Y-%m-%d')
-        elif pd.api.types.is_object_dtype(df_display[col]) and not df_display[col].dropna().empty:
-            temp_series = pd.to_datetime(df_display[col], errors='coerce')
-            
-            if pd.api.types.is_datetime64_any_dtype(temp_series) and \
-               temp_series.dropna().apply(lambda x: isinstance(x.to_pydatetime().date(), (date, datetime))).all():
-                df_display[col] = temp_series.dt.strftime('%Y-%m-%d').fillna('') # Fill NaN dates with empty string
-            elif all(isinstance(x, date) for x in df_display[col].dropna()): # Specifically for pure Python date objects
-                df_display[col] = df_display[col].apply(lambda x: x.strftime('%Y-%m-%d') if isinstance(x, date) else x)
+    # Convert date/datetime objects to strings for consistent display in st.dataframe editing.
+    # Only the rewritten columns are new; the others are shared with `df` instead of copying the frame.
+    new_columns = {}
+    column_config = {}
+    # Group the columns by dtype once instead of testing each column's dtype in turn
+    for col, series in df.select_dtypes(include=["datetime", "datetimetz"]).items():
+        new_columns[col] = series.dt.strftime('%Y-%m-%d')
+    for col, series in df.select_dtypes(include=["object"]).items():
+        if _looks_like_date(series):
+            temp_series = pd.to_datetime(series, errors='coerce') # One vectorized conversion
+            # Only reformat when every non-empty value is a date, so text columns are never blanked
+            if temp_series.notna().sum() == series.notna().sum():
+                new_columns[col] = temp_series.dt.strftime('%Y-%m-%d').fillna('') # Fill NaN dates with empty string
+    for col in df.select_dtypes(include=["integer"]).columns: # Ensure integers are not float in editing
+        # Formatted client-side by Streamlit; no per-cell Python strings are built
+        column_config[col] = st.column_config.NumberColumn(format="%d")
 
-        elif pd.api.types.is_integer_dtype(df_display[col]): # Ensure integers are not float in editing
-             df_display[col] = df_display[col].astype(str)
+    if not new_columns:
+        df_display = df
+    elif df.columns.is_unique:
+        df_display = pd.DataFrame({col: new_columns.get(col, series) for col, series in df.items()}, copy=False)
+    else:
+        df_display = df.assign(**new_columns)
 
     st.dataframe(
         df_display,
         use_container_width=True,
         hide_index=True,
+        column_config=column_config or None,
         key=key,
     )
     st.caption(f"Displaying {len(df)} records.")
 
+@lru_cache(maxsize=8)
+def load_image_bytes(image_path: str, max_width: Optional[int] = None) -> bytes:
+    """
+    Reads a static image (logo, illustrations) once per process; later reruns reuse the bytes instead of re-reading the file.
+    A missing file raises FileNotFoundError and is not cached, so it is picked up once it exists.
+
+    :param image_path: Path to the image file.
+    :param max_width: If given, wider images are scaled down to this width (aspect ratio kept) once,
+                      so the browser isn't sent a full-size asset that is displayed much smaller.
+    :return: The (possibly downscaled) image bytes.
+    """
+    data = Path(image_path).read_bytes()
+    if max_width is None:
+        return data
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width <= max_width:
+            return data
+        image.thumbnail((max_width, image.height), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format=image.format or "PNG", optimize=True)
+    return output.getvalue()
+
 def create_sidebar_logo(logo_path: str = "assets/images/logo.png"):
     """
     Displays the application logo in the sidebar.
     :param logo_path: Path to the logo image file.
     """
     try:
-        st.sidebar.image(logo_path, use_column_width=True)
+        st.sidebar.image(load_image_bytes(logo_path, max_width=SIDEBAR_IMAGE_WIDTH), use_column_width=True)
     except FileNotFoundError:
         st.sidebar.warning("Logo file not found. Please check path: " + logo_path)
     except Exception as e:
         st.sidebar.error(f"Error loading logo: {e}")
 
+def navigate_to(page: str, nav_key: str = "main_nav_radio"):
+    """
+    on_click callback for navigation buttons. Callbacks run before the rerun the click triggers, when the
+    sidebar radio's value may still be changed, so that same rerun already renders the target page;
+    no extra st.rerun() (and second pass over the current page) is needed.
+
+    :param page: The navigation option to select.
+    :param nav_key: Widget key of the sidebar radio ("main_nav_radio" or "auth_nav_radio").
+    """
+    st.session_state[nav_key] = page
+    if nav_key == "main_nav_radio":
+        st.session_state["current_main_page"] = page # app.py's remembered page for the main navigation
 
 def display_info_card(title: str, value: Any, icon: str = ""):
     """
-    Displays a stylized info card with a title, value, and optional icon.
+    Displays an info card with a title, value, and optional icon.
+    Uses Streamlit's native metric widget, so no HTML has to be built and streamed on every rerun.
     """
-    st.markdown(f"""
-    <div style="
-        border: 1px solid #ddd;
-        border-radius: 8px;
-        padding: 15px;
-        margin-bottom: 10px;
-        background-color: #f9f9f9;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        text-align: center;
-    ">
-        <h3 style="color: #4CAF50; margin-bottom: 5px;">{icon} {title}</h3>
-        <p style="font-size: 2em; font-weight: bold; color: #303030;">{value}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    label = f"{icon} {title}" if icon else title
+    st.metric(label=label, value=value)
@@ -4,9 +4,10 @@ from ui.auth_manager import AuthManager
 def show_login_page(auth_manager: AuthManager):
     st.title("Login")
 
-    with st.form("login_form"):
-        username = st.text_input("Username")
-        password = st.text_input("Password", type="password")
+    # Inputs are only sent on submit; clearing afterwards keeps the password out of session state
+    with st.form("login_form", clear_on_submit=True):
+        username = st.text_input("Username", key="login_username")
+        password = st.text_input("Password", type="password", key="login_password")
         submit_button = st.form_submit_button("Login")
 
         if submit_button:
@@ -1,46 +1,44 @@
 import streamlit as st
 from database.crud import create_user, get_user_by_username
-from database.database import get_db
+from database.database import db_session
 from utils.security import validate_password_strength # Assuming this function exists
 
 def show_signup_page(auth_manager):
     st.title("Sign Up")
 
     with st.form("signup_form"):
-        username = st.text_input("Choose Username")
-        email = st.text_input("Email (Optional)")
-        password = st.text_input("Choose Password", type="password")
-        confirm_password = st.text_input("Confirm Password", type="password")
+        username = st.text_input("Choose Username", key="signup_username")
+        email = st.text_input("Email (Optional)", key="signup_email")
+        password = st.text_input("Choose Password", type="password", key="signup_password")
+        confirm_password = st.text_input("Confirm Password", type="password", key="signup_confirm_password")
         submit_button = st.form_submit_button("Sign Up")
 
         if submit_button:
+            # Run every cheap check in one pass and report all problems together, so a
+            # failed submission costs one rerun instead of one per mistake
+            errors = []
             if not username or not password or not confirm_password:
-                st.error("Username and Password are required.")
+                errors.append("Username and Password are required.")
+            else:
+                if password != confirm_password:
+                    errors.append("Passwords do not match.")
+                # Basic password strength validation
+                if not validate_password_strength(password):
+                    errors.append("Password must be at least 8 characters long, include an uppercase letter, a lowercase letter, a number, and a special character.")
+            if errors:
+                st.error("\n\n".join(errors))
                 return
 
-            if password != confirm_password:
-                st.error("Passwords do not match.")
-                return
-
-            # Basic password strength validation
-            if not validate_password_strength(password):
-                st.error("Password must be at least 8 characters long, include an uppercase letter, a lowercase letter, a number, and a special character.")
-                return
-
-            db_gen = get_db()
-            db = next(db_gen)
-            if get_user_by_username(db, username):
-                st.error("Username already exists. Please choose a different one.")
-                db.close()
-                return
+            with db_session() as db: # Closed on every path, including the early return
+                if get_user_by_username(db, username):
+                    st.error("Username already exists. Please choose a different one.")
+                    return
 
-            try:
-                new_user = create_user(db, username, password, email)
-                st.success(f"Account created successfully for {new_user.username}! Please login.")
-                # Automatically log in the user after signup, or redirect to login page
-                # auth_manager.login(username, password)
-                # st.rerun()
-            except Exception as e:
-                st.error(f"An error occurred during signup: {e}")
-            finally:
-                db.close()
\ No newline at end of file
+                try:
+                    new_user = create_user(db, username, password, email)
+                    st.success(f"Account created successfully for {new_user.username}! Please login.")
+                    # Automatically log in the user after signup, or redirect to login page
+                    # auth_manager.login(username, password)
+                    # st.rerun()
+                except Exception as e:
+                    st.error(f"An error occurred during signup: {e}")
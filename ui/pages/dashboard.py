@@ -1,17 +1,128 @@
 import streamlit as st
 import pandas as pd
 from ui.auth_manager import AuthManager
-from database.crud import get_receipts_by_user, get_all_vendors, get_all_categories
-from database.database import get_db
-from processing.aggregation import calculate_expenditure_summary, get_vendor_frequency, get_monthly_spend_trend
+from database.crud import receipts_with_names_query, get_receipts_cache_token, get_category_spend, get_vendor_frequency_sql
+from database.database import db_session
+from processing.aggregation import calculate_expenditure_summary, get_monthly_spend_totals, add_rolling_average
 from ui.plots import plot_pie_chart, plot_bar_chart, plot_line_chart
-from ui.components import display_info_card
+from ui.components import display_info_card, navigate_to
 from datetime import date
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+DASHBOARD_CACHE_TTL = 300 # Seconds a user's receipts DataFrame is reused across reruns
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def _load_user_receipts_df(user_id: int, cache_token: str) -> pd.DataFrame:
+    """
+    Loads a user's receipts into a DataFrame with vendor and category names resolved.
+    Cached per (user_id, cache_token), so widget interactions on the dashboard reuse the frame
+    instead of re-reading and re-hydrating every receipt from the database.
+
+    :param user_id: The ID of the user.
+    :param cache_token: Token from `get_receipts_cache_token`; a new token means the data changed.
+    :return: DataFrame of the user's receipts (empty if there are none), with datetime64 transaction dates,
+             categorical vendor, category and currency columns, and a downcast integer id column.
+    """
+    with db_session() as db:
+        # pandas reads the joined rows straight from the cursor into typed columns; no ORM objects
+        df = pd.read_sql_query(
+            receipts_with_names_query(user_id),
+            db.connection(),
+            parse_dates=['transaction_date', 'upload_date']
+        )
+    # Few distinct values per column: categorical codes make the cached frame smaller and group/count by integer codes
+    df = df.astype({'vendor_name': 'category', 'category_name': 'category', 'currency': 'category'})
+    # Receipt IDs only need the smallest integer type that holds them. Amounts stay float64: totals are
+    # summed from them and float32 runs out of cent precision past ~7 significant digits.
+    df['id'] = pd.to_numeric(df['id'], downcast='integer')
+    return df
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def _load_dashboard_aggregates(user_id: int, cache_token: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Runs the vendor and category aggregations in SQL (GROUP BY), so only one row per group is read.
+    Cached like `_load_user_receipts_df`.
+
+    :param user_id: The ID of the user.
+    :param cache_token: Token from `get_receipts_cache_token`.
+    :return: (top 10 vendors by receipt count, spend per category) DataFrames.
+    """
+    with db_session() as db:
+        vendor_freq_df = pd.DataFrame(get_vendor_frequency_sql(db, user_id, limit=10), columns=['vendor_name', 'count'])
+        category_spend_df = pd.DataFrame(get_category_spend(db, user_id), columns=['category_name', 'amount'])
+    return vendor_freq_df, category_spend_df
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def _build_breakdown_figures(user_id: int, cache_token: str) -> tuple:
+    """
+    Builds the vendor bar and category pie figures. They don't depend on any dashboard widget, so they
+    are cached per data version and not rebuilt when e.g. the rolling window slider moves.
+
+    :param user_id: The ID of the user.
+    :param cache_token: Token from `get_receipts_cache_token`.
+    :return: (vendor figure, category figure); either is None when there is no data for it.
+    """
+    vendor_freq_df, category_spend_df = _load_dashboard_aggregates(user_id, cache_token) # Grouped in SQL
+    fig_vendor = None
+    if not vendor_freq_df.empty:
+        fig_vendor = plot_bar_chart(vendor_freq_df, 'vendor_name', 'count', 'Spending Distribution by Vendor',
+                                    hover_data=['count'])
+    fig_category = None
+    if not category_spend_df.empty:
+        fig_category = plot_pie_chart(category_spend_df, 'category_name', 'amount', 'Spending Distribution by Category',
+                                      hover_data=['amount'])
+    return fig_vendor, fig_category
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def _load_monthly_totals(user_id: int, cache_token: str) -> pd.DataFrame:
+    """
+    Per-month spend totals, bucketed once per data version and shared by every rolling window setting.
+
+    :param user_id: The ID of the user.
+    :param cache_token: Token from `get_receipts_cache_token`.
+    :return: DataFrame with 'month' and 'total_amount' columns (empty if there is no valid data).
+    """
+    return get_monthly_spend_totals(_load_user_receipts_df(user_id, cache_token), 'transaction_date', 'amount')
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def _build_monthly_trend_figure(user_id: int, cache_token: str, rolling_window: int):
+    """
+    Builds the monthly trend figure; cached per data version and rolling window.
+    Only the rolling average is computed here; the monthly totals come from `_load_monthly_totals`.
+
+    :param user_id: The ID of the user.
+    :param cache_token: Token from `get_receipts_cache_token`.
+    :param rolling_window: Rolling average window in months.
+    :return: The figure, or None when there is no trend data.
+    """
+    monthly_totals = _load_monthly_totals(user_id, cache_token)
+    if monthly_totals.empty:
+        return None
+    monthly_trend_df = add_rolling_average(monthly_totals, rolling_window)
+    return plot_line_chart(monthly_trend_df, 'month', 'total_amount', 'Monthly Expenditure Trend',
+                           y_secondary_col='rolling_avg',
+                           hover_data={'total_amount': ':.2f', 'rolling_avg': ':.2f'}) # Format hover
+
+@st.fragment
+def _monthly_trend_fragment(user_id: int, cache_token: str):
+    """
+    Monthly trend section with its rolling window slider. As a fragment, moving the slider reruns
+    only this function instead of the whole dashboard page.
+    """
+    st.subheader("Monthly Spending Trend")
+    # Define a rolling window for monthly trend (e.g., 3 months)
+    rolling_window_option = st.slider("Select Rolling Average Window (Months)", min_value=1, max_value=6, value=3, step=1,
+                                     help="Calculate the average spend over the selected number of past months.")
+
+    fig_monthly_trend = _build_monthly_trend_figure(user_id, cache_token, rolling_window_option)
+    if fig_monthly_trend is not None:
+        st.plotly_chart(fig_monthly_trend, use_container_width=True)
+    else:
+        st.info("No monthly trend data to display.")
+
 def show_dashboard_page():
     auth_manager = AuthManager()
     auth_manager.require_login() # Ensure user is logged in
@@ -22,37 +133,16 @@ def show_dashboard_page():
     st.title(f"📊 Dashboard - {username}'s Spending Insights")
     st.markdown("Explore your financial trends and summaries.")
 
-    db_gen = get_db()
-    db = next(db_gen)
-    receipts_db_objects = get_receipts_by_user(db, user_id, limit=None) # Get all receipts for dashboard
-    vendors_map = {v.id: v.name for v in get_all_vendors(db)}
-    categories_map = {c.id: c.name for c in get_all_categories(db)}
-    db.close()
+    with db_session() as db:
+        cache_token = get_receipts_cache_token(db, user_id) # One aggregate query; the full load is cached
+    df = _load_user_receipts_df(user_id, cache_token)
 
-    if not receipts_db_objects:
+    if df.empty:
         st.info("No receipts uploaded yet. Please upload some to see insights!")
         st.subheader("How to get started?")
         st.markdown("Navigate to the **'Upload Receipt'** page from the sidebar and start digitizing your expenses!")
         return
 
-    # Convert SQLAlchemy objects to pandas DataFrame for easier processing
-    receipt_dicts = []
-    for r in receipts_db_objects:
-        receipt_dicts.append({
-            "id": r.id,
-            "vendor_name": vendors_map.get(r.vendor_id, "Unknown Vendor"),
-            "transaction_date": r.transaction_date,
-            "amount": r.amount,
-            "currency": r.currency,
-            "category_name": categories_map.get(r.category_id, "Uncategorized"),
-            "original_filename": r.original_filename,
-            "upload_date": r.upload_date
-        })
-    df = pd.DataFrame(receipt_dicts)
-
-    # Convert transaction_date to datetime for time-series analysis if it's not already
-    df['transaction_date'] = pd.to_datetime(df['transaction_date'])
-
     # --- Summary Statistics ---
     st.header("Overall Spending Summary")
     total_spend, mean_spend, median_spend, mode_spend = calculate_expenditure_summary(df, 'amount')
@@ -70,45 +160,26 @@ def show_dashboard_page():
     # --- Visualizations ---
     st.header("Detailed Spending Visualizations")
 
+    fig_vendor, fig_category = _build_breakdown_figures(user_id, cache_token)
+
     # Vendor Frequency
     st.subheader("Top 10 Vendors")
-    vendor_freq_df = get_vendor_frequency(df).head(10) # Show top 10
-    if not vendor_freq_df.empty:
-        fig_vendor = plot_bar_chart(vendor_freq_df, 'vendor_name', 'count', 'Spending Distribution by Vendor',
-                                    hover_data=['count'])
+    if fig_vendor is not None:
         st.plotly_chart(fig_vendor, use_container_width=True)
     else:
         st.info("No vendor data to display.")
 
     # Category Distribution
     st.subheader("Spending by Category")
-    category_spend_df = df.groupby('category_name')['amount'].sum().reset_index().sort_values(by='amount', ascending=False)
-    if not category_spend_df.empty:
-        fig_category = plot_pie_chart(category_spend_df, 'category_name', 'amount', 'Spending Distribution by Category',
-                                      hover_data=['amount'])
+    if fig_category is not None:
         st.plotly_chart(fig_category, use_container_width=True)
     else:
         st.info("No category data to display.")
 
     # Monthly Spend Trend with Rolling Average
-    st.subheader("Monthly Spending Trend")
-    # Define a rolling window for monthly trend (e.g., 3 months)
-    rolling_window_option = st.slider("Select Rolling Average Window (Months)", min_value=1, max_value=6, value=3, step=1,
-                                     help="Calculate the average spend over the selected number of past months.")
-
-    monthly_trend_df = get_monthly_spend_trend(df, 'transaction_date', 'amount', rolling_window=rolling_window_option)
-    if not monthly_trend_df.empty:
-        fig_monthly_trend = plot_line_chart(monthly_trend_df, 'month', 'total_amount', 'Monthly Expenditure Trend',
-                                            y_secondary_col='rolling_avg' if 'rolling_avg' in monthly_trend_df.columns else None,
-                                            hover_data={'total_amount': ':.2f', 'rolling_avg': ':.2f'}) # Format hover
-        st.plotly_chart(fig_monthly_trend, use_container_width=True)
-    else:
-        st.info("No monthly trend data to display.")
+    _monthly_trend_fragment(user_id, cache_token)
 
     st.header("Raw Data View")
     st.markdown("<p style='font-family: \"Roboto\", sans-serif;'>For a detailed look at your transactions, navigate to the 'View Records' page.</p>", unsafe_allow_html=True)
-    if st.button("Go to View Records"):
-        # Corrected: Set the session state variable that controls the radio button's *initial value*
-        # in the *next* rerun, then force a rerun.
-        st.session_state["current_main_page"] = "View Records" # This is the variable app.py uses
-        st.rerun()
+    # The callback selects the page before the click's own rerun, so no extra st.rerun() is needed
+    st.button("Go to View Records", on_click=navigate_to, args=("View Records",))
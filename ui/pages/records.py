@@ -1,106 +1,101 @@
 import streamlit as st
 import pandas as pd
 from ui.auth_manager import AuthManager
-from database.crud import get_receipts_by_user, update_receipt, delete_receipt, get_all_vendors, get_all_categories
-from database.database import get_db
-from processing.algorithms.search import linear_search_records, range_search_records, pattern_search_records, HashedIndex
-from processing.algorithms.sort import sort_records
-from ui.components import display_records_table
+from database.crud import (get_receipts_cache_token, get_receipts_filtered, count_receipts_filtered,
+                           get_receipt_amount_bounds, update_receipt, delete_receipt, get_all_categories)
+from database.database import db_session
+from ui.components import display_records_table, navigate_to
 from utils.helpers import convert_df_to_csv, convert_df_to_json
 from datetime import date, datetime
 import logging
+import math
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def show_records_page():
-    auth_manager = AuthManager()
-    auth_manager.require_login()
+RECORDS_CACHE_TTL = 60 # Seconds the records frame and category list are reused across reruns
+RECORDS_PAGE_SIZE = 50 # Rows fetched and shown per page; bounds the table payload sent to the browser
+RECORD_COLUMNS = ["id", "vendor_id", "vendor_name", "transaction_date", "billing_period_start", "billing_period_end",
+                  "amount", "currency", "category_id", "category_name", "original_filename", "parsed_raw_text", "upload_date"]
 
-    user_id = auth_manager.get_current_user_id()
-    st.title("📋 Your Transaction Records")
-    st.markdown("Manage, search, and sort your digitized receipts and bills.")
+@st.cache_data(ttl=RECORDS_CACHE_TTL, show_spinner=False)
+def _load_amount_bounds(user_id: int, cache_token: str) -> tuple:
+    """
+    Smallest and largest amount of the user's receipts, used as the amount filter defaults.
 
-    db_gen = get_db()
-    db = next(db_gen)
-    receipts_db_objects = get_receipts_by_user(db, user_id, limit=None) # Fetch all for current user
+    :param user_id: The ID of the user.
+    :param cache_token: Token from `get_receipts_cache_token`; a new token means the data changed.
+    :return: (min_amount, max_amount), both None if the user has no receipts.
+    """
+    with db_session() as db:
+        return get_receipt_amount_bounds(db, user_id)
 
-    # Get mappings for display
-    vendors_map = {v.id: v.name for v in get_all_vendors(db)}
-    categories_map = {c.id: c.name for c in get_all_categories(db)}
-    db.close()
+@st.cache_data(ttl=RECORDS_CACHE_TTL, show_spinner=False)
+def _count_records(user_id: int, cache_token: str, search_query: str, min_amount: float, max_amount: float) -> int:
+    """
+    Number of receipts matching the sidebar filters, counted in SQL.
 
-    if not receipts_db_objects:
-        st.info("No records found for your account. Start by uploading receipts!")
-        if st.button("Go to Upload Page"):
-            st.session_state["main_nav_radio"] = "Upload Receipt" # Corrected session state key
-            st.rerun()
-        return
+    :return: The number of matching receipts.
+    """
+    with db_session() as db:
+        return count_receipts_filtered(db, user_id, search_query, min_amount, max_amount)
 
-    # Convert SQLAlchemy objects to a list of dicts for easier DataFrame conversion
-    records_list = []
-    for r in receipts_db_objects:
-        records_list.append({
-            "id": r.id,
-            "vendor_id": r.vendor_id, # Keep ID for update, display name
-            "vendor_name": vendors_map.get(r.vendor_id, "Unknown"),
-            "transaction_date": r.transaction_date,
-            "billing_period_start": r.billing_period_start,
-            "billing_period_end": r.billing_period_end,
-            "amount": r.amount,
-            "currency": r.currency,
-            "category_id": r.category_id, # Keep ID for update, display name
-            "category_name": categories_map.get(r.category_id, "Uncategorized"),
-            "original_filename": r.original_filename,
-            "parsed_raw_text": r.parsed_raw_text,
-            "upload_date": r.upload_date
-        })
-
-    df = pd.DataFrame(records_list)
+@st.cache_data(ttl=RECORDS_CACHE_TTL, show_spinner=False)
+def _load_records_df(user_id: int, cache_token: str, search_query: str, min_amount: float, max_amount: float,
+                     sort_key: str, descending: bool, page: int | None) -> pd.DataFrame:
+    """
+    Loads the user's receipts matching the sidebar filters into a DataFrame. Search, range filter, sort and
+    paging all run in SQL, so only the requested rows are read. Cached per data version and filter settings,
+    so form interactions don't re-query.
 
-    # --- Search, Sort, Filter Controls ---
-    st.sidebar.header("Filter & Sort Options")
+    :param user_id: The ID of the user.
+    :param cache_token: Token from `get_receipts_cache_token`; a new token means the data changed.
+    :param search_query: Keyword to match against vendor, category, filename and raw text ('' for none).
+    :param min_amount: Minimum amount (inclusive).
+    :param max_amount: Maximum amount (inclusive).
+    :param sort_key: Column to sort by (see `crud.RECEIPT_SORT_KEYS`).
+    :param descending: True for descending order.
+    :param page: 1-based page of RECORDS_PAGE_SIZE rows, or None for every matching row (export).
+    :return: DataFrame with RECORD_COLUMNS, keeping vendor_id/category_id for updates.
+    """
+    limit, offset = (None, 0) if page is None else (RECORDS_PAGE_SIZE, (page - 1) * RECORDS_PAGE_SIZE)
+    with db_session() as db:
+        rows = get_receipts_filtered(db, user_id, search_query, min_amount, max_amount,
+                                     sort_key=sort_key, desc=descending, limit=limit, offset=offset)
+    return pd.DataFrame.from_records(rows, columns=RECORD_COLUMNS)
 
-    # Search
-    search_query = st.sidebar.text_input("Keyword Search", help="Search across Vendor, Category, and Filename.")
-    if search_query:
-        df = linear_search_records(df.to_dict('records'), search_query,
-                                   fields=["vendor_name", "category_name", "original_filename", "parsed_raw_text"])
-        df = pd.DataFrame(df) # Convert back to DataFrame
-        if df.empty:
-            st.warning("No records match your search query.")
+@st.cache_data(ttl=RECORDS_CACHE_TTL, show_spinner=False)
+def _load_category_names() -> list[str]:
+    """
+    Names of all categories for the edit form's dropdown. Categories are shared by all users.
 
-    # Range Search for Amount
-    st.sidebar.subheader("Amount Range")
-    min_amount = st.sidebar.number_input("Min Amount", value=float(df['amount'].min()) if not df.empty else 0.0, step=0.1)
-    max_amount = st.sidebar.number_input("Max Amount", value=float(df['amount'].max()) if not df.empty else 1000.0, step=0.1)
-    if min_amount != float(df['amount'].min()) or max_amount != float(df['amount'].max()) or (min_amount > 0 or max_amount < 1000.0): # Only filter if values changed from default or specific range applied
-        df = range_search_records(df.to_dict('records'), "amount", min_amount, max_amount)
-        df = pd.DataFrame(df)
-        if df.empty:
-            st.warning("No records match the amount range.")
+    :return: List of category names.
+    """
+    with db_session() as db:
+        return [cat.name for cat in get_all_categories(db)]
 
-    # Sort
-    sort_options = {
-        "Transaction Date": "transaction_date",
-        "Upload Date": "upload_date",
-        "Amount": "amount",
-        "Vendor Name": "vendor_name",
-        "Category Name": "category_name"
-    }
-    selected_sort_key_display = st.sidebar.selectbox("Sort By", list(sort_options.keys()))
-    sort_key = sort_options[selected_sort_key_display]
-    sort_order = st.sidebar.radio("Order", ["Descending", "Ascending"])
-    reverse_sort = (sort_order == "Descending")
-
-    if not df.empty:
-        df = sort_records(df.to_dict('records'), sort_key, reverse_sort, algorithm="timsort")
-        df = pd.DataFrame(df)
+@st.cache_data(ttl=RECORDS_CACHE_TTL, show_spinner=False)
+def _export_files(user_id: int, cache_token: str, search_query: str, min_amount: float, max_amount: float,
+                  sort_key: str, descending: bool) -> tuple[str, str]:
+    """
+    CSV and JSON exports of every record matching the filters (all pages). st.download_button needs the
+    data up front, so the serialized files are cached: reruns that don't change the data or the filters
+    reuse them instead of serializing again.
 
+    :return: Tuple of (csv_data, json_data).
+    """
+    export_df = _load_records_df(user_id, cache_token, search_query, min_amount, max_amount, sort_key, descending, None)
+    return convert_df_to_csv(export_df), convert_df_to_json(export_df)
 
-    st.subheader(f"Total Filtered Records: {len(df)}")
-    display_records_table(df, key="records_display_table")
+@st.fragment
+def _record_editor_fragment(df: pd.DataFrame, user_id: int):
+    """
+    Manual correction and deletion of one record. As a fragment, picking a record or submitting the form
+    reruns only this section; the page (and its data loading) reruns only after a successful update or delete.
 
+    :param df: The records currently shown in the table.
+    :param user_id: The ID of the logged-in user.
+    """
     # --- Manual Correction & Deletion ---
     st.header("Manual Correction & Actions")
     st.info("Select a record's ID below to update its fields or delete it.")
@@ -114,7 +109,8 @@ def show_records_page():
         st.warning("No records available to select for action.")
 
     if selected_record_id:
-        selected_record = df[df['id'] == selected_record_id].iloc[0].to_dict()
+        # Row position straight from the ID list (a C-level scan of one page), no boolean mask over the frame
+        selected_record = df.iloc[record_ids.index(selected_record_id)].to_dict()
 
         st.subheader(f"Editing Record ID: {selected_record_id}")
         with st.form(key=f"edit_record_form_{selected_record_id}"):
@@ -125,11 +121,7 @@ def show_records_page():
             new_currency = st.text_input("Currency", value=selected_record.get("currency", "USD"), key=f"currency_{selected_record_id}")
 
             # Get all available categories for dropdown
-            db_gen_cat = get_db()
-            db_cat = next(db_gen_cat)
-            all_categories = get_all_categories(db_cat)
-            db_cat.close()
-            category_options = [""] + [cat.name for cat in all_categories] # Add empty for uncategorized
+            category_options = [""] + _load_category_names() # Add empty for uncategorized
             current_category_name = selected_record.get("category_name", "")
             selected_category_index = category_options.index(current_category_name) if current_category_name in category_options else 0
             new_category_name = st.selectbox("Category", options=category_options, index=selected_category_index, key=f"category_{selected_record_id}")
@@ -150,8 +142,6 @@ def show_records_page():
                 delete_button_trigger = st.form_submit_button("Delete Record", type="secondary") # Use secondary for destructive action
 
             if update_button:
-                db_gen_update = get_db()
-                db_update = next(db_gen_update)
                 try:
                     update_data = {
                         "vendor_name": new_vendor_name,
@@ -162,10 +152,12 @@ def show_records_page():
                         "billing_period_start": new_billing_period_start,
                         "billing_period_end": new_billing_period_end
                     }
-                    updated_record = update_receipt(db_update, selected_record_id, user_id, update_data)
+                    with db_session() as db:
+                        updated_record = update_receipt(db, selected_record_id, user_id, update_data)
                     if updated_record:
                         st.success(f"Record ID {selected_record_id} updated successfully!")
                         logger.info(f"User {user_id} updated record {selected_record_id}.")
+                        st.cache_data.clear() # Edits don't change the dashboard's cache token
                         st.session_state["current_main_page"] = "View Records" # Stay on this page
                         st.rerun()
                     else:
@@ -173,8 +165,6 @@ def show_records_page():
                 except Exception as e:
                     st.error(f"Error updating record: {e}")
                     logger.error(f"Error updating record {selected_record_id} for user {user_id}: {e}")
-                finally:
-                    db_update.close()
 
             if delete_button_trigger:
                 # Add a confirmation step for deletion
@@ -182,10 +172,10 @@ def show_records_page():
                 col_confirm1, col_confirm2 = st.columns(2)
                 with col_confirm1:
                     if st.button("Yes, Delete Permanently", key=f"confirm_delete_yes_{selected_record_id}"):
-                        db_gen_delete = get_db()
-                        db_delete = next(db_gen_delete)
                         try:
-                            if delete_receipt(db_delete, selected_record_id, user_id):
+                            with db_session() as db:
+                                deleted = delete_receipt(db, selected_record_id, user_id)
+                            if deleted:
                                 st.success(f"Record ID {selected_record_id} deleted successfully.")
                                 logger.info(f"User {user_id} deleted record {selected_record_id}.")
                                 st.session_state["current_main_page"] = "View Records" # Stay on this page
@@ -195,23 +185,78 @@ def show_records_page():
                         except Exception as e:
                             st.error(f"Error deleting record: {e}")
                             logger.error(f"Error deleting record {selected_record_id} for user {user_id}: {e}")
-                        finally:
-                            db_delete.close()
                 with col_confirm2:
                     if st.button("No, Cancel Deletion", key=f"confirm_delete_no_{selected_record_id}"):
                         st.info("Deletion cancelled.")
-                        st.rerun() # Refresh to clear confirmation prompt
+                        st.rerun(scope="fragment") # Refresh only this section to clear the confirmation prompt
 
     else:
         st.info("Select a record ID above to enable manual correction or deletion.")
 
+
+def show_records_page():
+    auth_manager = AuthManager()
+    auth_manager.require_login()
+
+    user_id = auth_manager.get_current_user_id()
+    st.title("📋 Your Transaction Records")
+    st.markdown("Manage, search, and sort your digitized receipts and bills.")
+
+    with db_session() as db:
+        cache_token = get_receipts_cache_token(db, user_id) # One cheap query; the records are only re-read when it changes
+    min_bound, max_bound = _load_amount_bounds(user_id, cache_token)
+
+    if min_bound is None:
+        st.info("No records found for your account. Start by uploading receipts!")
+        st.button("Go to Upload Page", on_click=navigate_to, args=("Upload Receipt",)) # Navigates within the click's rerun
+        return
+
+    # --- Search, Sort, Filter Controls ---
+    # The values feed the SQL query directly; see _load_records_df
+    st.sidebar.header("Filter & Sort Options")
+
+    # Search
+    search_query = st.sidebar.text_input("Keyword Search", help="Search across Vendor, Category, Filename and receipt text.")
+
+    # Range Search for Amount
+    st.sidebar.subheader("Amount Range")
+    min_amount = st.sidebar.number_input("Min Amount", value=float(min_bound), step=0.1)
+    max_amount = st.sidebar.number_input("Max Amount", value=float(max_bound), step=0.1)
+
+    # Sort
+    sort_options = {
+        "Transaction Date": "transaction_date",
+        "Upload Date": "upload_date",
+        "Amount": "amount",
+        "Vendor Name": "vendor_name",
+        "Category Name": "category_name"
+    }
+    selected_sort_key_display = st.sidebar.selectbox("Sort By", list(sort_options.keys()))
+    sort_key = sort_options[selected_sort_key_display]
+    sort_order = st.sidebar.radio("Order", ["Descending", "Ascending"])
+    reverse_sort = (sort_order == "Descending")
+
+    filters = (search_query or "", min_amount, max_amount)
+    total_records = _count_records(user_id, cache_token, *filters)
+    page_count = max(1, math.ceil(total_records / RECORDS_PAGE_SIZE))
+    page = int(st.sidebar.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)) if page_count > 1 else 1
+    df = _load_records_df(user_id, cache_token, *filters, sort_key, reverse_sort, page)
+    if df.empty:
+        st.warning("No records match your search query and amount range.")
+
+    st.subheader(f"Total Filtered Records: {total_records}")
+    if page_count > 1:
+        st.caption(f"Page {page} of {page_count}, {RECORDS_PAGE_SIZE} records per page.")
+    display_records_table(df, key="records_display_table")
+
+    _record_editor_fragment(df, user_id)
+
     # --- Export Data ---
     st.header("Export Your Data")
     st.markdown("Download your filtered transaction records in CSV or JSON format.")
 
     if not df.empty:
-        csv_data = convert_df_to_csv(df)
-        json_data = convert_df_to_json(df)
+        csv_data, json_data = _export_files(user_id, cache_token, *filters, sort_key, reverse_sort)
 
         col_export1, col_export2 = st.columns(2)
         with col_export1:
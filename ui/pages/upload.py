@@ -2,17 +2,36 @@ import streamlit as st
 from ui.auth_manager import AuthManager
 from processing.ingestion import save_uploaded_file
 from processing.parsing import parse_document
-from database.database import get_db
-from database.crud import create_receipt
+from database.database import db_session
+from database.crud import create_receipts_bulk
+from ui.components import navigate_to
 from utils.errors import FileProcessingError, ParsingError
 import pandas as pd
 from datetime import date
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Files parsed at once. OCR runs in Tesseract subprocesses and PDF/image decoding in C, which release
+# the GIL, so threads overlap well without the startup cost of a process pool.
+UPLOAD_PARSE_WORKERS = min(8, os.cpu_count() or 1)
+
+def _save_and_parse(uploaded_file):
+    """
+    Saves one uploaded file and parses it; runs in a worker thread, so no Streamlit calls here.
+
+    :param uploaded_file: A file object from st.file_uploader.
+    :return: Tuple of (saved_file_path, original_filename, parsed_data); the path is None if saving failed.
+    :raises FileProcessingError, ParsingError: As raised by parse_document.
+    """
+    saved_file_path, original_filename = save_uploaded_file(uploaded_file)
+    if not saved_file_path:
+        return None, uploaded_file.name, None
+    return saved_file_path, original_filename, parse_document(saved_file_path, original_filename)
+
 def show_upload_page():
     auth_manager = AuthManager()
     auth_manager.require_login() # Ensure user is logged in
@@ -38,66 +57,57 @@ def show_upload_page():
         parsed_results = []
         parsing_errors = []
 
-        for i, uploaded_file in enumerate(uploaded_files):
-            file_name = uploaded_file.name
-            st.write(f"Processing: **{file_name}**")
-
-            # 1. Save the file temporarily (or permanently if desired)
-            saved_file_path, original_filename = save_uploaded_file(uploaded_file)
-
-            if saved_file_path:
+        # 1.+2. Save and parse the files in parallel. Each worker saves its file and goes straight on to
+        # parsing it, so one file's disk write overlaps with other files' OCR instead of all saves
+        # running first. Results are reported in the order they finish; Streamlit calls and database
+        # writes stay on this thread. Files are kept as per data/raw_receipts structure (no cleanup).
+        to_record = []
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_PARSE_WORKERS, total_files)) as executor:
+            futures = {executor.submit(_save_and_parse, uploaded_file): uploaded_file.name for uploaded_file in uploaded_files}
+            for future in as_completed(futures):
+                file_name = futures[future]
+                st.write(f"Processing: **{file_name}**")
                 try:
-                    # 2. Parse the document
-                    parsed_data = parse_document(saved_file_path, original_filename)
-
-                    # 3. Save parsed data to database
-                    if parsed_data:
-                        db_gen = get_db()
-                        db = next(db_gen)
-                        try:
-                            # Use validated data from Pydantic model
-                            db_receipt = create_receipt(
-                                db=db,
-                                owner_id=user_id,
-                                vendor_name=parsed_data.vendor_name,
-                                transaction_date=parsed_data.transaction_date,
-                                amount=parsed_data.amount,
-                                currency=parsed_data.currency,
-                                category_name=parsed_data.category_name,
-                                original_filename=original_filename,
-                                parsed_raw_text=parsed_data.parsed_raw_text,
-                                billing_period_start=parsed_data.billing_period_start,
-                                billing_period_end=parsed_data.billing_period_end
-                            )
-                            parsed_results.append(db_receipt)
-                            st.success(f"Successfully processed and recorded: **{original_filename}** (Vendor: {parsed_data.vendor_name}, Amount: {parsed_data.amount:.2f} {parsed_data.currency})")
-                            logger.info(f"File {original_filename} processed and saved to DB.")
-                        except Exception as db_err:
-                            st.error(f"Failed to save data for {original_filename} to database: {db_err}")
-                            parsing_errors.append(f"DB Error for {original_filename}: {db_err}")
-                        finally:
-                            db.close()
+                    saved_file_path, original_filename, parsed_data = future.result()
+                    if not saved_file_path:
+                        st.error(f"Failed to save {file_name} to disk.")
+                        parsing_errors.append(f"File save error for {file_name}.")
+                    elif parsed_data:
+                        to_record.append((original_filename, parsed_data))
                     else:
                         st.warning(f"Could not extract meaningful data from: **{original_filename}**.")
                         parsing_errors.append(f"No data extracted from {original_filename}.")
-
                 except (FileProcessingError, ParsingError) as e:
-                    st.error(f"Error processing **{original_filename}**: {e}")
-                    parsing_errors.append(f"Processing Error for {original_filename}: {e}")
+                    st.error(f"Error processing **{file_name}**: {e}")
+                    parsing_errors.append(f"Processing Error for {file_name}: {e}")
                 except Exception as e:
-                    st.error(f"An unexpected error occurred while processing **{original_filename}**: {e}")
-                    parsing_errors.append(f"Unexpected Error for {original_filename}: {e}")
-                finally:
-                    # Optional: Clean up saved_file_path if it was just for temporary processing
-                    # os.remove(saved_file_path)
-                    pass # Keeping files for now as per data/raw_receipts structure
-
+                    st.error(f"An unexpected error occurred while processing **{file_name}**: {e}")
+                    parsing_errors.append(f"Unexpected Error for {file_name}: {e}")
+                processed_count += 1
+                progress_bar.progress((processed_count / total_files))
+
+        # 3. Save parsed data to database: one batch insert for all files, in a single transaction
+        # (a file whose row is rejected is reported on its own; the rest are still saved)
+        if to_record:
+            # Use validated data from Pydantic model
+            receipt_rows = [dict(parsed_data.model_dump(), original_filename=original_filename)
+                            for original_filename, parsed_data in to_record]
+            try:
+                with db_session() as db:
+                    saved_count, db_failures = create_receipts_bulk(db, user_id, receipt_rows)
+            except Exception as db_err:
+                st.error(f"Failed to save data for {len(to_record)} files to database: {db_err}")
+                parsing_errors.extend(f"DB Error for {original_filename}: {db_err}" for original_filename, _ in to_record)
             else:
-                st.error(f"Failed to save {file_name} to disk.")
-                parsing_errors.append(f"File save error for {file_name}.")
-
-            processed_count += 1
-            progress_bar.progress((processed_count / total_files))
+                for position, (original_filename, parsed_data) in enumerate(to_record):
+                    db_err = db_failures.get(position)
+                    if db_err is not None: # Only this file's row failed; the others were saved
+                        st.error(f"Failed to save data for {original_filename} to database: {db_err}")
+                        parsing_errors.append(f"DB Error for {original_filename}: {db_err}")
+                    else:
+                        parsed_results.append(original_filename)
+                        st.success(f"Successfully processed and recorded: **{original_filename}** (Vendor: {parsed_data.vendor_name}, Amount: {parsed_data.amount:.2f} {parsed_data.currency})")
+                logger.info(f"{saved_count} files processed and saved to DB.")
 
         progress_bar.empty() # Remove progress bar after completion
 
@@ -106,10 +116,8 @@ def show_upload_page():
 
         if parsed_results:
             st.success(f"🎉 Successfully processed {len(parsed_results)} out of {total_files} files.")
-            if st.button("View Processed Records"):
-        # Corrected: Use the correct session state variable and force rerun
-                st.session_state["current_main_page"] = "View Records"
-                st.rerun()
+            # Navigates within the click's rerun, so the uploaded files aren't processed again first
+            st.button("View Processed Records", on_click=navigate_to, args=("View Records",))
         else:
             st.warning("No new records were successfully processed.")
 
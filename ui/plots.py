@@ -2,22 +2,93 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
+import numpy as np
 import logging
 from typing import Optional, List
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Line charts with more points than this are reduced with M4 before Plotly serializes them.
+# Roughly the pixel width of a wide chart at 2x device pixel ratio; more points can't be told apart.
+MAX_LINE_POINTS = 2000
+# Line traces with more points than this are drawn with WebGL (one draw call) instead of one SVG node per point
+WEBGL_MIN_POINTS = 1000
+# Bar/pie charts with more bars/slices than this are unreadable and heavy to serialize; a warning is logged
+MAX_CATEGORY_ROWS = 1000
+
+def _axis_title(col: str) -> str:
+    """
+    Private helper turning a column name into a display title (e.g., 'total_amount' -> 'Total Amount').
+    """
+    return col.replace('_', ' ').title()
+
+def aggregate_for_chart(df: pd.DataFrame, x_col: str, y_col: str, color_col: Optional[str] = None,
+                        agg: str = 'sum') -> pd.DataFrame:
+    """
+    Collapses raw rows to one row per x value (and color value, if given) before plotting, so the
+    figure carries K aggregated points instead of N raw rows.
+
+    :param df: DataFrame with the raw rows.
+    :param x_col: Column holding the bar/slice labels.
+    :param y_col: Column to aggregate.
+    :param color_col: Optional second grouping column.
+    :param agg: Aggregation name understood by pandas (e.g., 'sum', 'mean', 'count').
+    :return: DataFrame with the grouping columns and the aggregated y column.
+    """
+    group_cols = [x_col, color_col] if color_col else [x_col]
+    return df.groupby(group_cols, as_index=False, observed=True, sort=False)[y_col].agg(agg)
+
+def _pre_aggregate(df: pd.DataFrame, x_col: str, y_col: str, color_col: Optional[str],
+                   hover_data: Optional[List[str]], title: str) -> pd.DataFrame:
+    """
+    Private helper for bar/pie charts: Plotly would stack (bar) or add up (pie) rows with the same label
+    anyway, so duplicate labels are summed here first. Skipped when hover data needs other columns.
+    """
+    group_cols = [x_col, color_col] if color_col else [x_col]
+    if df.duplicated(group_cols).any() and set(hover_data or []) <= {x_col, y_col, color_col}:
+        original_rows = len(df)
+        df = aggregate_for_chart(df, x_col, y_col, color_col)
+        logger.warning(f"Chart '{title}' got unaggregated rows; summed {original_rows} rows to {len(df)}.")
+    if len(df) > MAX_CATEGORY_ROWS:
+        logger.warning(f"Chart '{title}' has {len(df)} bars/slices; aggregate or limit the data before plotting.")
+    return df
+
+def _m4_downsample(df: pd.DataFrame, y_cols: List[str], max_points: int = MAX_LINE_POINTS) -> pd.DataFrame:
+    """
+    M4 aggregation: splits the (ordered) rows into max_points // 4 buckets and keeps only the first, last,
+    minimum and maximum row of each bucket for every y column, which preserves the drawn shape of a line.
+
+    :param df: DataFrame in plotting order.
+    :param y_cols: Columns whose extremes must be kept.
+    :param max_points: Target number of points per y column.
+    :return: The kept rows in their original order (df itself if it is already small enough).
+    """
+    n_rows = len(df)
+    n_buckets = max(max_points // 4, 1)
+    if n_rows <= max_points:
+        return df
+    buckets = (np.arange(n_rows) * n_buckets) // n_rows # Non-decreasing bucket number per row
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], n_rows] - 1
+    keep = [starts, ends]
+    for col in y_cols:
+        order = np.lexsort((df[col].to_numpy(dtype=np.float64), buckets)) # By bucket, then value (NaN last)
+        keep.append(order[starts]) # Bucket minimum
+        keep.append(order[ends]) # Bucket maximum (or a NaN gap)
+    return df.iloc[np.unique(np.concatenate(keep))]
+
 def plot_bar_chart(df: pd.DataFrame, x_col: str, y_col: str, title: str,
                    color_col: Optional[str] = None, hover_data: Optional[List[str]] = None):
     if df.empty:
         logger.warning(f"Empty DataFrame provided for bar chart '{title}'.")
         return px.bar(title=title + " (No Data)")
 
+    df = _pre_aggregate(df, x_col, y_col, color_col, hover_data, title)
     fig = px.bar(df, x=x_col, y=y_col, title=title, color=color_col, hover_data=hover_data,
                  template="plotly_white")
-    fig.update_layout(xaxis_title=x_col.replace('_', ' ').title(),
-                      yaxis_title=y_col.replace('_', ' ').title(),
+    fig.update_layout(xaxis_title=_axis_title(x_col),
+                      yaxis_title=_axis_title(y_col),
                       title_x=0.5)
     logger.info(f"Generated bar chart: {title}")
     return fig
@@ -28,6 +99,7 @@ def plot_pie_chart(df: pd.DataFrame, names_col: str, values_col: str, title: str
         logger.warning(f"Empty DataFrame provided for pie chart '{title}'.")
         return px.pie(title=title + " (No Data)")
 
+    df = _pre_aggregate(df, names_col, values_col, None, hover_data, title)
     fig = px.pie(df, names=names_col, values=values_col, title=title, hole=hole, hover_data=hover_data,
                  template="plotly_white")
     fig.update_traces(textposition='inside', textinfo='percent+label')
@@ -42,44 +114,53 @@ def plot_line_chart(df: pd.DataFrame, x_col: str, y_col: str, title: str,
         logger.warning(f"Empty DataFrame provided for line chart '{title}'.")
         return px.line(title=title + " (No Data)")
 
-    if y_secondary_col and y_secondary_col in df.columns:
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
+    has_secondary = bool(y_secondary_col and y_secondary_col in df.columns)
+    if len(df) > MAX_LINE_POINTS and not color_col: # Rows of several colored lines are interleaved; leave those as is
+        original_rows = len(df)
+        df = _m4_downsample(df, [y_col, y_secondary_col] if has_secondary else [y_col])
+        logger.info(f"Downsampled line chart '{title}' from {original_rows} to {len(df)} points (M4).")
+    use_webgl = len(df) > WEBGL_MIN_POINTS
+    scatter_trace = go.Scattergl if use_webgl else go.Scatter
 
-        # Add primary y-axis trace (total_amount)
-        # Fix: Double curly braces for literal braces in f-string
-        fig.add_trace(
-            go.Scatter(x=df[x_col], y=df[y_col], name=y_col.replace('_', ' ').title(), mode='lines+markers',
-                       hovertemplate='<b>%{x}</b><br>' + f'{y_col.replace("_", " ").title()}: %{{y}}:.2f<extra></extra>'),
-            secondary_y=False,
-        )
+    # Axis/legend titles, built once per chart
+    x_title = _axis_title(x_col)
+    y_title = _axis_title(y_col)
+
+    if has_secondary:
+        y2_title = _axis_title(y_secondary_col)
+        fig = make_subplots(specs=[[{"secondary_y": True}]])
 
-        # Add secondary y-axis trace (rolling_avg)
-        # Fix: Double curly braces for literal braces in f-string
-        fig.add_trace(
-            go.Scatter(x=df[x_col], y=df[y_secondary_col], name=y_secondary_col.replace('_', ' ').title(), mode='lines+markers',
-                       hovertemplate='<b>%{x}</b><br>' + f'{y_secondary_col.replace("_", " ").title()}: %{{y}}:.2f<extra></extra>',
-                       line=dict(dash='dot')),
-            secondary_y=True,
+        # Primary (total_amount) and secondary (rolling_avg, dotted) traces, added in one batch
+        fig.add_traces(
+            [
+                scatter_trace(x=df[x_col], y=df[y_col], name=y_title, mode='lines+markers',
+                              hovertemplate=f'<b>%{{x}}</b><br>{y_title}: %{{y:.2f}}<extra></extra>'),
+                scatter_trace(x=df[x_col], y=df[y_secondary_col], name=y2_title, mode='lines+markers',
+                              hovertemplate=f'<b>%{{x}}</b><br>{y2_title}: %{{y:.2f}}<extra></extra>',
+                              line=dict(dash='dot')),
+            ],
+            secondary_ys=[False, True],
         )
 
         fig.update_layout(
             title_text=title,
             title_x=0.5,
-            xaxis_title=x_col.replace('_', ' ').title(),
+            xaxis_title=x_title,
             template="plotly_white",
             hovermode="x unified"
         )
-        fig.update_yaxes(title_text=y_col.replace('_', ' ').title(), secondary_y=False)
-        fig.update_yaxes(title_text=y_secondary_col.replace('_', ' ').title(), secondary_y=True)
+        fig.update_yaxes(title_text=y_title, secondary_y=False)
+        fig.update_yaxes(title_text=y2_title, secondary_y=True)
 
     else:
         fig = px.line(df, x=x_col, y=y_col, title=title, color=color_col, hover_data=hover_data,
-                      template="plotly_white")
-        fig.update_layout(xaxis_title=x_col.replace('_', ' ').title(),
-                          yaxis_title=y_col.replace('_', ' ').title(),
+                      template="plotly_white", render_mode="webgl" if use_webgl else "auto")
+        fig.update_layout(xaxis_title=x_title,
+                          yaxis_title=y_title,
                           title_x=0.5)
 
     fig.update_xaxes(tickangle=45)
+    fig.update_layout(uirevision="constant") # Keep the user's zoom/pan when a rerun redraws the chart
 
     logger.info(f"Generated line chart: {title}")
     return fig
@@ -1,67 +1,127 @@
 from typing import Optional, Any, Dict # Added Any here
+import logging
+
+logger = logging.getLogger(__name__) # Handlers are configured by the application, not per exception
+
+class _LazyDetails:
+    """Formats an error's details only when a log record is actually emitted."""
+    __slots__ = ("error",)
+
+    def __init__(self, error: "AppError"):
+        self.error = error
+
+    def __str__(self) -> str:
+        return str(self.error.details)
+
+def _restore_error(cls: type, args: tuple, state: Dict[str, Any]) -> "AppError":
+    """
+    Unpickles an AppError without calling __init__ again (which would log the error a second time).
+    """
+    error = cls.__new__(cls, *args)
+    for name, value in state.items():
+        setattr(error, name, value)
+    return error
 
 class AppError(Exception):
-    """Base exception for all custom application-specific errors."""
+    """
+    Base exception for all custom application-specific errors.
+    Subclasses keep their raw attributes and build `details` on access by overriding `_build_details`.
+    Attributes are declared in __slots__ so raising an error doesn't allocate an instance __dict__;
+    subclasses adding attributes must declare them too.
+    """
+    __slots__ = ("message", "_details")
+
     def __init__(self, message: str = "An application error occurred.", details: Optional[Any] = None):
         self.message = message
-        self.details = details
+        self._details = details
         super().__init__(self.message)
-        # Log the error for debugging purposes
-        import logging
-        logger = logging.getLogger(__name__)
-        # Ensure logger is initialized if this file is run directly for testing purposes
-        if not logger.handlers:
-            logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        logger.error(f"AppError: {message} | Details: {details}")
+        # Log the error for debugging purposes; the message is only formatted if ERROR records are emitted
+        logger.error("AppError: %s | Details: %s", message, _LazyDetails(self))
+
+    @property
+    def details(self) -> Optional[Any]:
+        return self._build_details()
+
+    def _build_details(self) -> Optional[Any]:
+        return self._details
+
+    def __reduce__(self):
+        # The default exception pickling only keeps args and __dict__, which would drop slot attributes
+        state = {name: getattr(self, name) for cls in type(self).__mro__
+                 for name in getattr(cls, "__slots__", ()) if hasattr(self, name)}
+        return (_restore_error, (type(self), self.args, state))
 
 class FileProcessingError(AppError):
     """
     Raised when there's an issue reading, writing, saving, or handling a file.
     Examples: file not found, permission denied, unsupported format.
     """
+    __slots__ = ("filename", "original_error")
+
     def __init__(self, message: str = "Error processing file.", filename: Optional[str] = None, original_error: Optional[Exception] = None):
-        details = {"filename": filename, "original_error": str(original_error)} if filename or original_error else None
-        super().__init__(message, details)
         self.filename = filename
         self.original_error = original_error
+        super().__init__(message)
+
+    def _build_details(self) -> Optional[Dict]:
+        if not (self.filename or self.original_error):
+            return None
+        return {"filename": self.filename, "original_error": str(self.original_error)}
 
 class ParsingError(AppError):
     """
     Raised when structured data extraction (e.g., from OCR text) or data validation fails.
     Examples: expected data not found, extracted data is malformed, Pydantic validation error.
     """
+    __slots__ = ("document_id", "original_text", "original_error")
+
     def __init__(self, message: str = "Error parsing document data.", document_id: Optional[Any] = None, original_text: Optional[str] = None, original_error: Optional[Exception] = None):
-        details = {"document_id": document_id, "original_text": original_text, "original_error": str(original_error)} if any([document_id, original_text, original_error]) else None
-        super().__init__(message, details)
         self.document_id = document_id
         self.original_text = original_text
         self.original_error = original_error
+        super().__init__(message)
+
+    def _build_details(self) -> Optional[Dict]:
+        if not (self.document_id or self.original_text or self.original_error):
+            return None
+        return {"document_id": self.document_id, "original_text": self.original_text, "original_error": str(self.original_error)}
 
 class DatabaseError(AppError):
     """
     Raised when a database operation fails unexpectedly.
     Examples: connection issues, integrity errors, unexpected query results.
     """
+    __slots__ = ("query_details", "original_error")
+
     def __init__(self, message: str = "Database operation failed.", query_details: Optional[Dict] = None, original_error: Optional[Exception] = None):
-        details = {"query_details": query_details, "original_error": str(original_error)} if query_details or original_error else None
-        super().__init__(message, details)
         self.query_details = query_details
         self.original_error = original_error
+        super().__init__(message)
+
+    def _build_details(self) -> Optional[Dict]:
+        if not (self.query_details or self.original_error):
+            return None
+        return {"query_details": self.query_details, "original_error": str(self.original_error)}
 
 class AuthenticationError(AppError):
     """
     Raised when user authentication or authorization fails.
     Examples: invalid credentials, unauthorized access.
     """
+    __slots__ = ("username", "reason")
+
     def __init__(self, message: str = "Authentication failed.", username: Optional[str] = None, reason: Optional[str] = None):
-        details = {"username": username, "reason": reason} if username or reason else None
-        super().__init__(message, details)
         self.username = username
         self.reason = reason
+        super().__init__(message)
+
+    def _build_details(self) -> Optional[Dict]:
+        if not (self.username or self.reason):
+            return None
+        return {"username": self.username, "reason": self.reason}
 
 # Example Usage (for testing/demonstration)
 if __name__ == "__main__":
-    import logging
     logging.basicConfig(level=logging.INFO) # Set logging level for demo
 
     print("\n--- Custom Error Handling Demo ---")
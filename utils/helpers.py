@@ -1,15 +1,71 @@
 import pandas as pd
 import json
+import re
+import io
 from datetime import datetime, date
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 import logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    ARROW_AVAILABLE = True
+except ImportError: # pyarrow is optional; CSV export falls back to DataFrame.to_csv
+    pa = None
+    pa_csv = None
+    ARROW_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError: # orjson is optional; JSON export falls back to DataFrame.to_json
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+DATE_CACHE_SIZE = 8192 # Distinct date strings remembered by parse_date_safely
+ARROW_CSV_MIN_ROWS = 1000 # Below this, pandas' to_csv is faster than converting the frame to Arrow first
+
+# Currency symbols and words with their corresponding codes, in priority order.
+# Prioritize ISO codes or explicit mentions over just symbols if possible
+CURRENCY_TOKENS = {
+    'USD': ['usd', '$', 'dollars', 'us dollar'],
+    'EUR': ['eur', '€', 'euro', 'euros'],
+    'GBP': ['gbp', '£', 'pound', 'pounds'],
+    'INR': ['inr', '₹', 'rupee', 'rupees'],
+    'CAD': ['cad', 'canadian'],
+    'AUD': ['aud', 'australian'],
+    'JPY': ['jpy', '¥', 'yen'],
+    # Add more currencies as needed
+}
+# Lowercased token -> code lookup tables. Symbols and multi-word phrases are literal substrings found
+# with `in` (no regex, so any character can be added safely); words are looked up by splitting the
+# text into runs of letters.
+_CURRENCY_SYMBOLS = {tok: code for code, toks in CURRENCY_TOKENS.items() for tok in toks if not tok.isalpha() and ' ' not in tok}
+_CURRENCY_PHRASES = {tok: code for code, toks in CURRENCY_TOKENS.items() for tok in toks if ' ' in tok}
+_CURRENCY_WORDS = {tok: code for code, toks in CURRENCY_TOKENS.items() for tok in toks if tok.isalpha()}
+_CURRENCY_PRIORITY = {code: rank for rank, code in enumerate(CURRENCY_TOKENS)}
+_WORD_RE = re.compile(r'[a-z]+')
+
+# Basic email regex (common StackOverflow pattern), compiled once
+_EMAIL_RE = re.compile(r'^[a-z0-9]+[\._]?[a-z0-9]+[@]\w+[.]\w{2,3}$', re.IGNORECASE)
+
+# Date layouts and the strptime formats to try for each, in order. DD-MM-YYYY and MM-DD-YYYY share a
+# layout, so both are tried (day first). {sep} stands for the separator the string uses.
+_DATE_DISPATCH = [
+    (re.compile(r'^\d{4}(?P<sep>[-/.])\d{1,2}(?P=sep)\d{1,2}$'), ("%Y{sep}%m{sep}%d",)),                 # YYYY-MM-DD, YYYY/MM/DD, YYYY.MM.DD
+    (re.compile(r'^\d{1,2}(?P<sep>[-/.])\d{1,2}(?P=sep)\d{4}$'), ("%d{sep}%m{sep}%Y", "%m{sep}%d{sep}%Y")), # DD-MM-YYYY, then MM-DD-YYYY
+    (re.compile(r'^[A-Za-z]+\s+\d{1,2},\s+\d{4}$'), ("%b %d, %Y", "%B %d, %Y")),                          # Jan 01, 2023 / January 01, 2023
+    (re.compile(r'^\d{1,2}\s+[A-Za-z]+\s+\d{4}$'), ("%d %b %Y", "%d %B %Y")),                            # 01 Jan 2023 / 01 January 2023
+    (re.compile(r'^\d{6,8}$'), ("%Y%m%d",)),                                                             # YYYYMMDD (e.g., 20230115)
+]
+
 def convert_df_to_csv(df: pd.DataFrame) -> str:
     """
     Converts a pandas DataFrame to a CSV formatted string.
+    Frames of ARROW_CSV_MIN_ROWS rows or more are written with pyarrow's CSV writer when it is installed.
 
     :param df: The DataFrame to convert.
     :return: A string containing the CSV data, or an empty string on error.
@@ -17,6 +73,11 @@ def convert_df_to_csv(df: pd.DataFrame) -> str:
     if df.empty:
         logger.info("Attempted to convert empty DataFrame to CSV.")
         return ""
+    if ARROW_AVAILABLE and len(df) >= ARROW_CSV_MIN_ROWS:
+        try:
+            return _arrow_csv(df)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e: # e.g. mixed-type object columns
+            logger.debug("Arrow could not write the DataFrame as CSV, using to_csv: %s", e)
     try:
         csv_string = df.to_csv(index=False)
         logger.debug("DataFrame converted to CSV string successfully.")
@@ -25,32 +86,67 @@ def convert_df_to_csv(df: pd.DataFrame) -> str:
         logger.error(f"Error converting DataFrame to CSV: {e}")
         return ""
 
-def convert_df_to_json(df: pd.DataFrame) -> str:
+def _arrow_csv(df: pd.DataFrame) -> str:
+    """
+    Private helper writing a DataFrame as CSV with Arrow's C++ writer. Values are formatted as by
+    to_csv except that booleans are written as true/false and strings are always quoted.
+    Timestamps are written to the second when no value has a fractional second, as pandas does.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            try:
+                table = table.set_column(i, field.name, table.column(i).cast(pa.timestamp('s', field.type.tz)))
+            except pa.ArrowInvalid:
+                pass # Sub-second values; keep the full precision
+    buffer = io.BytesIO()
+    pa_csv.write_csv(table, buffer, write_options=pa_csv.WriteOptions(quoting_style="needed"))
+    logger.debug("DataFrame converted to CSV string with Arrow.")
+    return buffer.getvalue().decode()
+
+def convert_df_to_json(df: pd.DataFrame, pretty: bool = False) -> str:
     """
     Converts a pandas DataFrame to a JSON formatted string.
     Ensures date/datetime objects are serialized correctly to ISO format.
+    Serialized with orjson when it is installed, otherwise with DataFrame.to_json.
 
     :param df: The DataFrame to convert.
+    :param pretty: If True, indent the output (2 spaces with orjson, 4 with to_json). Default is compact,
+                   which is much faster for large frames.
     :return: A string containing the JSON data, or an empty JSON object string on error.
     """
     if df.empty:
         logger.info("Attempted to convert empty DataFrame to JSON.")
         return "{}"
     try:
-        # Create a copy to avoid modifying the original DataFrame
-        df_json_friendly = df.copy()
-
-        # Convert all date/datetime columns to ISO 8601 strings
-        for col in df_json_friendly.columns:
-            if pd.api.types.is_datetime64_any_dtype(df_json_friendly[col]):
-                df_json_friendly[col] = df_json_friendly[col].dt.isoformat(timespec='seconds')
+        # Convert all date/datetime columns to ISO 8601 strings with vectorized strftime; missing values stay null.
+        # Only the converted columns are new; the others are shared with df instead of copying the whole frame.
+        iso_columns = {}
+        for col, series in df.items():
+            if pd.api.types.is_datetime64_any_dtype(series):
+                iso_columns[col] = series.dt.strftime('%Y-%m-%dT%H:%M:%S')
             # Handle date objects which might not be pd.Timestamp if loaded directly
-            elif pd.api.types.is_object_dtype(df_json_friendly[col]) and not df_json_friendly[col].empty and isinstance(df_json_friendly[col].iloc[0], date):
-                 df_json_friendly[col] = df_json_friendly[col].apply(lambda x: x.isoformat() if x else None)
-
+            elif pd.api.types.is_object_dtype(series) and not series.empty and isinstance(series.iloc[0], date):
+                is_datetime = isinstance(series.iloc[0], datetime) # datetime is a date subclass; keep its time part
+                iso_columns[col] = pd.to_datetime(series, errors='coerce').dt.strftime(
+                    '%Y-%m-%dT%H:%M:%S' if is_datetime else '%Y-%m-%d')
+        if not iso_columns:
+            df_json_friendly = df
+        elif df.columns.is_unique:
+            df_json_friendly = pd.DataFrame({col: iso_columns.get(col, series) for col, series in df.items()}, copy=False)
+        else:
+            df_json_friendly = df.assign(**iso_columns)
 
-        # Use orient="records" for a list of JSON objects (one per row)
-        json_string = df_json_friendly.to_json(orient="records", indent=4, date_format="iso")
+        # A list of JSON objects (one per row)
+        json_string = None
+        if ORJSON_AVAILABLE:
+            try:
+                options = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if pretty else 0)
+                json_string = orjson.dumps(df_json_friendly.to_dict(orient="records"), option=options).decode()
+            except TypeError as e: # A value orjson can't serialize (e.g., pd.NA); pandas handles it
+                logger.debug("orjson could not serialize the DataFrame, using to_json: %s", e)
+        if json_string is None:
+            json_string = df_json_friendly.to_json(orient="records", indent=4 if pretty else None, date_format="iso")
         logger.debug("DataFrame converted to JSON string successfully.")
         return json_string
     except Exception as e:
@@ -67,25 +163,49 @@ def parse_date_safely(date_str: str) -> Optional[date]:
     """
     if not isinstance(date_str, str) or not date_str.strip():
         return None
+    return _parse_date_cached(date_str)
 
-    # Define a list of common date formats to try
-    formats = [
-        "%Y-%m-%d", "%d-%m-%Y", "%m-%d-%Y", # YYYY-MM-DD, DD-MM-YYYY, MM-DD-YYYY
-        "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y", # YYYY/MM/DD, DD/MM/YYYY, MM/DD/YYYY
-        "%Y.%m.%d", "%d.%m.%Y", "%m.%d.%Y", # YYYY.MM.DD, DD.MM.YYYY, MM.DD.YYYY
-        "%b %d, %Y", "%B %d, %Y",            # Jan 01, 2023 / January 01, 2023
-        "%d %b %Y", "%d %B %Y",            # 01 Jan 2023 / 01 January 2023
-        "%Y%m%d"                           # YYYYMMDD (e.g., 20230115)
-    ]
-
-    for fmt in formats:
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_cached(date_str: str) -> Optional[date]:
+    """
+    Private helper doing the parsing for parse_date_safely. Memoized, since imported receipts repeat
+    the same date strings; failures are cached too, so each bad string is only logged once.
+    """
+    # Year-first layouts (YYYY-MM-DD, YYYY/MM/DD, YYYY.MM.DD, YYYYMMDD) are sliced down to YYYYMMDD and
+    # parsed by date.fromisoformat in C, without regex or strptime. Anything it rejects (out-of-range
+    # fields, or the compact form before Python 3.11) still goes through the dispatch below.
+    digits = None
+    if len(date_str) == 10 and date_str[4] == date_str[7] and date_str[4] in '-/.':
+        digits = date_str[:4] + date_str[5:7] + date_str[8:]
+    elif len(date_str) == 8:
+        digits = date_str
+    if digits and digits.isascii() and digits.isdigit():
         try:
-            return datetime.strptime(date_str, fmt).date()
+            return date.fromisoformat(digits)
         except ValueError:
-            continue # Try next format
+            pass
+    # The regex dispatch picks the candidate formats for the string's layout, so strptime is only
+    # called with formats that can match instead of raising for every other format in the list
+    for pattern, formats in _DATE_DISPATCH:
+        match = pattern.match(date_str)
+        if not match:
+            continue
+        sep = match.groupdict().get('sep', '')
+        for fmt in formats:
+            try:
+                return datetime.strptime(date_str, fmt.replace('{sep}', sep)).date()
+            except ValueError:
+                continue # Out-of-range values, or the other order of an ambiguous layout
+        break # Layouts don't overlap, so no other pattern can match
     logger.warning(f"Could not parse date string '{date_str}' with known formats.")
     return None
 
+def clear_date_cache() -> None:
+    """
+    Clears the memoized parse_date_safely results (e.g., between tests).
+    """
+    _parse_date_cached.cache_clear()
+
 def detect_currency(text: str) -> str:
     """
     Detects currency based on common symbols and ISO codes found within a given text.
@@ -98,27 +218,24 @@ def detect_currency(text: str) -> str:
         logger.warning(f"Non-string input for currency detection: {type(text)}")
         return 'INR'
 
-    text_lower = text.lower()
-
-    # Define currency patterns with their corresponding codes and priorities
-    # Prioritize ISO codes or explicit mentions over just symbols if possible
-    currency_patterns = {
-        'USD': [r'usd', r'\$', r'dollars', r'us dollar'],
-        'EUR': [r'eur', r'€', r'euro'],
-        'GBP': [r'gbp', r'£', r'pound'],
-        'INR': [r'inr', r'₹', r'rupee'],
-        'CAD': [r'cad', r'canadian dollar'],
-        'AUD': [r'aud', r'australian dollar'],
-        'JPY': [r'jpy', r'¥', r'yen'],
-        # Add more currencies as needed
-    }
-
-    # Iterate through patterns to find the first match
-    for code, patterns in currency_patterns.items():
-        for pattern in patterns:
-            if re.search(pattern, text_lower):
-                logger.debug(f"Detected currency: {code} from pattern '{pattern}'.")
-                return code
+    # Collect every currency mentioned with dict lookups; the highest-priority one wins
+    # (the first in CURRENCY_TOKENS), and a mention of that one ends the search early.
+    best_code = None
+    lowered = text.lower()
+    for literals, haystack in ((_CURRENCY_SYMBOLS, text), (_CURRENCY_PHRASES, lowered)):
+        for literal, code in literals.items():
+            if literal in haystack and (best_code is None or _CURRENCY_PRIORITY[code] < _CURRENCY_PRIORITY[best_code]):
+                best_code = code
+    if best_code is None or _CURRENCY_PRIORITY[best_code] > 0:
+        for word in set(_WORD_RE.findall(lowered)):
+            code = _CURRENCY_WORDS.get(word)
+            if code and (best_code is None or _CURRENCY_PRIORITY[code] < _CURRENCY_PRIORITY[best_code]):
+                best_code = code
+                if _CURRENCY_PRIORITY[code] == 0:
+                    break
+    if best_code:
+        logger.debug("Detected currency: %s.", best_code)
+        return best_code
 
     logger.info("No specific currency detected, defaulting to INR.")
     return 'INR'
@@ -130,15 +247,12 @@ def is_valid_email(email: str) -> bool:
     """
     if not isinstance(email, str):
         return False
-    # Regex from StackOverflow - common basic email regex
-    regex = r'^[a-z0-9]+[\._]?[a-z0-9]+[@]\w+[.]\w{2,3}$'
-    if re.search(regex, email, re.IGNORECASE):
-        return True
-    return False
+    return _EMAIL_RE.search(email) is not None
 
 # Example Usage (for testing/demonstration)
 if __name__ == "__main__":
     import datetime
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s') # Set logging level for demo; the app configures it in app.py
 
     print("\n--- DataFrame to CSV/JSON Conversion ---")
     data = {
@@ -154,7 +268,7 @@ if __name__ == "__main__":
     csv_output = convert_df_to_csv(sample_df)
     print("\nCSV Output:\n", csv_output)
 
-    json_output = convert_df_to_json(sample_df)
+    json_output = convert_df_to_json(sample_df, pretty=True)
     print("\nJSON Output:\n", json_output)
 
     print("\n--- Date Parsing Safely ---")
@@ -1,27 +1,73 @@
+from passlib.context import CryptContext
 from passlib.hash import bcrypt
+import asyncio
+import os
 import re
 import logging
-from typing import Optional
+import numpy as np
+from typing import List, Optional
+
+try:
+    import argon2 # Backend for passlib's argon2 handler
+    ARGON2_AVAILABLE = True
+except ImportError: # argon2-cffi is optional; new hashes use bcrypt without it
+    ARGON2_AVAILABLE = False
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# RECEIPT_APP_KDF_CHEAP=1 drops the default costs to the schemes' minimums for tests and local development.
+_KDF_CHEAP = os.environ.get("RECEIPT_APP_KDF_CHEAP") == "1"
+# Cost factor for bcrypt hashes, tunable with BCRYPT_ROUNDS.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 4 if _KDF_CHEAP else 12))
+# Argon2id parameters (time cost in passes, memory in KiB, lanes), used when argon2-cffi is installed.
+ARGON2_TIME_COST = int(os.environ.get("ARGON2_TIME_COST", 1 if _KDF_CHEAP else 2))
+ARGON2_MEMORY_COST = int(os.environ.get("ARGON2_MEMORY_COST", 64 if _KDF_CHEAP else 65536))
+ARGON2_PARALLELISM = int(os.environ.get("ARGON2_PARALLELISM", 1 if _KDF_CHEAP else 2))
+
+# New hashes use the first scheme: Argon2id if available, bcrypt otherwise. Hashes of either scheme keep
+# verifying, since the scheme and its costs are stored in the hash itself; needs_rehash() reports hashes
+# made with a deprecated scheme (bcrypt, once Argon2 is available) or with other costs.
+_pwd_context = CryptContext(
+    schemes=(["argon2"] if ARGON2_AVAILABLE else []) + ["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+    argon2__type="ID",
+    argon2__rounds=ARGON2_TIME_COST,
+    argon2__min_rounds=ARGON2_TIME_COST,
+    argon2__max_rounds=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+
+# All password strength rules as one compiled pattern: each lookahead checks one character class,
+# then the length is checked, so a password is validated in a single match call.
+PASSWORD_STRENGTH_RE = re.compile(
+    r"(?=.*[A-Z])"           # At least one uppercase letter
+    r"(?=.*[a-z])"           # At least one lowercase letter
+    r"(?=.*\d)"              # At least one digit
+    r"(?=.*[^a-zA-Z0-9\s])"  # At least one special character (spaces don't count)
+    r".{8,}",                # Minimum length
+    re.DOTALL
+)
+
 def hash_password(password: str) -> str:
     """
-    Hashes a plaintext password using bcrypt.
+    Hashes a plaintext password using Argon2id, or bcrypt when argon2-cffi is not installed.
 
-    Bcrypt is a robust, adaptive, and widely-recommended password hashing function.
-    It automatically handles salt generation, making each hash unique for the same password.
+    Both are robust, adaptive, and widely-recommended password hashing functions.
+    They automatically handle salt generation, making each hash unique for the same password.
 
     :param password: The plaintext password string.
-    :return: The bcrypt hashed password string.
+    :return: The hashed password string.
     :raises TypeError: If the input password is not a string.
     """
     if not isinstance(password, str):
         logger.error(f"Attempted to hash a non-string password: {type(password)}")
         raise TypeError("Password must be a string.")
     try:
-        hashed = bcrypt.hash(password)
+        hashed = _pwd_context.hash(password)
         logger.debug("Password hashed successfully.")
         return hashed
     except Exception as e:
@@ -30,10 +76,10 @@ def hash_password(password: str) -> str:
 
 def verify_password(password: str, hashed_password: str) -> bool:
     """
-    Verifies a plaintext password against a stored bcrypt hashed password.
+    Verifies a plaintext password against a stored Argon2 or bcrypt hashed password.
 
     :param password: The plaintext password string to verify.
-    :param hashed_password: The bcrypt hashed password string stored in the database.
+    :param hashed_password: The hashed password string stored in the database.
     :return: True if the password matches the hash, False otherwise.
     :raises TypeError: If inputs are not strings.
     """
@@ -41,7 +87,7 @@ def verify_password(password: str, hashed_password: str) -> bool:
         logger.error("Attempted to verify non-string password or hash.")
         raise TypeError("Both password and hashed_password must be strings.")
     try:
-        is_valid = bcrypt.verify(password, hashed_password)
+        is_valid = _pwd_context.verify(password, hashed_password)
         if not is_valid:
             logger.warning("Password verification failed for a user (invalid credentials).")
         else:
@@ -55,6 +101,32 @@ def verify_password(password: str, hashed_password: str) -> bool:
         logger.error(f"Unexpected error during password verification: {e}")
         raise # Re-raise the exception after logging
 
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """
+    Awaitable version of verify_password for asyncio callers. The bcrypt check runs in the event
+    loop's default thread pool (bcrypt releases the GIL), so other requests keep being served meanwhile.
+
+    :param password: The plaintext password string to verify.
+    :param hashed_password: The hashed password string stored in the database.
+    :return: True if the password matches the hash, False otherwise.
+    :raises TypeError: If inputs are not strings.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, verify_password, password, hashed_password)
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Checks whether a stored hash should be replaced: it was made with a scheme other than the one
+    hash_password uses now (e.g., bcrypt once Argon2 is available) or with other cost parameters.
+
+    :param hashed_password: The hashed password string stored in the database.
+    :return: True if the password should be re-hashed with the current scheme and cost, False otherwise
+             (including for hashes that cannot be parsed).
+    """
+    try:
+        return _pwd_context.needs_update(hashed_password)
+    except (ValueError, TypeError):
+        return False
+
 def validate_password_strength(password: str) -> bool:
     """
     Validates the strength of a password based on common criteria.
@@ -73,28 +145,55 @@ def validate_password_strength(password: str) -> bool:
         logger.warning(f"Attempted to validate password strength for non-string type: {type(password)}")
         return False
 
-    if len(password) < 8:
+    if len(password) < 8: # O(1) check before any character scanning
         logger.debug("Password fails strength: too short.")
         return False
-    if not re.search(r"[A-Z]", password):
-        logger.debug("Password fails strength: no uppercase.")
-        return False
-    if not re.search(r"[a-z]", password):
-        logger.debug("Password fails strength: no lowercase.")
-        return False
-    if not re.search(r"\d", password):
-        logger.debug("Password fails strength: no digit.")
-        return False
-    # Use a regex that matches any character that is not a letter, number, or underscore
-    if not re.search(r"[^a-zA-Z0-9\s]", password): # Allows spaces, if spaces are allowed in pw
-        logger.debug("Password fails strength: no special character.")
+    if not PASSWORD_STRENGTH_RE.match(password):
+        logger.debug("Password fails strength requirements.")
         return False
 
     logger.debug("Password meets strength requirements.")
     return True
 
+# ASCII codes \s matches (including the \x1c-\x1f separators), for the vectorized checks below
+_ASCII_WHITESPACE = np.array([9, 10, 11, 12, 13, 28, 29, 30, 31, 32], dtype=np.uint8)
+
+def validate_password_strength_batch(passwords: List[str]) -> np.ndarray:
+    """
+    Validates many passwords at once with the same criteria as validate_password_strength.
+    ASCII passwords are checked together as one padded byte matrix with NumPy; other entries
+    (non-ASCII or non-string) go through validate_password_strength one by one.
+
+    :param passwords: A list of plaintext password strings.
+    :return: A boolean array, True where the password meets all strength criteria.
+    """
+    result = np.zeros(len(passwords), dtype=bool)
+    ascii_positions, ascii_bytes = [], []
+    for i, password in enumerate(passwords):
+        if isinstance(password, str) and password.isascii() and '\x00' not in password: # NUL is the padding byte
+            ascii_positions.append(i)
+            ascii_bytes.append(password.encode('ascii'))
+        else:
+            result[i] = validate_password_strength(password)
+    if not ascii_bytes:
+        return result
+
+    max_len = max(len(b) for b in ascii_bytes)
+    if max_len == 0:
+        return result # All empty
+    chars = np.array(ascii_bytes, dtype=f"S{max_len}").view(np.uint8).reshape(len(ascii_bytes), max_len)
+    lengths = np.fromiter((len(b) for b in ascii_bytes), dtype=np.int64, count=len(ascii_bytes))
+    is_upper = (chars >= ord('A')) & (chars <= ord('Z'))
+    is_lower = (chars >= ord('a')) & (chars <= ord('z'))
+    is_digit = (chars >= ord('0')) & (chars <= ord('9'))
+    is_special = (chars != 0) & ~(is_upper | is_lower | is_digit | np.isin(chars, _ASCII_WHITESPACE))
+    result[ascii_positions] = ((lengths >= 8) & is_upper.any(axis=1) & is_lower.any(axis=1)
+                               & is_digit.any(axis=1) & is_special.any(axis=1))
+    return result
+
 # Example Usage (for testing/demonstration)
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s') # Set logging level for demo; the app configures it in app.py
     test_password = "MyStrongPassword123!"
     weak_password = "password"
     no_special_char = "MyStrongPassword123"